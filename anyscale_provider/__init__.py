@@ -3,5 +3,11 @@ def get_provider_info():
         "package-name": "airflow-provider-anyscale",
         "name": "Anyscale Airflow Provider",
         "description": "An Apache Airflow provider for Anyscale.",
-        "versions": ["0.0.1"]
+        "versions": ["0.0.1"],
+        "connection-types": [
+            {
+                "hook-class-name": "anyscale_provider.hooks.anyscale.AnyscaleHook",
+                "connection-type": "anyscale",
+            }
+        ],
     }
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Command line tools of the Anyscale provider.
+
+``anyscale-provider timeline`` aggregates the timelines recorded by the
+provider's tasks (XCom key ``anyscale_timeline``) into per phase percentiles,
+and draws them as a Gantt chart::
+
+    anyscale-provider timeline --dag-id nightly_training --limit 200
+    anyscale-provider timeline --input timelines.jsonl --gantt 5
+
+Timelines are read from the Airflow metadata database, or from a file with
+one timeline per line, as stored in XCom.
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from anyscale_provider.utils.timeline import TIMELINE_XCOM_KEY, phases
+from anyscale_provider.utils.utils import percentile
+
+_GANTT_WIDTH = 60
+
+
+def _read_file(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        content = f.read().strip()
+
+    if content.startswith("["):
+        return json.loads(content)
+
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def _read_xcom(dag_id: Optional[str], task_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    from airflow.models.xcom import XCom
+    from airflow.utils.session import create_session
+
+    with create_session() as session:
+        query = session.query(XCom).filter(XCom.key == TIMELINE_XCOM_KEY)
+
+        if dag_id:
+            query = query.filter(XCom.dag_id == dag_id)
+
+        if task_id:
+            query = query.filter(XCom.task_id == task_id)
+
+        rows = query.order_by(XCom.timestamp.desc()).limit(limit).all()
+
+        return [XCom.deserialize_value(row) for row in rows]
+
+
+def summarize(timelines: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Percentiles of the time spent in each phase, by resource kind."""
+
+    durations: Dict[tuple, List[float]] = defaultdict(list)
+
+    for timeline in timelines:
+        for resource in timeline.get("resources", {}).values():
+            events = resource["events"]
+
+            for phase in phases(events):
+                durations[(resource["kind"], phase["phase"])].append(phase["duration"])
+
+            if len(events) > 1:
+                durations[(resource["kind"], "total")].append(events[-1][1] - events[0][1])
+
+    return [
+        {
+            "kind": kind,
+            "phase": phase,
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values),
+        }
+        for (kind, phase), values in sorted(durations.items())
+    ]
+
+
+def gantt(timeline: Dict[str, Any], width: int = _GANTT_WIDTH) -> List[str]:
+    """One bar per phase, on a time axis shared by the task's resources."""
+
+    resources = timeline.get("resources", {})
+    timestamps = [at for resource in resources.values() for _, at in resource["events"]]
+
+    if not timestamps:
+        return []
+
+    start, end = min(timestamps), max(timestamps)
+    scale = width / max(end - start, 1e-3)
+
+    lines = ["{} {} {} ({:.1f}s)".format(
+        timeline.get("dag_id", "?"), timeline.get("task_id", "?"), timeline.get("run_id", "?"),
+        end - start)]
+
+    for resource_id, resource in resources.items():
+        lines.append(f"  {resource['kind']} {resource_id}")
+
+        for phase in phases(resource["events"]):
+            offset = int((phase["start"] - start) * scale)
+            length = max(int(phase["duration"] * scale), 1)
+
+            lines.append("    {:<24} |{}{}{}| {:>8.1f}s".format(
+                phase["phase"][:24],
+                " " * offset,
+                "#" * length,
+                " " * max(width - offset - length, 0),
+                phase["duration"],
+            ))
+
+    return lines
+
+
+def timeline_command(args: argparse.Namespace) -> int:
+    if args.input:
+        timelines = _read_file(args.input)
+    else:
+        timelines = _read_xcom(args.dag_id, args.task_id, args.limit)
+
+    if not timelines:
+        print("no timelines found")
+        return 1
+
+    rows = summarize(timelines)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{len(timelines)} task instances")
+    print(f"{'kind':<16} {'phase':<24} {'count':>6} {'p50 s':>9} {'p90 s':>9} "
+          f"{'p99 s':>9} {'max s':>9}")
+
+    for row in rows:
+        print(f"{row['kind']:<16} {row['phase'][:24]:<24} {row['count']:>6} {row['p50']:>9.1f} "
+              f"{row['p90']:>9.1f} {row['p99']:>9.1f} {row['max']:>9.1f}")
+
+    for timeline in timelines[:args.gantt]:
+        print()
+        print("\n".join(gantt(timeline)))
+
+    return 0
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="anyscale-provider", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    timeline = subparsers.add_parser("timeline", help="report on the recorded resource timelines")
+    timeline.add_argument("--input", default=None,
+                          help="read timelines from this file instead of the metadata database")
+    timeline.add_argument("--dag-id", default=None)
+    timeline.add_argument("--task-id", default=None)
+    timeline.add_argument("--limit", type=int, default=500,
+                          help="number of most recent task instances to read")
+    timeline.add_argument("--gantt", type=int, default=0,
+                          help="draw the timelines of this many task instances")
+    timeline.add_argument("--json", action="store_true", help="print the percentiles as json")
+    timeline.set_defaults(func=timeline_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from airflow.decorators import dag
+from airflow.utils.trigger_rule import TriggerRule
+
+from anyscale_provider.operators.cluster_pool import (
+    AnyscaleLeaseClusterOperator,
+    AnyscaleReleaseClusterOperator,
+)
+from anyscale_provider.operators.session_command import (
+    AnyscaleCreateSessionCommandOperator
+)
+
+
+default_args = {
+    "owner": "airflow",
+    "retries": 1,
+    "retry_delay": 0,
+}
+
+
+@dag(
+    default_args=default_args,
+    schedule_interval="@hourly",
+    start_date=datetime(2022, 9, 30),
+    catchup=False,
+    tags=["demo"],
+)
+def anyscale_cluster_pool():
+
+    cluster = AnyscaleLeaseClusterOperator(
+        task_id="lease_cluster",
+        pool_name="<pool_name>",
+        project_id="<project_id>",
+        compute_config_id="<compute_config_id>",
+        cluster_environment_build_id="<cluster_environment_build_id>",
+        auth_token="<auth_token>",
+    )
+
+    job = AnyscaleCreateSessionCommandOperator(
+        task_id="submit_job",
+        auth_token="<auth_token>",
+        session_id=cluster.output["id"],
+        shell_command="python3 -c 'import ray'",
+        wait_for_completion=True,
+    )
+
+    release = AnyscaleReleaseClusterOperator(
+        task_id="release_cluster",
+        pool_name="<pool_name>",
+        cluster_id=cluster.output["id"],
+        idle_ttl=1800,
+        auth_token="<auth_token>",
+        trigger_rule=TriggerRule.ALL_DONE,
+    )
+
+    cluster >> job >> release
+
+
+dag = anyscale_cluster_pool()
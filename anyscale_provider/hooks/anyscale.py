@@ -0,0 +1,678 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple)
+
+from urllib3.util.retry import Retry
+
+from airflow.hooks.base import BaseHook
+from airflow.configuration import conf
+from airflow.exceptions import AirflowException
+
+from anyscale_provider.utils import metrics
+from anyscale_provider.utils.cache import TTLCache
+from anyscale_provider.utils.log_export import iter_json_string
+from anyscale_provider.utils.pagination import paginate
+from anyscale_provider.utils.rate_limit import TokenBucket
+from anyscale_provider.utils.retry import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry, get_circuit_breaker)
+
+if TYPE_CHECKING:
+    from anyscale import AnyscaleSDK
+    from anyscale.sdk.anyscale_client.models.cluster import Cluster
+    from anyscale.sdk.anyscale_client.models.production_job import ProductionJob
+    from anyscale.sdk.anyscale_client.models.production_service import ProductionService
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_HOST = "https://api.anyscale.com"
+_DEFAULT_POOL_MAXSIZE = 100
+
+
+class TransportOptions(NamedTuple):
+    host: str = _DEFAULT_HOST
+    pool_maxsize: int = _DEFAULT_POOL_MAXSIZE
+    keep_alive: bool = True
+    retries: Optional[int] = None
+    compression: bool = False
+
+
+# One SDK (and therefore one urllib3 pool manager with keep-alive
+# connections) per credentials, shared by every task in the process.
+_sdk_pool: Dict[Tuple[str, TransportOptions], "AnyscaleSDK"] = {}
+_sdk_pool_lock = threading.Lock()
+
+
+def _build_sdk(auth_token: str, transport: TransportOptions) -> "AnyscaleSDK":
+    # the sdk pulls in the whole generated client, keep it out of dag parsing.
+    from anyscale import AnyscaleSDK
+
+    sdk = AnyscaleSDK(auth_token=auth_token, host=transport.host)
+
+    # the pool manager creates its connection pools lazily, so updating the
+    # pool kwargs here applies to every connection the SDK opens later on.
+    pool_kw = sdk.api_client.rest_client.pool_manager.connection_pool_kw
+    pool_kw["maxsize"] = transport.pool_maxsize
+    sdk.api_client.configuration.connection_pool_maxsize = transport.pool_maxsize
+
+    if not transport.keep_alive:
+        pool_kw.pop("socket_options", None)
+        sdk.api_client.set_default_header("Connection", "close")
+
+    if transport.retries is not None:
+        pool_kw["retries"] = Retry(
+            total=transport.retries,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+        )
+
+    if transport.compression:
+        sdk.api_client.set_default_header("Accept-Encoding", "gzip")
+
+    return sdk
+
+
+def get_sdk(auth_token: str, transport: TransportOptions = TransportOptions()) -> "AnyscaleSDK":
+    key = (auth_token, transport)
+
+    with _sdk_pool_lock:
+        sdk = _sdk_pool.get(key)
+
+        if sdk is None:
+            sdk = _build_sdk(auth_token, transport)
+            _sdk_pool[key] = sdk
+
+    return sdk
+
+
+def clear_sdk_pool() -> None:
+    with _sdk_pool_lock:
+        _sdk_pool.clear()
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    namespace: str,
+    rate: Optional[float] = None,
+    burst: Optional[float] = None,
+) -> Optional[TokenBucket]:
+
+    if rate is None:
+        rate = conf.getfloat("anyscale", "api_rate_limit", fallback=0)
+
+    if not rate:
+        return None
+
+    if burst is None:
+        burst = conf.getfloat("anyscale", "api_rate_burst", fallback=0) or None
+
+    with _rate_limiters_lock:
+        rate_limiter = _rate_limiters.get(namespace)
+
+        if rate_limiter is None:
+            directory = conf.get(
+                "anyscale", "api_rate_limit_dir", fallback=None) or tempfile.gettempdir()
+
+            rate_limiter = TokenBucket(
+                rate=rate,
+                capacity=burst,
+                path=os.path.join(directory, f"anyscale-api-{namespace}.bucket"),
+            )
+            _rate_limiters[namespace] = rate_limiter
+
+    return rate_limiter
+
+
+def _accepts_kwargs(method: Callable) -> bool:
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+
+    return any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+class _SDKProxy:
+    """Wraps every public SDK method so that calls go through the hook's policies."""
+
+    def __init__(
+        self,
+        sdk: "AnyscaleSDK",
+        rate_limiter: Optional[TokenBucket],
+        timeout: Optional[float] = None,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self._sdk = sdk
+        self._rate_limiter = rate_limiter
+        self._timeout = timeout
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
+
+    def _call(self, name: str, method: Callable, *args, **kwargs) -> Any:
+        if self._timeout is not None and _accepts_kwargs(method):
+            kwargs.setdefault("_request_timeout", self._timeout)
+
+        def on_retry(retry: int, e: BaseException, delay: float) -> None:
+            log.warning("%s failed (%s), retry %s in %.1fs", name, e, retry, delay)
+            metrics.record_api_retry(name)
+
+        try:
+            return call_with_retry(
+                name,
+                lambda: self._attempt(name, method, *args, **kwargs),
+                self._retry_policy,
+                self._circuit_breaker,
+                on_retry,
+            )
+
+        except CircuitOpenError:
+            metrics.record_api_rejected(name)
+            raise
+
+    def _attempt(self, name: str, method: Callable, *args, **kwargs) -> Any:
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+
+        status = None
+        started_at = time.monotonic()
+
+        try:
+            return method(*args, **kwargs)
+
+        except Exception as e:
+            status = getattr(e, "status", None) or type(e).__name__
+            raise
+
+        finally:
+            metrics.record_api_call(name, time.monotonic() - started_at, status)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._sdk, name)
+
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(name, attr, *args, **kwargs)
+
+        return call
+
+
+def _setting(extras: Dict[str, Any], key: str, option: str, fallback: Any, convert: Callable[[Any], Any]) -> Any:
+    """The connection extra ``key``, else the ``[anyscale] option`` config; an explicit 0 is kept."""
+    value = extras.get(key)
+
+    if value is None:
+        value = conf.get("anyscale", option, fallback=fallback)
+
+    return convert(value)
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    return bool(value)
+
+
+_resolution_cache: Optional[TTLCache] = None
+_resolution_cache_lock = threading.Lock()
+
+
+def get_resolution_cache() -> TTLCache:
+    global _resolution_cache
+
+    with _resolution_cache_lock:
+        if _resolution_cache is None:
+            _resolution_cache = TTLCache(
+                maxsize=conf.getint("anyscale", "resolution_cache_size", fallback=1024),
+                ttl=conf.getfloat("anyscale", "resolution_cache_ttl", fallback=300),
+                path=conf.get("anyscale", "resolution_cache_path", fallback=None) or None,
+            )
+
+    return _resolution_cache
+
+
+_PAGE_SIZE = 50
+_MAX_PAGES = 10
+
+
+def _drop_none(**kwargs) -> Dict[str, Any]:
+    return {key: value for key, value in kwargs.items() if value is not None}
+
+
+def _list_clusters(sdk, scope: Optional[str], paging_token: Optional[str]):
+    clusters_query: Dict[str, Any] = {"paging": {"count": _PAGE_SIZE}}
+
+    if scope is not None:
+        clusters_query["project_id"] = scope
+
+    if paging_token is not None:
+        clusters_query["paging"]["paging_token"] = paging_token
+
+    return sdk.search_clusters(clusters_query=clusters_query)
+
+
+def _list_production_jobs(sdk, scope: Optional[str], paging_token: Optional[str]):
+    return sdk.list_production_jobs(
+        project_id=scope, count=_PAGE_SIZE, paging_token=paging_token)
+
+
+def _list_services(sdk, scope: Optional[str], paging_token: Optional[str]):
+    return sdk.list_services(
+        project_id=scope, count=_PAGE_SIZE, paging_token=paging_token)
+
+
+def _list_session_commands(sdk, scope: Optional[str], paging_token: Optional[str]):
+    return sdk.list_session_commands(
+        session_id=scope, count=_PAGE_SIZE, paging_token=paging_token)
+
+
+_LISTERS: Dict[str, Callable] = {
+    "cluster": _list_clusters,
+    "production_job": _list_production_jobs,
+    "service": _list_services,
+    "session_command": _list_session_commands,
+}
+
+
+class AnyscaleHook(BaseHook):
+    """
+    Gives access to the Anyscale SDK.
+
+    Credentials come from ``auth_token`` or from an ``anyscale`` connection,
+    whose password is the API token and whose extras tune the HTTP layer:
+    ``host``, ``pool_maxsize``, ``keep_alive``, ``timeout`` (seconds per
+    request), ``retries``, ``compression``, ``rate_limit`` and ``rate_burst``.
+
+    SDK clients are pooled per process and keyed by credentials, so tasks
+    sharing a worker reuse the same HTTP connections instead of opening new
+    ones on every poke.
+
+    Name lookups (projects, compute configs, cluster environment builds and
+    clusters) go through a process-wide TTL cache, optionally backed by a
+    sqlite file shared by the worker's processes.
+
+    When a rate limit is set (``[anyscale] api_rate_limit`` or the
+    connection's ``rate_limit``), every SDK call draws from a token bucket
+    shared by all the processes of the host using the same credentials.
+    """
+
+    conn_name_attr = "conn_id"
+    default_conn_name = "anyscale_default"
+    conn_type = "anyscale"
+    hook_name = "Anyscale"
+
+    def __init__(
+        self,
+        *,
+        conn_id: Optional[str] = None,
+        auth_token: Optional[str] = None,
+        host: Optional[str] = None,
+        pool_maxsize: Optional[int] = None,
+    ):
+        super().__init__()
+
+        extras: Dict[str, Any] = {}
+
+        if conn_id is not None or auth_token is None:
+            conn = self.get_connection(conn_id or self.default_conn_name)
+
+            auth_token = auth_token or conn.password
+            extras = conn.extra_dejson
+
+            if host is None and conn.host:
+                host = conn.host if "://" in conn.host else f"https://{conn.host}"
+
+        if not auth_token:
+            raise AirflowException("no anyscale auth token was provided")
+
+        self.conn_id = conn_id
+        self.auth_token = auth_token
+        self.host = host or extras.get("host") or _DEFAULT_HOST
+
+        if pool_maxsize is None:
+            pool_maxsize = _setting(
+                extras, "pool_maxsize", "connection_pool_maxsize", _DEFAULT_POOL_MAXSIZE, int)
+
+        self.pool_maxsize = pool_maxsize
+
+        retries = extras.get("retries")
+
+        self.retry_policy = RetryPolicy(
+            attempts=_setting(extras, "retry_attempts", "api_retry_attempts", 4, int),
+            initial_delay=_setting(extras, "retry_delay", "api_retry_delay", 1.0, float),
+            max_delay=_setting(extras, "retry_max_delay", "api_retry_max_delay", 30.0, float),
+        )
+
+        self.circuit_threshold = _setting(
+            extras, "circuit_threshold", "api_circuit_threshold", 5, int)
+        self.circuit_reset = _setting(extras, "circuit_reset", "api_circuit_reset", 30.0, float)
+
+        self.transport = TransportOptions(
+            host=self.host,
+            pool_maxsize=self.pool_maxsize,
+            keep_alive=_as_bool(extras.get("keep_alive", True)),
+            retries=int(retries) if retries is not None else None,
+            compression=_as_bool(extras.get("compression", False)),
+        )
+
+        timeout = extras.get("timeout")
+        self.timeout = float(timeout) if timeout is not None else None
+
+        rate_limit = extras.get("rate_limit")
+        self.rate_limit = float(rate_limit) if rate_limit is not None else None
+
+        rate_burst = extras.get("rate_burst")
+        self.rate_burst = float(rate_burst) if rate_burst is not None else None
+
+        self._sdk_proxy: Optional[_SDKProxy] = None
+
+    @staticmethod
+    def get_ui_field_behaviour() -> Dict[str, Any]:
+        return {
+            "hidden_fields": ["schema", "login", "port"],
+            "relabeling": {
+                "host": "API Host",
+                "password": "API Token",
+            },
+            "placeholders": {
+                "host": _DEFAULT_HOST,
+                "extra": json.dumps({
+                    "pool_maxsize": _DEFAULT_POOL_MAXSIZE,
+                    "keep_alive": True,
+                    "timeout": 30,
+                    "retries": 3,
+                    "compression": True,
+                    "rate_limit": 10,
+                    "rate_burst": 20,
+                    "retry_attempts": 4,
+                    "circuit_threshold": 5,
+                }),
+            },
+        }
+
+    def get_conn(self) -> "AnyscaleSDK":
+        # built once per hook: the client, limiter and breaker it wraps are shared anyway.
+        if self._sdk_proxy is None:
+            self._sdk_proxy = self._build_conn()
+
+        return self._sdk_proxy
+
+    def _build_conn(self) -> _SDKProxy:
+        sdk = get_sdk(self.auth_token, self.transport)
+        rate_limiter = get_rate_limiter(self._namespace, self.rate_limit, self.rate_burst)
+
+        circuit_breaker = None
+        if self.circuit_threshold > 0:
+            # per API host: an outage affects every token alike.
+            circuit_breaker = get_circuit_breaker(
+                self.host, self.circuit_threshold, self.circuit_reset)
+
+        return _SDKProxy(sdk, rate_limiter, self.timeout, self.retry_policy, circuit_breaker)
+
+    @property
+    def sdk(self) -> "AnyscaleSDK":
+        return self.get_conn()
+
+    @property
+    def _namespace(self) -> str:
+        return hashlib.sha256(f"{self.host}:{self.auth_token}".encode()).hexdigest()[:16]
+
+    def _cache_key(self, kind: str, *parts: Optional[str]) -> str:
+        return ":".join([kind, self._namespace] + [str(part) for part in parts])
+
+    def _resolve(self, key: str, loader: Callable[[], Any]) -> Any:
+        cache = get_resolution_cache()
+
+        value = cache.get(key)
+        if value is None:
+            value = loader()
+            cache.set(key, value)
+
+        return value
+
+    def get_project_id(self, name: str) -> str:
+
+        def load() -> str:
+            projects = self.sdk.search_projects(
+                projects_query={"name": {"equals": name}}).results
+
+            if not projects:
+                raise AirflowException(f"project {name} not found")
+
+            return projects[0].id
+
+        return self._resolve(self._cache_key("project", name), load)
+
+    def get_compute_config_id(self, name: str, project_id: Optional[str] = None) -> str:
+
+        def load() -> str:
+            cluster_computes_query = {"name": {"equals": name}}
+            if project_id:
+                cluster_computes_query["project_id"] = project_id
+
+            cluster_computes = self.sdk.search_cluster_computes(
+                cluster_computes_query=cluster_computes_query).results
+
+            if not cluster_computes:
+                raise AirflowException(f"compute config {name} not found")
+
+            return cluster_computes[0].id
+
+        return self._resolve(self._cache_key("compute_config", project_id, name), load)
+
+    def get_cluster_environment_build_id(self, cluster_environment: str) -> str:
+        """
+        Resolves ``name`` or ``name:revision`` to a build id, the latest build
+        being used when no revision is given.
+        """
+        name, _, revision = cluster_environment.partition(":")
+
+        def load() -> str:
+            cluster_environments = self.sdk.search_cluster_environments(
+                cluster_environments_query={"name": {"equals": name}}).results
+
+            if not cluster_environments:
+                raise AirflowException(f"cluster environment {name} not found")
+
+            cluster_environment_id = cluster_environments[0].id
+
+            if not revision:
+                builds = self.sdk.list_cluster_environment_builds(
+                    cluster_environment_id, desc=True, count=1).results
+
+            else:
+                builds = [
+                    build for build in self._list_builds(cluster_environment_id)
+                    if build.revision == int(revision)
+                ]
+
+            if not builds:
+                raise AirflowException(
+                    f"no build found for cluster environment {cluster_environment}")
+
+            return builds[0].id
+
+        return self._resolve(self._cache_key("build", cluster_environment), load)
+
+    def _list_builds(self, cluster_environment_id: str):
+        return paginate(
+            lambda paging_token: self.sdk.list_cluster_environment_builds(
+                cluster_environment_id, paging_token=paging_token),
+            prefetch=False,
+        )
+
+    def find_cluster(self, name: str, project_id: Optional[str] = None) -> Optional["Cluster"]:
+        from anyscale.sdk.anyscale_client.rest import ApiException
+
+        key = self._cache_key("cluster", project_id, name)
+        cache = get_resolution_cache()
+
+        cluster_id = cache.get(key)
+        if cluster_id is not None:
+            try:
+                return self.sdk.get_cluster(cluster_id).result
+
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+
+                cache.invalidate(key)
+
+        cluster = next(iter(self.iter_clusters(
+            project_id=project_id, name=name, prefetch=False)), None)
+
+        if cluster is None:
+            return None
+
+        cache.set(key, cluster.id)
+        return cluster
+
+    def invalidate_cluster(self, name: str, project_id: Optional[str] = None) -> None:
+        get_resolution_cache().invalidate(self._cache_key("cluster", project_id, name))
+
+    def iter_clusters(
+        self,
+        project_id: Optional[str] = None,
+        name: Optional[str] = None,
+        name_contains: Optional[str] = None,
+        state_filter: Optional[List[str]] = None,
+        archive_status: Optional[str] = None,
+        page_size: int = _PAGE_SIZE,
+        prefetch: bool = True,
+    ) -> Iterator["Cluster"]:
+        """
+        Iterates over the clusters matching the filters, which are applied by
+        the API. ``name`` matches exactly, ``name_contains`` any part of the name.
+        """
+
+        clusters_query: Dict[str, Any] = {"paging": {"count": page_size}}
+
+        if project_id is not None:
+            clusters_query["project_id"] = project_id
+
+        if name is not None:
+            clusters_query["name"] = {"equals": name}
+        elif name_contains is not None:
+            clusters_query["name"] = {"contains": name_contains}
+
+        if state_filter:
+            clusters_query["state_filter"] = list(state_filter)
+
+        if archive_status is not None:
+            clusters_query["archive_status"] = archive_status
+
+        def fetch_page(paging_token: Optional[str]):
+            query = dict(clusters_query, paging=dict(clusters_query["paging"]))
+
+            if paging_token is not None:
+                query["paging"]["paging_token"] = paging_token
+
+            return self.sdk.search_clusters(clusters_query=query)
+
+        return paginate(fetch_page, prefetch=prefetch)
+
+    def iter_production_jobs(
+        self,
+        project_id: Optional[str] = None,
+        name: Optional[str] = None,
+        state_filter: Optional[List[str]] = None,
+        creator_id: Optional[str] = None,
+        page_size: int = _PAGE_SIZE,
+        prefetch: bool = True,
+    ) -> Iterator["ProductionJob"]:
+        """Iterates over the production jobs matching the filters, which are applied by the API."""
+
+        filters = _drop_none(
+            project_id=project_id, name=name, state_filter=state_filter, creator_id=creator_id)
+
+        return paginate(
+            lambda paging_token: self.sdk.list_production_jobs(
+                count=page_size, paging_token=paging_token, **filters),
+            prefetch=prefetch,
+        )
+
+    def iter_services(
+        self,
+        project_id: Optional[str] = None,
+        name: Optional[str] = None,
+        state_filter: Optional[List[str]] = None,
+        creator_id: Optional[str] = None,
+        page_size: int = _PAGE_SIZE,
+        prefetch: bool = True,
+    ) -> Iterator["ProductionService"]:
+        """Iterates over the services matching the filters, which are applied by the API."""
+
+        filters = _drop_none(
+            project_id=project_id, name=name, state_filter=state_filter, creator_id=creator_id)
+
+        return paginate(
+            lambda paging_token: self.sdk.list_services(
+                count=page_size, paging_token=paging_token, **filters),
+            prefetch=prefetch,
+        )
+
+    def iter_job_log_chunks(
+        self, production_job_id: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Streams the logs of the last run of a production job, ``chunk_size``
+        bytes of response at a time, without loading them in memory.
+        """
+
+        job_run_id = self.sdk.get_production_job(
+            production_job_id=production_job_id).result.last_job_run_id
+
+        if not job_run_id:
+            raise AirflowException(f"production job {production_job_id} has no job run")
+
+        response = self.sdk.get_job_logs(job_run_id, _preload_content=False)
+
+        try:
+            for piece in iter_json_string(response.stream(chunk_size, decode_content=True)):
+                yield piece.encode("utf-8", errors="replace")
+
+        finally:
+            response.release_conn()
+
+    def batch_fetch(
+        self,
+        kind: str,
+        scope: Optional[str],
+        wanted: Set[str],
+        fetch_one: Callable[[str], Any],
+    ) -> Dict[str, Any]:
+        """
+        Fetches the ``wanted`` resources of a scope with as few list calls as
+        possible, falling back to ``fetch_one`` for the ones not listed within
+        the first pages.
+        """
+        lister = _LISTERS[kind]
+        found: Dict[str, Any] = {}
+
+        paging_token = None
+        for _ in range(_MAX_PAGES):
+            response = lister(self.sdk, scope, paging_token)
+
+            for resource in response.results:
+                if resource.id in wanted:
+                    found[resource.id] = resource
+
+            paging_token = response.metadata.next_paging_token
+            if paging_token is None or len(found) == len(wanted):
+                break
+
+        for resource_id in wanted - set(found):
+            found[resource_id] = fetch_one(resource_id)
+
+        return found
@@ -1,23 +1,352 @@
-from anyscale import AnyscaleSDK
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
 from airflow.utils.context import Context
+from airflow.exceptions import AirflowException
 
 from airflow.models.baseoperator import BaseOperator
+from airflow.models.xcom import XCOM_RETURN_KEY
 from airflow.compat.functools import cached_property
 
+from anyscale_provider.hooks.anyscale import AnyscaleHook
+from anyscale_provider.sensors.base import AnyscaleBaseSensor
+from anyscale_provider.utils import push_to_xcom, state_store, XCOM_MODE_KEYS
+from anyscale_provider.utils.registry import AnyscaleRunRegistry, stop_resources
+from anyscale_provider.utils.timeline import SUBMIT, SUBMITTED, TimelineRecorder
+
+if TYPE_CHECKING:
+    from anyscale import AnyscaleSDK
+
 
 class AnyscaleBaseOperator(BaseOperator):
     def __init__(
         self,
         *,
-        auth_token: str,
+        auth_token: Optional[str] = None,
+        conn_id: Optional[str] = None,
+        xcom_mode: str = XCOM_MODE_KEYS,
+        xcom_fields: Optional[List[str]] = None,
+        resume_submissions: bool = True,
+        register_resources: bool = False,
+        cancel_on_kill: bool = True,
+        cancel_timeout: float = 0,
         **kwargs
     ):
         self.auth_token = auth_token
+        self.conn_id = conn_id
+        self.xcom_mode = xcom_mode
+        self.xcom_fields = xcom_fields
+        self.resume_submissions = resume_submissions
+        self.register_resources = register_resources
+        self.cancel_on_kill = cancel_on_kill
+        self.cancel_timeout = cancel_timeout
+        self._ignore_keys = []
+        self._running: List[Tuple[str, str]] = []
+        self._timeline = TimelineRecorder()
         super().__init__(**kwargs)
 
     @cached_property
-    def sdk(self) -> AnyscaleSDK:
-        return AnyscaleSDK(auth_token=self.auth_token)
+    def hook(self) -> AnyscaleHook:
+        return AnyscaleHook(conn_id=self.conn_id, auth_token=self.auth_token)
+
+    @cached_property
+    def sdk(self) -> "AnyscaleSDK":
+        return self.hook.get_conn()
+
+    def _push_to_xcom(self, result: dict, context: Context) -> None:
+        push_to_xcom(
+            result,
+            context,
+            ignore_keys=self._ignore_keys,
+            fields=self.xcom_fields,
+            mode=self.xcom_mode,
+        )
+
+    def _resolve_project_id(self, project_id: Optional[str], project_name: Optional[str]) -> Optional[str]:
+        if project_id or not project_name:
+            return project_id
+
+        return self.hook.get_project_id(project_name)
+
+    def _resolve_compute_config_id(
+        self,
+        compute_config_id: Optional[str],
+        compute_config_name: Optional[str],
+        project_id: Optional[str] = None,
+    ) -> Optional[str]:
+        if compute_config_id or not compute_config_name:
+            return compute_config_id
+
+        return self.hook.get_compute_config_id(compute_config_name, project_id)
+
+    def _task_instance_key(self, prefix: str, context: Context) -> str:
+        ti = context["ti"]
+
+        return "{}:{}:{}:{}:{}".format(
+            prefix,
+            state_store.key_part(ti.dag_id),
+            state_store.key_part(ti.task_id),
+            state_store.key_part(ti.run_id),
+            getattr(ti, "map_index", -1),
+        )
+
+    def _submission_key(self, context: Context) -> str:
+        return self._task_instance_key("anyscale_submission", context)
+
+    def _save_submission(self, context: Context, resource_id: str) -> None:
+        """Remembers the resource this try created, so that retries re-attach to it."""
+        if self.resume_submissions:
+            state_store.put(self._submission_key(context), {
+                "id": resource_id,
+                "try_number": context["ti"].try_number,
+                "submitted_at": time.time(),
+            })
+
+    def _clear_submission(self, context: Context) -> None:
+        if self.resume_submissions:
+            state_store.delete(self._submission_key(context))
+
+    def _resume_submission(
+        self,
+        context: Context,
+        fetch: Callable[[str], Any],
+        can_resume: Callable[[Any], bool],
+    ) -> Optional[Any]:
+        """
+        Returns the resource submitted by a previous try of this task instance,
+        or ``None`` when there is none or it already failed and should be
+        submitted again.
+        """
+        from anyscale.sdk.anyscale_client.rest import ApiException
+
+        if not self.resume_submissions:
+            return None
+
+        record = state_store.get(self._submission_key(context))
+        if record is None:
+            return None
+
+        try:
+            resource = fetch(record["id"])
+
+        except ApiException as e:
+            if e.status != 404:
+                raise
+
+            resource = None
+
+        if resource is None or not can_resume(resource):
+            self.log.info(
+                "%s from try %s can not be resumed, submitting again",
+                record["id"], record.get("try_number"))
+            return None
+
+        self.log.info(
+            "re-attaching to %s submitted by try %s", record["id"], record.get("try_number"))
+
+        return resource
+
+    def _register(
+        self,
+        context: Context,
+        kind: str,
+        resource_id: str,
+        scope: Optional[str] = None,
+        owned: bool = False,
+    ) -> None:
+        """
+        Records a resource this run has to stop, see :class:`AnyscaleRunRegistry`.
+        Only done when the operator was asked to, with ``register_resources``,
+        or for a resource the task explicitly ``owned``.
+        """
+        if self.register_resources or owned:
+            AnyscaleRunRegistry.from_context(self.hook, context).register(
+                kind, resource_id, scope=scope, task_id=self.task_id)
+
+    def _unregister(self, context: Context, kind: str, resource_id: str) -> None:
+        if self.register_resources:
+            AnyscaleRunRegistry.from_context(self.hook, context).unregister(kind, resource_id)
+
+    def _mark_submitted(self, kind: str, resource_id: str, started_at: float) -> None:
+        """Records when the call creating a resource was made and when it returned."""
+        self._timeline.mark(kind, resource_id, SUBMIT, started_at)
+        self._timeline.mark(kind, resource_id, SUBMITTED)
+
+    def _track(self, kind: str, resource_id: str) -> None:
+        """Marks a resource as running on behalf of this task, to be cancelled on kill."""
+        self._running.append((kind, resource_id))
+
+    def _untrack(self, kind: str, resource_id: str) -> None:
+        if (kind, resource_id) in self._running:
+            self._running.remove((kind, resource_id))
+
+    def _submit_all(
+        self,
+        context: Context,
+        kind: str,
+        targets: List[Any],
+        submit: Callable[[Any], Any],
+        scope: Callable[[Any], Optional[str]],
+        describe: Callable[[Any], Dict[str, Any]],
+        max_concurrency: int,
+    ) -> List[Any]:
+        """
+        Creates one resource per target with ``submit``, ``max_concurrency``
+        at a time, registering and tracking each one as soon as it exists.
+
+        If any submission fails, the resources already created are cancelled
+        (unless ``cancel_on_kill`` is False), one row per target, described
+        by ``describe``, is pushed to XCom with its id or error, and the task
+        fails.
+        """
+
+        def attempt(target: Any) -> Tuple[Optional[Any], Optional[Exception]]:
+            try:
+                resource = submit(target)
+
+            except Exception as e:
+                self.log.warning("failed to create %s %s: %s", kind, describe(target), e)
+                return None, e
+
+            self._track(kind, resource.id)
+            self._register(context, kind, resource.id, scope(resource))
+
+            return resource, None
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            outcomes = list(executor.map(attempt, targets))
+
+        errors = [error for _, error in outcomes if error is not None]
+
+        if not errors:
+            return [resource for resource, _ in outcomes]
+
+        created = [(kind, resource.id) for resource, _ in outcomes if resource is not None]
+
+        if created and self.cancel_on_kill:
+            # the run's teardown unregisters them once they are seen stopped.
+            self._cancel_running(created)
+
+            for resource in created:
+                self._untrack(*resource)
+
+        context["ti"].xcom_push(key=XCOM_RETURN_KEY, value=[
+            dict(
+                describe(target),
+                id=resource.id if resource is not None else None,
+                error=str(error) if error is not None else None,
+            )
+            for target, (resource, error) in zip(targets, outcomes)
+        ])
+
+        raise AirflowException("{} of {} {}s could not be created, {} created: {}".format(
+            len(errors), len(targets), kind,
+            "cancelled" if created and self.cancel_on_kill else "left running",
+            ", ".join(resource_id for _, resource_id in created) or "none"))
+
+    def _cancel_running(self, running: List[Tuple[str, str]]) -> None:
+        self.log.info("cancelling %s", ", ".join(f"{kind} {rid}" for kind, rid in running))
+
+        try:
+            not_stopped = stop_resources(self.hook, running, timeout=self.cancel_timeout)
+
+        except Exception:
+            self.log.exception("failed to cancel %s", running)
+            return
+
+        if self.cancel_timeout and not_stopped:
+            self.log.warning(
+                "still running after %ss: %s", self.cancel_timeout,
+                ", ".join(f"{kind} {rid}" for kind, rid in not_stopped))
+
+    def on_kill(self) -> None:
+        if self.cancel_on_kill and self._running:
+            self._cancel_running(self._running)
+
+    def _defer(
+        self,
+        context: Context,
+        trigger: Any,
+        method_name: str = "execute_complete",
+        **kwargs,
+    ) -> None:
+        """
+        Defers to ``trigger``, remembering the running resources so that they
+        are cancelled if the deferral times out. ``kwargs`` are passed on to
+        ``method_name``.
+        """
+        if self.cancel_on_kill:
+            key = self._task_instance_key("anyscale_running", context)
+
+            if self._running:
+                state_store.put(key, [list(resource) for resource in self._running])
+            else:
+                # e.g. a backoff deferral: what ran before has already stopped.
+                state_store.delete(key)
+
+        self.defer(
+            trigger=trigger,
+            method_name=method_name,
+            kwargs={**kwargs, "timeline": self._timeline.to_dict()},
+        )
+
+    def resume_execution(self, next_method: str, next_kwargs: Optional[Dict[str, Any]], context: Context):
+        # airflow >= 2.7 resumes deferred tasks through this method, so the
+        # timeline kwarg is taken out before next_method is called.
+        next_kwargs = dict(next_kwargs or {})
+        self._timeline.merge(next_kwargs.pop("timeline", None))
+
+        # only anyscale triggers send dicts, a TimeDeltaTrigger sends a datetime.
+        event = next_kwargs.get("event")
+        if isinstance(event, dict):
+            self._timeline.merge(event.get("timeline"))
+
+        key = self._task_instance_key("anyscale_running", context)
+        running = state_store.get(key) if self.cancel_on_kill else None
+
+        if running is not None:
+            # still running on behalf of this task, cancelled if it is killed now.
+            self._running = [tuple(resource) for resource in running]
+
+            # the trigger timed out, airflow fails the task without running it.
+            if next_method == "__fail__":
+                self._cancel_running(self._running)
+
+        # the record is only dropped once next_method returned or failed; a
+        # new deferral (TaskDeferred is not an Exception) has replaced it.
+        try:
+            result = super().resume_execution(next_method, next_kwargs, context)
+
+        except Exception:
+            if running is not None:
+                state_store.delete(key)
+
+            self._timeline.push(context)
+            raise
+
+        if running is not None:
+            state_store.delete(key)
+
+        return result
+
+    def post_execute(self, context: Any, result: Any = None) -> None:
+        super().post_execute(context, result)
+        self._timeline.push(context)
+
+    def _wait_for(self, sensor: AnyscaleBaseSensor, context: Context) -> None:
+        attempt = 0
+        # the sensor records into the task's timeline.
+        sensor._timeline = self._timeline
+
+        try:
+            while not sensor.poke(context):
+                time.sleep(sensor.next_poll_delay(attempt))
+                attempt += 1
+
+        except Exception:
+            self._timeline.push(context)
+            raise
 
     def execute(self, context: Context):
         raise NotImplementedError('Please implement execute() in subclass')
\ No newline at end of file
@@ -1,18 +1,15 @@
 import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
-from typing import List, Optional, Sequence
-
-from anyscale_provider.utils import push_to_xcom
+from anyscale_provider.utils import PollPolicy, CLUSTER_POLL_POLICY
 from anyscale_provider.operators.base import AnyscaleBaseOperator
 from anyscale_provider.sensors.cluster import AnyscaleClusterSensor
 
 from airflow.utils.context import Context
 from airflow.exceptions import AirflowException
 
-from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
-from anyscale.sdk.anyscale_client.models.cluster import Cluster
-
-_POKE_INTERVAL = 60
+if TYPE_CHECKING:
+    from anyscale.sdk.anyscale_client.models.cluster import Cluster
 
 
 class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
@@ -20,12 +17,16 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
     template_fields: Sequence[str] = [
         "name",
         "auth_token",
+        "conn_id",
         "cluster_environment_build_id",
         "docker",
         "project_id",
         "ray_version",
         "python_version",
         "compute_config_id",
+        "project_name",
+        "compute_config_name",
+        "cluster_environment",
     ]
 
     def __init__(
@@ -38,6 +39,9 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
         ray_version: Optional[str] = None,
         python_version: Optional[str] = None,
         compute_config_id: Optional[str] = None,
+        project_name: Optional[str] = None,
+        compute_config_name: Optional[str] = None,
+        cluster_environment: Optional[str] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -50,6 +54,9 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
         self.ray_version = ray_version or "1.13.0"
         self.python_version = python_version or "py38"
         self.compute_config_id = compute_config_id
+        self.project_name = project_name
+        self.compute_config_name = compute_config_name
+        self.cluster_environment = cluster_environment
 
         self._ignore_keys = [
             "services_urls",
@@ -59,19 +66,16 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
             "access_token",
         ]
 
-    def _search_clusters(self) -> List[Cluster]:
-        clusters_query = {
-            "name": {
-                "equals": self.name,
-            },
-            "project_id": self.project_id,
-        }
+    def _search_clusters(self) -> List["Cluster"]:
+        cluster = self.hook.find_cluster(self.name, self.project_id)
 
-        clusters: List[Cluster] = self.sdk.search_clusters(
-            clusters_query=clusters_query).results
-        return clusters
+        if cluster is None:
+            return []
+
+        return [cluster]
 
     def _get_cluster_environment_build_id(self) -> str:
+        from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
 
         cluster_environment_build_id = None
 
@@ -90,21 +94,34 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
 
             cluster_environment_build_id = self.cluster_environment_build_id
 
+        elif self.cluster_environment:
+            if self.docker:
+                self.log.info(
+                    "docker is ignored when cluster_environment is provided.")
+
+            cluster_environment_build_id = self.hook.get_cluster_environment_build_id(
+                self.cluster_environment)
+
         if cluster_environment_build_id is None:
             raise AirflowException(
-                "at least cluster_environment_build_id or docker must be provided.")
+                "at least cluster_environment_build_id, cluster_environment "
+                "or docker must be provided.")
 
         return cluster_environment_build_id
 
     def execute(self, context: Context) -> None:
 
+        self.project_id = self._resolve_project_id(self.project_id, self.project_name)
+        self.compute_config_id = self._resolve_compute_config_id(
+            self.compute_config_id, self.compute_config_name, self.project_id)
+
         clusters = self._search_clusters()
 
         if clusters:
             self.log.info(
                 "cluster with name %s in %s already exists", self.name, self.project_id)
             cluster = clusters[0].to_dict()
-            push_to_xcom(cluster, context, self._ignore_keys)
+            self._push_to_xcom(cluster, context)
             return
 
         cluster_environment_build_id = self._get_cluster_environment_build_id()
@@ -116,16 +133,30 @@ class AnyscaleCreateClusterOperator(AnyscaleBaseOperator):
             "cluster_environment_build_id": cluster_environment_build_id,
         }
 
-        cluster: Cluster = self.sdk.create_cluster(create_cluster).result
+        cluster: "Cluster" = self.sdk.create_cluster(create_cluster).result
+        self.hook.invalidate_cluster(self.name, self.project_id)
+        self._register(context, "cluster", cluster.id, self.project_id)
 
         self.log.info("cluster created with id: %s", cluster.id)
-        push_to_xcom(cluster.to_dict(), context, self._ignore_keys)
+        self._push_to_xcom(cluster.to_dict(), context)
 
 
 class AnyscaleStartClusterOperator(AnyscaleBaseOperator):
+    """
+    Starts an existing cluster. The cluster is only registered with the run,
+    to be stopped by its teardown, and cancelled if the task is killed when
+    ``owns_cluster`` is set: by default it is assumed to be shared, or
+    registered by the task that created it.
+
+    ``project_id``, the cluster's project, lets a deferred wait share the
+    polls of the project's other clusters when ``[anyscale] batch_poll`` is on.
+    """
+
     template_fields: Sequence[str] = [
         "auth_token",
+        "conn_id",
         "cluster_id",
+        "project_id",
         "start_cluster_options"
     ]
 
@@ -133,12 +164,18 @@ class AnyscaleStartClusterOperator(AnyscaleBaseOperator):
         self,
         *,
         cluster_id: str,
+        project_id: Optional[str] = None,
         start_cluster_options: Optional[dict] = None,
         wait_for_completion: Optional[bool] = False,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
+        owns_cluster: bool = False,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.cluster_id = cluster_id
+        self.project_id = project_id
+        self.owns_cluster = owns_cluster
 
         self.start_cluster_options = start_cluster_options
 
@@ -146,34 +183,57 @@ class AnyscaleStartClusterOperator(AnyscaleBaseOperator):
             self.start_cluster_options = {}
 
         self.wait_for_completion = wait_for_completion
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy or CLUSTER_POLL_POLICY
 
         self._ignore_keys = []
 
+    def _get_sensor(self) -> AnyscaleClusterSensor:
+        return AnyscaleClusterSensor(
+            task_id="wait_cluster",
+            cluster_id=self.cluster_id,
+            project_id=self.project_id,
+            auth_token=self.auth_token,
+            conn_id=self.conn_id,
+            poll_policy=self.poll_policy,
+        )
+
     def execute(self, context: Context) -> None:
 
         self.log.info("starting cluster %s", self.cluster_id)
 
+        started_at = time.time()
         cluster_operation = self.sdk.start_cluster(
             cluster_id=self.cluster_id,
             start_cluster_options=self.start_cluster_options
         ).result
+        self._mark_submitted("cluster", self.cluster_id, started_at)
+
+        if self.owns_cluster:
+            self._register(context, "cluster", self.cluster_id, owned=True)
+            self._track("cluster", self.cluster_id)
 
         if self.wait_for_completion:
-            while not AnyscaleClusterSensor(
-                task_id="wait_cluster",
-                cluster_id=self.cluster_id,
-                auth_token=self.auth_token,
-            ).poke(context):
+            sensor = self._get_sensor()
+
+            if self.deferrable:
+                self._push_to_xcom(cluster_operation.to_dict(), context)
+                self._defer(context, sensor.get_trigger())
+
+            self._wait_for(sensor, context)
 
-                time.sleep(_POKE_INTERVAL)
+        self._push_to_xcom(cluster_operation.to_dict(), context)
 
-        push_to_xcom(cluster_operation.to_dict(), context, self._ignore_keys)
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        self._get_sensor().execute_complete(context, event)
 
 
 class AnyscaleTerminateClusterOperator(AnyscaleBaseOperator):
     template_fields: Sequence[str] = [
         "cluster_id",
         "auth_token",
+        "conn_id",
+        "project_id",
         "terminate_cluster_options",
     ]
 
@@ -181,12 +241,16 @@ class AnyscaleTerminateClusterOperator(AnyscaleBaseOperator):
         self,
         *,
         cluster_id: str,
+        project_id: Optional[str] = None,
         terminate_cluster_options: Optional[dict] = None,
         wait_for_completion: Optional[bool] = False,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.cluster_id = cluster_id
+        self.project_id = project_id
 
         self.terminate_cluster_options = terminate_cluster_options
 
@@ -194,8 +258,20 @@ class AnyscaleTerminateClusterOperator(AnyscaleBaseOperator):
             self.terminate_cluster_options = {}
 
         self.wait_for_completion = wait_for_completion
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy or CLUSTER_POLL_POLICY
         self._ignore_keys = []
 
+    def _get_sensor(self) -> AnyscaleClusterSensor:
+        return AnyscaleClusterSensor(
+            task_id="wait_cluster",
+            cluster_id=self.cluster_id,
+            project_id=self.project_id,
+            auth_token=self.auth_token,
+            conn_id=self.conn_id,
+            poll_policy=self.poll_policy,
+        )
+
     def execute(self, context: Context) -> None:
 
         cluster_operation = self.sdk.terminate_cluster(
@@ -203,14 +279,18 @@ class AnyscaleTerminateClusterOperator(AnyscaleBaseOperator):
             terminate_cluster_options=self.terminate_cluster_options).result
 
         self.log.info("terminating cluster %s", self.cluster_id)
+        self._unregister(context, "cluster", self.cluster_id)
 
         if self.wait_for_completion:
-            while not AnyscaleClusterSensor(
-                task_id="wait_cluster",
-                cluster_id=self.cluster_id,
-                auth_token=self.auth_token,
-            ).poke(context):
+            sensor = self._get_sensor()
+
+            if self.deferrable:
+                self._push_to_xcom(cluster_operation.to_dict(), context)
+                self._defer(context, sensor.get_trigger())
+
+            self._wait_for(sensor, context)
 
-                time.sleep(_POKE_INTERVAL)
+        self._push_to_xcom(cluster_operation.to_dict(), context)
 
-        push_to_xcom(cluster_operation.to_dict(), context, self._ignore_keys)
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        self._get_sensor().execute_complete(context, event)
@@ -0,0 +1,193 @@
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+from airflow.utils.context import Context
+
+from anyscale_provider.utils import PollPolicy, CLUSTER_POLL_POLICY
+from anyscale_provider.utils.cluster_pool import AnyscaleClusterPool
+from anyscale_provider.operators.base import AnyscaleBaseOperator
+from anyscale_provider.sensors.cluster import AnyscaleClusterSensor
+
+if TYPE_CHECKING:
+    from anyscale.sdk.anyscale_client.models.cluster import Cluster
+
+
+class AnyscaleLeaseClusterOperator(AnyscaleBaseOperator):
+    """
+    Leases a running idle cluster of pool ``pool_name`` matching the project,
+    compute config and build, or creates and starts a new one when none is
+    free. The leased cluster is pushed to XCom like
+    :class:`AnyscaleCreateClusterOperator` does.
+
+    The lease expires after ``lease_ttl`` seconds, when the cluster can be
+    leased by another run or reclaimed, so a run that never releases its
+    cluster does not hold it forever. Clusters created for the pool also get
+    Anyscale's own ``idle_timeout_minutes``, which terminates them even if
+    nothing reclaims them.
+    """
+
+    template_fields: Sequence[str] = [
+        "pool_name",
+        "auth_token",
+        "conn_id",
+        "project_id",
+        "compute_config_id",
+        "cluster_environment_build_id",
+        "start_cluster_options",
+    ]
+
+    def __init__(
+        self,
+        *,
+        pool_name: str,
+        project_id: str,
+        compute_config_id: str,
+        cluster_environment_build_id: str,
+        start_cluster_options: Optional[dict] = None,
+        poll_policy: Optional[PollPolicy] = None,
+        lease_ttl: Optional[float] = 24 * 3600,
+        cluster_idle_timeout_minutes: Optional[int] = 120,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.pool_name = pool_name
+        self.project_id = project_id
+        self.compute_config_id = compute_config_id
+        self.cluster_environment_build_id = cluster_environment_build_id
+        self.start_cluster_options = start_cluster_options or {}
+        self.poll_policy = poll_policy or CLUSTER_POLL_POLICY
+        self.lease_ttl = lease_ttl
+        self.cluster_idle_timeout_minutes = cluster_idle_timeout_minutes
+
+        self._ignore_keys = [
+            "services_urls",
+            "ssh_authorized_keys",
+            "ssh_private_key",
+            "user_service_token",
+            "access_token",
+        ]
+
+    def _holder(self, context: Context) -> Dict[str, Any]:
+        ti = context["ti"]
+
+        return {
+            "dag_id": ti.dag_id,
+            "run_id": ti.run_id,
+            "task_id": ti.task_id,
+        }
+
+    def _create_and_start(self, pool: AnyscaleClusterPool, context: Context) -> "Cluster":
+
+        create_cluster = {
+            "name": pool.new_cluster_name(),
+            "project_id": self.project_id,
+            "cluster_compute_id": self.compute_config_id,
+            "cluster_environment_build_id": self.cluster_environment_build_id,
+        }
+
+        if self.cluster_idle_timeout_minutes is not None:
+            create_cluster["idle_timeout_minutes"] = self.cluster_idle_timeout_minutes
+
+        cluster: "Cluster" = self.sdk.create_cluster(create_cluster).result
+        pool.try_lease(cluster.id, self._holder(context), self.lease_ttl)
+
+        self.log.info("cluster %s created for pool %s", cluster.id, self.pool_name)
+
+        try:
+            self.sdk.start_cluster(
+                cluster_id=cluster.id,
+                start_cluster_options=self.start_cluster_options,
+            )
+
+            self._wait_for(AnyscaleClusterSensor(
+                task_id="wait_cluster",
+                cluster_id=cluster.id,
+                project_id=self.project_id,
+                auth_token=self.auth_token,
+                conn_id=self.conn_id,
+                poll_policy=self.poll_policy,
+            ), context)
+
+        except Exception:
+            # hand the cluster to the reclaimer instead of leaking the lease.
+            pool.release(cluster.id, idle_ttl=0)
+            raise
+
+        return cluster
+
+    def execute(self, context: Context) -> None:
+        pool = AnyscaleClusterPool(self.hook, self.pool_name)
+
+        cluster = pool.lease_idle(
+            self.project_id,
+            self.compute_config_id,
+            self.cluster_environment_build_id,
+            self._holder(context),
+            self.lease_ttl,
+        )
+
+        if cluster is None:
+            cluster = self._create_and_start(pool, context)
+
+        self._push_to_xcom(cluster.to_dict(), context)
+
+
+class AnyscaleReleaseClusterOperator(AnyscaleBaseOperator):
+    """
+    Gives a leased cluster back to its pool. The cluster is terminated once
+    it stays idle for ``idle_ttl`` seconds; with ``reclaim`` the pool's
+    expired idle clusters are terminated right away.
+    """
+
+    template_fields: Sequence[str] = [
+        "pool_name",
+        "auth_token",
+        "conn_id",
+        "cluster_id",
+    ]
+
+    def __init__(
+        self,
+        *,
+        pool_name: str,
+        cluster_id: str,
+        idle_ttl: float = 900,
+        reclaim: bool = True,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.pool_name = pool_name
+        self.cluster_id = cluster_id
+        self.idle_ttl = idle_ttl
+        self.reclaim = reclaim
+
+    def execute(self, context: Context) -> None:
+        pool = AnyscaleClusterPool(self.hook, self.pool_name)
+        pool.release(self.cluster_id, self.idle_ttl)
+
+        if self.reclaim:
+            pool.reclaim_idle()
+
+
+class AnyscaleReclaimIdleClustersOperator(AnyscaleBaseOperator):
+    """Terminates the clusters of a pool that stayed idle past their TTL."""
+
+    template_fields: Sequence[str] = [
+        "pool_name",
+        "auth_token",
+        "conn_id",
+    ]
+
+    def __init__(
+        self,
+        *,
+        pool_name: str,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.pool_name = pool_name
+
+    def execute(self, context: Context) -> None:
+        reclaimed = AnyscaleClusterPool(self.hook, self.pool_name).reclaim_idle()
+        self.log.info("%s idle clusters terminated", len(reclaimed))
@@ -1,18 +1,27 @@
 import time
-from typing import Optional, Sequence
-from anyscale_provider.utils import push_to_xcom
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
 from airflow.utils.context import Context
 from airflow.exceptions import AirflowException
+from airflow.models.xcom import XCOM_RETURN_KEY
+from airflow.triggers.temporal import TimeDeltaTrigger
 
 from anyscale_provider.operators.base import AnyscaleBaseOperator
 from anyscale_provider.sensors.production_jobs import AnyscaleProductionJobSensor
+from anyscale_provider.utils import PollPolicy, DEFAULT_POLL_POLICY, TokenBucket, metrics
+from anyscale_provider.utils.failures import AnyscaleInfrastructureFailure
+from anyscale_provider.utils.logs import DEFAULT_MAX_LOG_BYTES
+from anyscale_provider.utils.log_export import LogExport
 
-from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
-from anyscale.sdk.anyscale_client.models.production_job import ProductionJob
-from anyscale.sdk.anyscale_client.models.create_production_job import CreateProductionJob
+if TYPE_CHECKING:
+    from anyscale.sdk.anyscale_client.models.production_job import ProductionJob
 
-_POKE_INTERVAL = 60
+_FAILED_STATES = ("OUT_OF_RETRIES", "TERMINATED", "ERRORED")
+
+
+def _is_finished(state) -> bool:
+    return state.current_state in _FAILED_STATES or state.current_state == state.goal_state
 
 
 class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
@@ -20,6 +29,7 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
     template_fields: Sequence[str] = [
         "name",
         "auth_token",
+        "conn_id",
         "project_id",
         "entrypoint",
         "cluster_environment_build_id",
@@ -27,8 +37,13 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
         "description",
         "runtime_env",
         "compute_config_id",
+        "project_name",
+        "compute_config_name",
+        "cluster_environment",
         "ray_version",
         "python_version",
+        "fallback_compute_config_id",
+        "fallback_compute_config_name",
     ]
 
     def __init__(
@@ -44,7 +59,22 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
         compute_config_id: str = None,
         ray_version: Optional[str] = None,
         python_version: Optional[str] = None,
+        project_name: Optional[str] = None,
+        compute_config_name: Optional[str] = None,
+        cluster_environment: Optional[str] = None,
         wait_for_completion: Optional[bool] = False,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
+        stream_logs: bool = False,
+        max_log_bytes: int = DEFAULT_MAX_LOG_BYTES,
+        log_export: Optional[LogExport] = None,
+        max_resubmissions: int = 0,
+        resubmit_delay: float = 60,
+        resubmit_max_delay: float = 600,
+        fallback_compute_config_id: Optional[str] = None,
+        fallback_compute_config_name: Optional[str] = None,
+        classify_failures: bool = True,
+        failure_patterns: Optional[Dict[str, List[str]]] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -60,11 +90,46 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
         self.ray_version = ray_version or "1.13.0"
         self.python_version = python_version or "py38"
         self.cluster_environment_build_id = cluster_environment_build_id
+        self.project_name = project_name
+        self.compute_config_name = compute_config_name
+        self.cluster_environment = cluster_environment
 
         self.wait_for_completion = wait_for_completion
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy or DEFAULT_POLL_POLICY
+        self.stream_logs = stream_logs
+        self.max_log_bytes = max_log_bytes
+        self.log_export = log_export
+
+        # jobs lost to preemption or missing capacity are submitted again
+        # up to max_resubmissions times, waiting resubmit_delay seconds,
+        # doubled each time, and on the fallback compute config if any.
+        self.max_resubmissions = max_resubmissions
+        self.resubmit_delay = resubmit_delay
+        self.resubmit_max_delay = resubmit_max_delay
+        self.fallback_compute_config_id = fallback_compute_config_id
+        self.fallback_compute_config_name = fallback_compute_config_name
+        self.classify_failures = classify_failures
+        self.failure_patterns = failure_patterns
         self._ignore_keys = []
 
+    def _get_sensor(self, production_job_id: str) -> AnyscaleProductionJobSensor:
+        return AnyscaleProductionJobSensor(
+            task_id="wait_job",
+            production_job_id=production_job_id,
+            project_id=self.project_id,
+            auth_token=self.auth_token,
+            conn_id=self.conn_id,
+            poll_policy=self.poll_policy,
+            stream_logs=self.stream_logs,
+            max_log_bytes=self.max_log_bytes,
+            log_export=self.log_export,
+            classify_failures=self.classify_failures,
+            failure_patterns=self.failure_patterns,
+        )
+
     def _get_cluster_environment_build_id(self) -> str:
+        from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
 
         cluster_environment_build_id = None
 
@@ -83,13 +148,30 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
 
             cluster_environment_build_id = self.cluster_environment_build_id
 
+        elif self.cluster_environment:
+            if self.docker:
+                self.log.info(
+                    "docker is ignored when cluster_environment is provided.")
+
+            cluster_environment_build_id = self.hook.get_cluster_environment_build_id(
+                self.cluster_environment)
+
         if cluster_environment_build_id is None:
             raise AirflowException(
-                "at least cluster_environment_build_id or docker must be provided.")
+                "at least cluster_environment_build_id, cluster_environment "
+                "or docker must be provided.")
 
         return cluster_environment_build_id
 
-    def execute(self, context: Context) -> None:
+    def _submit(self, context: Context, fallback: bool = False) -> "ProductionJob":
+        from anyscale.sdk.anyscale_client.models.create_production_job import CreateProductionJob
+
+        compute_config_id = self.compute_config_id
+
+        if fallback and (self.fallback_compute_config_id or self.fallback_compute_config_name):
+            compute_config_id = self._resolve_compute_config_id(
+                self.fallback_compute_config_id, self.fallback_compute_config_name, self.project_id)
+
         cluster_environment_build_id = self._get_cluster_environment_build_id()
 
         create_production_job = CreateProductionJob(
@@ -100,24 +182,314 @@ class AnyscaleCreateProductionJobOperator(AnyscaleBaseOperator):
                 "entrypoint": self.entrypoint,
                 "build_id": cluster_environment_build_id,
                 "runtime_env": self.runtime_env,
-                "compute_config_id": self.compute_config_id,
+                "compute_config_id": compute_config_id,
                 "max_retries": self.max_retries,
             },
         )
 
+        started_at = time.time()
         production_job = self.sdk.create_job(
             create_production_job).result
 
         self.log.info(f"production job {production_job.id} created")
+        self._mark_submitted("production_job", production_job.id, started_at)
+        self._save_submission(context, production_job.id)
+        self._register(context, "production_job", production_job.id, self.project_id)
+        self._track("production_job", production_job.id)
+
+        return production_job
+
+    def _resubmit_delay(self, context: Context, failure: AnyscaleInfrastructureFailure, resubmissions: int) -> float:
+        """
+        How long to wait before submitting a job lost to ``failure`` again,
+        re-raising it once ``max_resubmissions`` is reached.
+        """
+        self._unregister(context, "production_job", failure.production_job_id)
+        self._untrack("production_job", failure.production_job_id)
+
+        if resubmissions >= self.max_resubmissions:
+            raise failure
+
+        delay = min(self.resubmit_delay * 2 ** resubmissions, self.resubmit_max_delay)
+
+        self.log.warning(
+            "job %s failed because of %s, submitting it again in %ss (%s/%s)",
+            failure.production_job_id, failure.failure_class, delay,
+            resubmissions + 1, self.max_resubmissions)
+        metrics.record_resubmission("production_job", failure.failure_class)
+
+        return delay
+
+    def _resolve_ids(self) -> None:
+        self.project_id = self._resolve_project_id(self.project_id, self.project_name)
+        self.compute_config_id = self._resolve_compute_config_id(
+            self.compute_config_id, self.compute_config_name, self.project_id)
+
+    def execute(self, context: Context) -> None:
+        self._resolve_ids()
+
+        production_job = self._resume_submission(
+            context,
+            lambda production_job_id: self.sdk.get_production_job(
+                production_job_id=production_job_id).result,
+            lambda production_job: production_job.state.current_state not in _FAILED_STATES,
+        )
+
+        if production_job is None:
+            production_job = self._submit(context)
+        else:
+            self._track("production_job", production_job.id)
 
         if self.wait_for_completion:
-            while not AnyscaleProductionJobSensor(
-                task_id="wait_job",
-                production_job_id=production_job.id,
-                auth_token=self.auth_token,
-            ).poke(context):
+            if self.deferrable:
+                self._push_to_xcom(production_job.to_dict(), context)
+                self._defer(context, self._get_sensor(production_job.id).get_trigger(), resubmissions=0)
+
+            resubmissions = 0
+
+            while True:
+                try:
+                    self._wait_for(self._get_sensor(production_job.id), context)
+                    break
+
+                except AnyscaleInfrastructureFailure as e:
+                    time.sleep(self._resubmit_delay(context, e, resubmissions))
+                    resubmissions += 1
+                    production_job = self._submit(context, fallback=True)
+
+            self._unregister(context, "production_job", production_job.id)
+
+        self._push_to_xcom(production_job.to_dict(), context)
+        self._clear_submission(context)
+
+    def execute_complete(self, context: Context, event: Dict[str, Any], resubmissions: int = 0) -> None:
+        sensor = self._get_sensor(event["production_job_id"])
+        sensor._timeline = self._timeline
+
+        try:
+            sensor.execute_complete(context, event)
+
+        except AnyscaleInfrastructureFailure as e:
+            delay = self._resubmit_delay(context, e, resubmissions)
+            self._defer(
+                context,
+                TimeDeltaTrigger(timedelta(seconds=delay)),
+                method_name="execute_resubmit",
+                resubmissions=resubmissions + 1,
+            )
+
+        self._unregister(context, "production_job", event["production_job_id"])
+        self._clear_submission(context)
+
+    def execute_resubmit(self, context: Context, event: Any = None, resubmissions: int = 0) -> None:
+        """Submits the job again once the backoff of a deferred resubmission is over."""
+        self._resolve_ids()
+
+        production_job = self._submit(context, fallback=True)
+
+        self._push_to_xcom(production_job.to_dict(), context)
+        self._defer(context, self._get_sensor(production_job.id).get_trigger(), resubmissions=resubmissions)
+
+
+class AnyscaleCreateProductionJobsBatchOperator(AnyscaleBaseOperator):
+    """
+    Submits many production jobs from a single task.
+
+    Each entry of ``jobs`` is a dict with the arguments of
+    :class:`AnyscaleCreateProductionJobOperator` (``name``, ``entrypoint``,
+    ``runtime_env``, ...); missing keys fall back to the operator level
+    values. Jobs are submitted by up to ``max_concurrency`` threads, at most
+    ``max_submissions_per_second`` at a time, and awaited by a single poll
+    loop that lists each project once per tick. The task returns one row per
+    job with its id, final state and duration.
+
+    If some jobs can not be submitted, the ones already created are cancelled
+    and the task fails, with one row per job (its id or error) in XCom.
+    """
+
+    template_fields: Sequence[str] = [
+        "jobs",
+        "auth_token",
+        "conn_id",
+        "project_id",
+        "cluster_environment_build_id",
+        "docker",
+        "runtime_env",
+        "compute_config_id",
+        "ray_version",
+        "python_version",
+    ]
+
+    def __init__(
+        self,
+        *,
+        jobs: List[Dict[str, Any]],
+        project_id: Optional[str] = None,
+        cluster_environment_build_id: Optional[str] = None,
+        docker: Optional[str] = None,
+        max_retries: int = 0,
+        runtime_env: Optional[dict] = None,
+        compute_config_id: Optional[str] = None,
+        ray_version: Optional[str] = None,
+        python_version: Optional[str] = None,
+        max_concurrency: int = 8,
+        max_submissions_per_second: Optional[float] = None,
+        wait_for_completion: Optional[bool] = False,
+        poll_policy: Optional[PollPolicy] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.jobs = jobs
+        self.project_id = project_id
+        self.cluster_environment_build_id = cluster_environment_build_id
+        self.docker = docker
+        self.max_retries = max_retries
+        self.runtime_env = runtime_env
+        self.compute_config_id = compute_config_id
+        self.ray_version = ray_version or "1.13.0"
+        self.python_version = python_version or "py38"
+
+        self.max_concurrency = max_concurrency
+        self.max_submissions_per_second = max_submissions_per_second
+        self.wait_for_completion = wait_for_completion
+        self.poll_policy = poll_policy or DEFAULT_POLL_POLICY
+
+    def _get_spec_value(self, spec: Dict[str, Any], key: str) -> Any:
+        if key in spec:
+            return spec[key]
+
+        return getattr(self, key, None)
+
+    def _get_cluster_environment_build_id(self, spec: Dict[str, Any]) -> str:
+        from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
+
+        docker = self._get_spec_value(spec, "docker")
+        cluster_environment_build_id = self._get_spec_value(
+            spec, "cluster_environment_build_id")
+
+        if cluster_environment_build_id:
+            return cluster_environment_build_id
+
+        if docker:
+            return BYODInfo(
+                docker_image_name=docker,
+                python_version=self._get_spec_value(spec, "python_version"),
+                ray_version=self._get_spec_value(spec, "ray_version"),
+            ).encode()
+
+        raise AirflowException(
+            "at least cluster_environment_build_id or docker must be provided "
+            "for job {}.".format(spec.get("name")))
+
+    def _submit(self, spec: Dict[str, Any], rate_limiter: Optional[TokenBucket]) -> "ProductionJob":
+        from anyscale.sdk.anyscale_client.models.create_production_job import CreateProductionJob
+
+        create_production_job = CreateProductionJob(
+            name=spec["name"],
+            description=spec.get("description"),
+            project_id=self._get_spec_value(spec, "project_id"),
+            config={
+                "entrypoint": spec["entrypoint"],
+                "build_id": self._get_cluster_environment_build_id(spec),
+                "runtime_env": self._get_spec_value(spec, "runtime_env"),
+                "compute_config_id": self._get_spec_value(spec, "compute_config_id"),
+                "max_retries": self._get_spec_value(spec, "max_retries"),
+            },
+        )
+
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        started_at = time.time()
+        production_job = self.sdk.create_job(create_production_job).result
+        self._mark_submitted("production_job", production_job.id, started_at)
+
+        return production_job
+
+    def _wait_for_jobs(self, production_jobs: List["ProductionJob"]) -> Dict[str, "ProductionJob"]:
+        pending: Dict[str, "ProductionJob"] = {job.id: job for job in production_jobs}
+        finished: Dict[str, "ProductionJob"] = {}
+
+        attempt = 0
+        while pending:
+            time.sleep(self.poll_policy.next_delay(attempt))
+            attempt += 1
+
+            by_project: Dict[str, set] = {}
+            for job in pending.values():
+                by_project.setdefault(job.project_id, set()).add(job.id)
+
+            for project_id, job_ids in by_project.items():
+                jobs = self.hook.batch_fetch(
+                    "production_job", project_id, job_ids,
+                    lambda job_id: self.sdk.get_production_job(
+                        production_job_id=job_id).result)
+
+                for job_id, job in jobs.items():
+                    state = job.state
+                    self._timeline.mark(
+                        "production_job", job_id, state.current_state, state.state_transitioned_at)
+
+                    if _is_finished(state):
+                        finished[job_id] = job
+                        del pending[job_id]
+
+            self.log.info("%s jobs finished, %s pending", len(finished), len(pending))
+
+        return finished
+
+    def _to_row(self, job: "ProductionJob") -> Dict[str, Any]:
+        state = job.state
+
+        duration = None
+        if _is_finished(state):
+            duration = (state.state_transitioned_at - job.created_at).total_seconds()
+
+        return {
+            "name": job.name,
+            "id": job.id,
+            "state": str(state.current_state),
+            "error": state.error,
+            "duration": duration,
+        }
+
+    def execute(self, context: Context) -> List[Dict[str, Any]]:
+        rate_limiter = None
+        if self.max_submissions_per_second is not None:
+            # no burst: submissions are spaced evenly.
+            rate_limiter = TokenBucket(self.max_submissions_per_second, capacity=1)
+
+        production_jobs = self._submit_all(
+            context,
+            "production_job",
+            self.jobs,
+            lambda spec: self._submit(spec, rate_limiter),
+            scope=lambda production_job: production_job.project_id,
+            describe=lambda spec: {"name": spec.get("name")},
+            max_concurrency=self.max_concurrency,
+        )
+
+        self.log.info("%s production jobs created", len(production_jobs))
+
+        if self.wait_for_completion:
+            finished = self._wait_for_jobs(production_jobs)
+            production_jobs = [finished[job.id] for job in production_jobs]
+
+            for job in production_jobs:
+                self._unregister(context, "production_job", job.id)
+                self._untrack("production_job", job.id)
+
+        rows = [self._to_row(job) for job in production_jobs]
+
+        failed = [
+            row for row in rows
+            if row["state"] in _FAILED_STATES
+        ]
 
-                time.sleep(_POKE_INTERVAL)
+        if failed:
+            context["ti"].xcom_push(key=XCOM_RETURN_KEY, value=rows)
+            raise AirflowException("{} of {} jobs failed: {}".format(
+                len(failed), len(rows), ", ".join(row["id"] for row in failed)))
 
-        push_to_xcom(production_job.to_dict(), context,
-                     ignore_keys=self._ignore_keys)
+        return rows
@@ -1,18 +1,16 @@
 import time
-from typing import Optional, Sequence
+from typing import Any, Dict, Optional, Sequence
 
 from airflow.utils.context import Context
 from airflow.exceptions import AirflowException
 from airflow.utils.log.secrets_masker import mask_secret
 
-from anyscale_provider.utils import push_to_xcom
+from anyscale_provider.utils import PollPolicy, ReadinessProbe, DEFAULT_POLL_POLICY
 from anyscale_provider.operators.base import AnyscaleBaseOperator
 from anyscale_provider.sensors.services import AnyscaleServiceSensor
+from anyscale_provider.utils.timeline import PROBE, READY
 
-from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
-from anyscale.sdk.anyscale_client.models.create_production_service import CreateProductionService
-
-_POKE_INTERVAL = 60
+_FAILED_STATES = ("OUT_OF_RETRIES", "TERMINATED", "ERRORED", "BROKEN")
 
 
 class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
@@ -20,6 +18,7 @@ class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
     template_fields: Sequence[str] = [
         "name",
         "auth_token",
+        "conn_id",
         "project_id",
         "entrypoint",
         "cluster_environment_build_id",
@@ -27,6 +26,9 @@ class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
         "description",
         "runtime_env",
         "compute_config_id",
+        "project_name",
+        "compute_config_name",
+        "cluster_environment",
         "ray_version",
         "python_version",
         "access",
@@ -47,7 +49,13 @@ class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
         compute_config_id: str = None,
         ray_version: Optional[str] = None,
         python_version: Optional[str] = None,
+        project_name: Optional[str] = None,
+        compute_config_name: Optional[str] = None,
+        cluster_environment: Optional[str] = None,
         wait_for_completion: Optional[bool] = False,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
+        readiness_probe: Optional[ReadinessProbe] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -65,11 +73,47 @@ class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
         self.ray_version = ray_version or "1.13.0"
         self.python_version = python_version or "py38"
         self.cluster_environment_build_id = cluster_environment_build_id
+        self.project_name = project_name
+        self.compute_config_name = compute_config_name
+        self.cluster_environment = cluster_environment
 
         self.wait_for_completion = wait_for_completion
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy or DEFAULT_POLL_POLICY
+        self.readiness_probe = readiness_probe
         self._ignore_keys = []
 
+    def _get_sensor(self, service_id: str) -> AnyscaleServiceSensor:
+        return AnyscaleServiceSensor(
+            task_id="wait_service",
+            service_id=service_id,
+            project_id=self.project_id,
+            auth_token=self.auth_token,
+            conn_id=self.conn_id,
+            poll_policy=self.poll_policy,
+        )
+
+    def _wait_until_ready(self, service_id: str, context: Context) -> None:
+        if self.readiness_probe is None:
+            return
+
+        service = self.sdk.get_service(service_id=service_id).result
+        healthcheck_url = service.healthcheck_url or self.healthcheck_url
+        url = "{}/{}".format(service.url.rstrip("/"), healthcheck_url.lstrip("/"))
+
+        self.log.info("probing %s until the service is ready", url)
+        self._timeline.mark("service", service_id, PROBE)
+        readiness = self.readiness_probe.run(url, service.token)
+        self._timeline.mark("service", service_id, READY)
+
+        self.log.info(
+            "service ready after %s probes, latency p50 %.3fs, p95 %.3fs",
+            readiness["probes"], readiness["p50"], readiness["p95"])
+
+        context["ti"].xcom_push(key="readiness", value=readiness)
+
     def _get_cluster_environment_build_id(self) -> str:
+        from anyscale.shared_anyscale_utils.utils.byod import BYODInfo
 
         cluster_environment_build_id = None
 
@@ -88,47 +132,82 @@ class AnyscaleApplyServiceOperator(AnyscaleBaseOperator):
 
             cluster_environment_build_id = self.cluster_environment_build_id
 
+        elif self.cluster_environment:
+            if self.docker:
+                self.log.info(
+                    "docker is ignored when cluster_environment is provided.")
+
+            cluster_environment_build_id = self.hook.get_cluster_environment_build_id(
+                self.cluster_environment)
+
         if cluster_environment_build_id is None:
             raise AirflowException(
-                "at least cluster_environment_build_id or docker must be provided.")
+                "at least cluster_environment_build_id, cluster_environment "
+                "or docker must be provided.")
 
         return cluster_environment_build_id
 
     def execute(self, context: Context) -> None:
+        from anyscale.sdk.anyscale_client.models.create_production_service import (
+            CreateProductionService,
+        )
 
-        cluster_environment_build_id = self._get_cluster_environment_build_id()
+        self.project_id = self._resolve_project_id(self.project_id, self.project_name)
+        self.compute_config_id = self._resolve_compute_config_id(
+            self.compute_config_id, self.compute_config_name, self.project_id)
 
-        create_production_service = CreateProductionService(
-            name=self.name,
-            access=self.access,
-            description=self.description,
-            project_id=self.project_id,
-            healthcheck_url=self.healthcheck_url,
-            config={
-                "entrypoint": self.entrypoint,
-                "build_id": cluster_environment_build_id,
-                "runtime_env": self.runtime_env,
-                "compute_config_id": self.compute_config_id,
-                "max_retries": self.max_retries,
-            },
+        production_service = self._resume_submission(
+            context,
+            lambda service_id: self.sdk.get_service(service_id=service_id).result,
+            lambda service: service.state.current_state not in _FAILED_STATES,
         )
 
-        production_service = self.sdk.apply_service(
-            create_production_service).result
+        if production_service is None:
+            cluster_environment_build_id = self._get_cluster_environment_build_id()
+
+            create_production_service = CreateProductionService(
+                name=self.name,
+                access=self.access,
+                description=self.description,
+                project_id=self.project_id,
+                healthcheck_url=self.healthcheck_url,
+                config={
+                    "entrypoint": self.entrypoint,
+                    "build_id": cluster_environment_build_id,
+                    "runtime_env": self.runtime_env,
+                    "compute_config_id": self.compute_config_id,
+                    "max_retries": self.max_retries,
+                },
+            )
+
+            started_at = time.time()
+            production_service = self.sdk.apply_service(
+                create_production_service).result
+
+            self.log.info("production service %s created", production_service.id)
+            self._mark_submitted("service", production_service.id, started_at)
+            self._save_submission(context, production_service.id)
+            self._register(context, "service", production_service.id, self.project_id)
 
-        self.log.info("production service %s created", production_service.id)
+        xcom_payload = production_service.to_dict()
+        xcom_payload["token"] = mask_secret(xcom_payload["token"])
 
         if self.wait_for_completion:
-            while not AnyscaleServiceSensor(
-                task_id="wait_service",
-                service_id=production_service.id,
-                auth_token=self.auth_token,
-            ).poke(context):
+            sensor = self._get_sensor(production_service.id)
+
+            if self.deferrable:
+                self._push_to_xcom(xcom_payload, context)
+                self._defer(context, sensor.get_trigger())
 
-                time.sleep(_POKE_INTERVAL)
+            self._wait_for(sensor, context)
 
             self.log.info("service available at %s", production_service.url)
+            self._wait_until_ready(production_service.id, context)
 
-        xcom_payload = production_service.to_dict()
-        xcom_payload["token"] = mask_secret(xcom_payload["token"])
-        push_to_xcom(xcom_payload, context, self._ignore_keys)
+        self._push_to_xcom(xcom_payload, context)
+        self._clear_submission(context)
+
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        self._get_sensor(event["service_id"]).execute_complete(context, event)
+        self._wait_until_ready(event["service_id"], context)
+        self._clear_submission(context)
@@ -1,19 +1,21 @@
 import time
-from typing import Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 from airflow.utils.context import Context
-from anyscale_provider.utils import push_to_xcom
+from airflow.exceptions import AirflowException
+from airflow.models.xcom import XCOM_RETURN_KEY
+from anyscale_provider.utils import PollPolicy, DEFAULT_POLL_POLICY
 from anyscale_provider.operators.base import AnyscaleBaseOperator
 
 from anyscale_provider.sensors.session_command import AnyscaleSessionCommandSensor
-
-_POKE_INTERVAL = 60
+from anyscale_provider.utils.timeline import FINISHED
 
 
 class AnyscaleCreateSessionCommandOperator(AnyscaleBaseOperator):
     template_fields: Sequence[str] = [
         "session_id",
         "auth_token",
+        "conn_id",
         "shell_command",
     ]
 
@@ -23,6 +25,8 @@ class AnyscaleCreateSessionCommandOperator(AnyscaleBaseOperator):
         session_id: str,
         shell_command: str,
         wait_for_completion: Optional[bool] = False,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -30,29 +34,211 @@ class AnyscaleCreateSessionCommandOperator(AnyscaleBaseOperator):
         self.session_id = session_id
         self.shell_command = shell_command
         self.wait_for_completion = wait_for_completion
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy or DEFAULT_POLL_POLICY
         self._ignore_keys = []
 
+    def _get_sensor(self, session_command_id: str) -> AnyscaleSessionCommandSensor:
+        return AnyscaleSessionCommandSensor(
+            task_id="wait_session_command",
+            session_command_id=session_command_id,
+            session_id=self.session_id,
+            auth_token=self.auth_token,
+            conn_id=self.conn_id,
+            poll_policy=self.poll_policy,
+        )
+
     def execute(self, context: Context):
 
+        # a command that already exited with an error is run again.
+        session_command_response = self._resume_submission(
+            context,
+            lambda session_command_id: self.sdk.get_session_command(session_command_id).result,
+            lambda session_command: session_command.status_code in (None, 0),
+        )
+
+        if session_command_response is None:
+            create_session_command = {
+                "session_id": self.session_id,
+                "shell_command": self.shell_command,
+            }
+
+            started_at = time.time()
+            session_command_response = self.sdk.create_session_command(
+                create_session_command).result
+            self._mark_submitted("session_command", session_command_response.id, started_at)
+
+            self.log.info("session command with id %s created",
+                          session_command_response.id)
+            self._save_submission(context, session_command_response.id)
+            self._register(context, "session_command", session_command_response.id, self.session_id)
+
+        self._track("session_command", session_command_response.id)
+
+        if self.wait_for_completion:
+            sensor = self._get_sensor(session_command_response.id)
+
+            if self.deferrable:
+                self._push_to_xcom(session_command_response.to_dict(), context)
+                self._defer(context, sensor.get_trigger())
+
+            self._wait_for(sensor, context)
+            self._unregister(context, "session_command", session_command_response.id)
+
+            # the finished command, with its status code.
+            session_command_response = self.sdk.get_session_command(
+                session_command_response.id).result
+
+        self._push_to_xcom(session_command_response.to_dict(), context)
+        self._clear_submission(context)
+
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        session_command_id = event["session_command_id"]
+
+        self._get_sensor(session_command_id).execute_complete(context, event)
+        self._unregister(context, "session_command", session_command_id)
+
+        session_command_response = self.sdk.get_session_command(session_command_id).result
+        self._push_to_xcom(session_command_response.to_dict(), context)
+        self._clear_submission(context)
+
+
+class AnyscaleCreateSessionCommandsOperator(AnyscaleBaseOperator):
+    """
+    Runs every command of ``shell_commands`` on every session of
+    ``session_ids``, submitting up to ``max_concurrency`` commands at once.
+
+    All the commands are awaited by a single poll loop that lists each
+    session's commands once per tick. The task returns one row per command
+    with its exit code and duration, and fails if any command exited with a
+    non zero code unless ``fail_on_error`` is False.
+
+    If some commands can not be submitted, the ones already created are
+    killed and the task fails, with one row per command (its id or error)
+    in XCom.
+    """
+
+    template_fields: Sequence[str] = [
+        "session_ids",
+        "auth_token",
+        "conn_id",
+        "shell_commands",
+    ]
+
+    def __init__(
+        self,
+        *,
+        session_ids: List[str],
+        shell_commands: List[str],
+        max_concurrency: int = 8,
+        wait_for_completion: Optional[bool] = False,
+        fail_on_error: bool = True,
+        poll_policy: Optional[PollPolicy] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.session_ids = session_ids
+        self.shell_commands = shell_commands
+        self.max_concurrency = max_concurrency
+        self.wait_for_completion = wait_for_completion
+        self.fail_on_error = fail_on_error
+        self.poll_policy = poll_policy or DEFAULT_POLL_POLICY
+
+    def _submit(self, session_id: str, shell_command: str):
         create_session_command = {
-            "session_id": self.session_id,
-            "shell_command": self.shell_command,
+            "session_id": session_id,
+            "shell_command": shell_command,
+        }
+
+        started_at = time.time()
+        session_command = self.sdk.create_session_command(create_session_command).result
+        self._mark_submitted("session_command", session_command.id, started_at)
+
+        return session_command
+
+    def _wait_for_commands(self, session_commands: list) -> Dict[str, Any]:
+        pending = {command.id: command for command in session_commands}
+        finished: Dict[str, Any] = {}
+
+        attempt = 0
+        while pending:
+            time.sleep(self.poll_policy.next_delay(attempt))
+            attempt += 1
+
+            by_session: Dict[str, set] = {}
+            for command in pending.values():
+                by_session.setdefault(command.session_id, set()).add(command.id)
+
+            for session_id, command_ids in by_session.items():
+                commands = self.hook.batch_fetch(
+                    "session_command", session_id, command_ids,
+                    lambda command_id: self.sdk.get_session_command(command_id).result)
+
+                for command_id, command in commands.items():
+                    if command.status_code is not None:
+                        self._timeline.mark(
+                            "session_command", command_id, FINISHED, command.finished_at)
+                        finished[command_id] = command
+                        del pending[command_id]
+
+            self.log.info("%s commands finished, %s pending", len(finished), len(pending))
+
+        return finished
+
+    def _to_row(self, command) -> Dict[str, Any]:
+        duration = None
+        if command.finished_at is not None:
+            duration = (command.finished_at - command.created_at).total_seconds()
+
+        return {
+            "session_id": command.session_id,
+            "shell_command": command.shell_command,
+            "id": command.id,
+            "status_code": command.status_code,
+            "duration": duration,
         }
 
-        session_command_response = self.sdk.create_session_command(
-            create_session_command).result
+    def execute(self, context: Context) -> List[Dict[str, Any]]:
 
-        self.log.info("session command with id %s created",
-                      session_command_response.id)
+        targets = [
+            (session_id, shell_command)
+            for session_id in self.session_ids
+            for shell_command in self.shell_commands
+        ]
+
+        session_commands = self._submit_all(
+            context,
+            "session_command",
+            targets,
+            lambda target: self._submit(*target),
+            scope=lambda command: command.session_id,
+            describe=lambda target: {"session_id": target[0], "shell_command": target[1]},
+            max_concurrency=self.max_concurrency,
+        )
+
+        self.log.info("%s session commands created", len(session_commands))
 
         if self.wait_for_completion:
-            while not AnyscaleSessionCommandSensor(
-                task_id="wait_session_command",
-                session_command_id=session_command_response.id,
-                auth_token=self.auth_token,
-            ).poke(context):
+            finished = self._wait_for_commands(session_commands)
+            session_commands = [finished[command.id] for command in session_commands]
+
+            for command in session_commands:
+                self._unregister(context, "session_command", command.id)
+                self._untrack("session_command", command.id)
+
+        rows = [self._to_row(command) for command in session_commands]
+
+        for row in rows:
+            self.log.info(
+                "session %s, command %s: status code %s, duration %s",
+                row["session_id"], row["id"], row["status_code"], row["duration"])
+
+        failed = [row for row in rows if row["status_code"] not in (None, 0)]
 
-                time.sleep(_POKE_INTERVAL)
+        if failed and self.fail_on_error:
+            context["ti"].xcom_push(key=XCOM_RETURN_KEY, value=rows)
+            raise AirflowException("{} of {} session commands ended with errors".format(
+                len(failed), len(rows)))
 
-        push_to_xcom(session_command_response.to_dict(),
-                     context, self._ignore_keys)
+        return rows
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from airflow.utils.context import Context
+from airflow.exceptions import AirflowException
+from airflow.utils.trigger_rule import TriggerRule
+
+from anyscale_provider.operators.base import AnyscaleBaseOperator
+from anyscale_provider.utils.registry import AnyscaleRunRegistry
+
+
+class AnyscaleTeardownRunOperator(AnyscaleBaseOperator):
+    """
+    Stops every Anyscale resource created by this DAG run that is still up.
+
+    Meant as the last task of a DAG: it runs whatever the state of its
+    upstream tasks and terminates the clusters, services, production jobs
+    and session commands registered by the run's operators (those created
+    with ``register_resources=True``, and clusters started with
+    ``owns_cluster``), ``max_concurrency``
+    at a time, then waits until all of them are stopped. ``kinds`` restricts
+    the teardown to some resource kinds, e.g. to keep services running.
+    The task returns one row per resource with the action taken.
+    """
+
+    template_fields: Sequence[str] = [
+        "auth_token",
+        "conn_id",
+    ]
+
+    def __init__(
+        self,
+        *,
+        kinds: Optional[List[str]] = None,
+        max_concurrency: int = 8,
+        wait_for_completion: bool = True,
+        timeout: float = 1800,
+        poll_interval: float = 15,
+        fail_on_error: bool = True,
+        trigger_rule: str = TriggerRule.ALL_DONE,
+        **kwargs,
+    ):
+        super().__init__(trigger_rule=trigger_rule, **kwargs)
+
+        self.kinds = kinds
+        self.max_concurrency = max_concurrency
+        self.wait_for_completion = wait_for_completion
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.fail_on_error = fail_on_error
+
+    def execute(self, context: Context) -> List[Dict[str, Any]]:
+        registry = AnyscaleRunRegistry.from_context(self.hook, context)
+
+        rows = registry.teardown(
+            kinds=self.kinds,
+            max_concurrency=self.max_concurrency,
+            wait=self.wait_for_completion,
+            timeout=self.timeout,
+            poll_interval=self.poll_interval,
+        )
+
+        for row in rows:
+            self.log.info("%s %s (from %s): %s", row["kind"], row["id"], row["task_id"], row["action"])
+
+        failed = [row for row in rows if row["action"] == "failed"]
+
+        if failed and self.fail_on_error:
+            raise AirflowException("failed to stop {}".format(
+                ", ".join(f"{row['kind']} {row['id']}" for row in failed)))
+
+        return rows
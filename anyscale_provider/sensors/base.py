@@ -1,24 +1,233 @@
-from anyscale import AnyscaleSDK
+import functools
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
 from airflow.utils.context import Context
 
+from airflow.exceptions import (
+    AirflowException, AirflowRescheduleException, AirflowSensorTimeout, TaskDeferred)
 from airflow.sensors.base import BaseSensorOperator
 from airflow.compat.functools import cached_property
 
+from anyscale_provider.hooks.anyscale import AnyscaleHook
+from anyscale_provider.triggers.base import AnyscaleBaseTrigger
+from anyscale_provider.utils import metrics
+from anyscale_provider.utils.durations import DurationTracker, resource_signature
+from anyscale_provider.utils.metrics import StateTimer
+from anyscale_provider.utils.poll_policy import PollPolicy
+from anyscale_provider.utils.registry import stop_resources
+from anyscale_provider.utils.retry import CircuitOpenError
+from anyscale_provider.utils.timeline import CREATED, FINISHED, TimelineRecorder
+
+if TYPE_CHECKING:
+    from anyscale import AnyscaleSDK
+
+
+def pause_on_outage(poke: Callable[[Any, Context], bool]) -> Callable[[Any, Context], bool]:
+    """
+    Turns a poke that failed fast because the API circuit breaker is open
+    into a "not done yet", so sensors wait out an outage instead of failing.
+    """
+
+    @functools.wraps(poke)
+    def wrapper(self, context: Context) -> bool:
+        try:
+            return poke(self, context)
+
+        except CircuitOpenError as e:
+            self.log.warning("%s, polling again later", e)
+            return False
+
+    return wrapper
+
 
 class AnyscaleBaseSensor(BaseSensorOperator):
+
+    resource_kind: Optional[str] = None
+
     def __init__(
         self,
         *,
-        auth_token: str,
+        auth_token: Optional[str] = None,
+        conn_id: Optional[str] = None,
+        deferrable: bool = False,
+        poll_policy: Optional[PollPolicy] = None,
+        cancel_on_timeout: bool = False,
         **kwargs
     ):
 
         self.auth_token = auth_token
+        self.conn_id = conn_id
+        self.deferrable = deferrable
+        self.poll_policy = poll_policy
+        self.cancel_on_timeout = cancel_on_timeout
+        self.last_state: Optional[str] = None
         super().__init__(**kwargs)
+        self._state_timer = StateTimer(self.resource_kind or "resource")
+        self._durations = DurationTracker(self.resource_kind or "resource")
+        self._timeline = TimelineRecorder()
 
     @cached_property
-    def sdk(self) -> AnyscaleSDK:
-        return AnyscaleSDK(auth_token=self.auth_token)
+    def hook(self) -> AnyscaleHook:
+        return AnyscaleHook(conn_id=self.conn_id, auth_token=self.auth_token)
+
+    @cached_property
+    def sdk(self) -> "AnyscaleSDK":
+        return self.hook.get_conn()
 
     def poke(self, context: Context) -> bool:
-        raise NotImplementedError("Please implement poke() in subclass")
\ No newline at end of file
+        raise NotImplementedError("Please implement poke() in subclass")
+
+    def get_trigger(self) -> AnyscaleBaseTrigger:
+        raise NotImplementedError("Please implement get_trigger() in subclass")
+
+    def _resource_id(self) -> str:
+        raise NotImplementedError("Please implement _resource_id() in subclass")
+
+    def _trigger_kwargs(self) -> Dict[str, Any]:
+        if self.auth_token:
+            # trigger kwargs are stored in the metadata database.
+            raise AirflowException(
+                "deferrable mode reads the API token from the connection conn_id, "
+                "auth_token can not be passed to the triggerer")
+
+        return {
+            "conn_id": self.conn_id,
+            "poll_interval": self.poke_interval,
+            "poll_policy": self.poll_policy.to_dict() if self.poll_policy else None,
+            "cancel_on_timeout": self.cancel_on_timeout,
+            "deadline": time.time() + self.timeout if self.cancel_on_timeout else None,
+        }
+
+    def _cancel(self) -> None:
+        """Stops the resource being waited on, when the sensor times out."""
+        resource_id = self._resource_id()
+        self.log.info("timed out, cancelling %s %s", self.resource_kind, resource_id)
+
+        try:
+            stop_resources(self.hook, [(self.resource_kind, resource_id)])
+        except Exception:
+            self.log.exception("failed to cancel %s %s", self.resource_kind, resource_id)
+
+    def _record_poll(self, state: Optional[str] = None, at: Optional[Any] = None) -> None:
+        if state is not None:
+            self.last_state = state
+            self._timeline.mark(self.resource_kind, self._resource_id(), state, at)
+
+        metrics.record_poll(self._state_timer.kind, self.dag_id, self.task_id)
+        self._state_timer.observe(state)
+
+        if self._durations.is_slow():
+            self.log.warning(
+                "running for %.0fs, longer than the p95 of previous runs (%.0fs)",
+                self._durations.elapsed(), self._durations.p95)
+            metrics.record_slow_run(self._durations.kind)
+
+    def _observe_run(self, resource: Any) -> None:
+        """Matches the resource with the durations of previous runs of the same workload."""
+        self._durations.observe(
+            resource_signature(self._durations.kind, resource), resource.created_at)
+
+        self._timeline.mark(self.resource_kind, resource.id, CREATED, resource.created_at)
+
+        finished_at = getattr(resource, "finished_at", None)
+        if finished_at is not None:
+            self._timeline.mark(self.resource_kind, resource.id, FINISHED, finished_at)
+
+    def _record_duration(self, seconds: float, succeeded: bool = True) -> None:
+        self.log.info("duration: %s", seconds)
+        metrics.record_duration(self._state_timer.kind, seconds)
+
+        if succeeded:
+            self._durations.record(seconds)
+
+    def _with_expected_delay(self, delay: float) -> float:
+        # no point in polling a run much before it is expected to finish.
+        expected = self._durations.delay_until_expected()
+
+        if expected is not None and expected > delay:
+            self.log.info("next poll in %.0fs, near the expected end of the run", expected)
+            return expected
+
+        return delay
+
+    def next_poll_delay(self, attempt: int) -> float:
+        if self.poll_policy is None:
+            return self._with_expected_delay(self.poke_interval)
+
+        return self._with_expected_delay(self.poll_policy.next_delay(attempt, self.last_state))
+
+    def _get_next_poke_interval(
+        self,
+        started_at: Any,
+        run_duration: Callable[[], float],
+        try_number: int,
+    ) -> float:
+        if self.poll_policy is None:
+            delay = self._with_expected_delay(
+                super()._get_next_poke_interval(started_at, run_duration, try_number))
+        else:
+            delay = self.next_poll_delay(try_number - 1)
+
+        return min(delay, max(self.timeout - run_duration(), 0))
+
+    def execute(self, context: Context) -> Any:
+        try:
+            if not self.deferrable:
+                return super().execute(context)
+
+            if self.poke(context):
+                return None
+
+        except (TaskDeferred, AirflowRescheduleException):
+            raise
+
+        except Exception as e:
+            if isinstance(e, AirflowSensorTimeout) and self.cancel_on_timeout:
+                self._cancel()
+
+            self._timeline.push(context)
+            raise
+
+        self.defer(
+            trigger=self.get_trigger(),
+            method_name="execute_complete",
+            timeout=timedelta(seconds=self.timeout),
+            kwargs={"timeline": self._timeline.to_dict()},
+        )
+
+    def resume_execution(self, next_method: str, next_kwargs: Optional[Dict[str, Any]], context: Context):
+        # airflow >= 2.7 resumes deferred tasks through this method, so the
+        # timeline kwarg is taken out before next_method is called.
+        next_kwargs = dict(next_kwargs or {})
+        self._timeline.merge(next_kwargs.pop("timeline", None))
+
+        # only anyscale triggers send dicts, a TimeDeltaTrigger sends a datetime.
+        event = next_kwargs.get("event")
+        if isinstance(event, dict):
+            self._timeline.merge(event.get("timeline"))
+
+        # the deferral timed out before the trigger noticed.
+        if next_method == "__fail__" and self.cancel_on_timeout:
+            self._cancel()
+
+        try:
+            return super().resume_execution(next_method, next_kwargs, context)
+
+        except Exception:
+            self._timeline.push(context)
+            raise
+
+    def post_execute(self, context: Any, result: Any = None) -> None:
+        super().post_execute(context, result)
+        self._timeline.push(context)
+
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        if event["status"] != "success":
+            raise AirflowException(event["message"])
+
+        self.log.info(event["message"])
+
+        if "duration" in event:
+            self._record_duration(event["duration"])
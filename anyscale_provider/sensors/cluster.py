@@ -1,13 +1,17 @@
-from typing import Sequence
+from typing import Optional, Sequence
 
 from airflow.utils.context import Context
-from anyscale_provider.sensors.base import AnyscaleBaseSensor
+from anyscale_provider.sensors.base import AnyscaleBaseSensor, pause_on_outage
+from anyscale_provider.triggers.cluster import AnyscaleClusterTrigger
 
 
 class AnyscaleClusterSensor(AnyscaleBaseSensor):
 
+    resource_kind = "cluster"
+
     template_fields: Sequence[str] = [
         "auth_token",
+        "conn_id",
         "cluster_id",
     ]
 
@@ -15,11 +19,23 @@ class AnyscaleClusterSensor(AnyscaleBaseSensor):
         self,
         *,
         cluster_id: str,
+        project_id: Optional[str] = None,
         **kwargs,
     ):
     
         super().__init__(**kwargs)
         self.cluster_id = cluster_id
+        self.project_id = project_id
+
+    def get_trigger(self) -> AnyscaleClusterTrigger:
+        return AnyscaleClusterTrigger(
+            cluster_id=self.cluster_id,
+            project_id=self.project_id,
+            **self._trigger_kwargs(),
+        )
+
+    def _resource_id(self) -> str:
+        return self.cluster_id
 
     def _log_services(self, response):
         services = response.result.services_urls
@@ -37,12 +53,14 @@ class AnyscaleClusterSensor(AnyscaleBaseSensor):
             for name, info in head_node_info.to_dict().items():
                 self.log.info("%s: %s", name, info)
 
+    @pause_on_outage
     def poke(self, context: Context) -> bool:
 
         response = self.sdk.get_cluster(self.cluster_id)
 
         state = response.result.state
         goal_state = response.result.goal_state
+        self._record_poll(state)
 
         self.log.info("current state: %s, goal state: %s", state, goal_state)
 
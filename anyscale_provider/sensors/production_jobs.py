@@ -1,26 +1,59 @@
-from typing import Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 from airflow.utils.context import Context
-from anyscale_provider.sensors.base import AnyscaleBaseSensor
+from anyscale_provider.sensors.base import AnyscaleBaseSensor, pause_on_outage
+from anyscale_provider.utils import metrics
+from anyscale_provider.utils.failures import (
+    INFRASTRUCTURE_FAILURES, STOPPED, TAIL_BYTES, classify_failure, job_failure, read_tail)
+from anyscale_provider.triggers.production_jobs import AnyscaleProductionJobTrigger
+from anyscale_provider.utils.logs import LogTailer, DEFAULT_MAX_LOG_BYTES
+from anyscale_provider.utils.log_export import LogExport
+from anyscale_provider.utils.timeline import LOGS_FETCH, LOGS_FETCHED
 
 from airflow.exceptions import AirflowException
 
 
 class AnyscaleProductionJobSensor(AnyscaleBaseSensor):
 
+    resource_kind = "production_job"
+
     template_fields: Sequence[str] = [
         "production_job_id",
         "auth_token",
+        "conn_id",
     ]
 
     def __init__(
         self,
         *,
         production_job_id: str,
+        project_id: Optional[str] = None,
+        stream_logs: bool = False,
+        max_log_bytes: int = DEFAULT_MAX_LOG_BYTES,
+        log_export: Optional[LogExport] = None,
+        classify_failures: bool = True,
+        failure_patterns: Optional[Dict[str, List[str]]] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
         self.production_job_id = production_job_id
+        self.project_id = project_id
+        self.stream_logs = stream_logs
+        self.log_tailer = LogTailer(max_bytes=max_log_bytes)
+        self.log_export = log_export
+        self.classify_failures = classify_failures
+        self.failure_patterns = failure_patterns
+        self._exported_tail: Optional[List[str]] = None
+
+    def get_trigger(self) -> AnyscaleProductionJobTrigger:
+        return AnyscaleProductionJobTrigger(
+            production_job_id=self.production_job_id,
+            project_id=self.project_id,
+            **self._trigger_kwargs(),
+        )
+
+    def _resource_id(self) -> str:
+        return self.production_job_id
 
     def _fetch_logs(self):
         result = self.sdk.get_production_job_logs(
@@ -28,12 +61,113 @@ class AnyscaleProductionJobSensor(AnyscaleBaseSensor):
 
         return result.logs
 
+    def _log_logs(self):
+        self._timeline.mark(self.resource_kind, self.production_job_id, LOGS_FETCH)
+
+        try:
+            logs = self._fetch_logs()
+            self.log.info("logs: \n %s", logs)
+
+        except Exception:
+            self.log.warning("logs not found for %s", self.production_job_id)
+
+        self._timeline.mark(self.resource_kind, self.production_job_id, LOGS_FETCHED)
+
+    def _export_logs(self, context: Context):
+        ti = context["ti"]
+        path = self.log_export.path(
+            ti.dag_id, ti.task_id, ti.run_id, ti.try_number, self.production_job_id)
+
+        self._timeline.mark(self.resource_kind, self.production_job_id, LOGS_FETCH)
+
+        try:
+            summary = self.log_export.export(
+                path,
+                self.hook.iter_job_log_chunks(self.production_job_id, self.log_export.chunk_size),
+            )
+
+        except Exception as e:
+            self.log.warning("could not export logs of %s: %s", self.production_job_id, e)
+            return
+
+        self._timeline.mark(self.resource_kind, self.production_job_id, LOGS_FETCHED)
+        self.log_export.log_summary(f"logs of production job {self.production_job_id}", summary)
+        self._exported_tail = summary.tail
+        ti.xcom_push(key="log_export", value=summary._asdict())
+
+    def _final_logs(self, context: Context):
+        if self.log_export is not None:
+            self._export_logs(context)
+        else:
+            self._log_logs()
+
+    def _log_tail(self) -> Optional[str]:
+        """The end of the job's log, from what was already read when possible."""
+        if self.log_tailer.tail:
+            return "\n".join(self.log_tailer.tail)[-TAIL_BYTES:]
+
+        if self._exported_tail:
+            return "\n".join(self._exported_tail)
+
+        try:
+            return read_tail(self.hook.iter_job_log_chunks(self.production_job_id))
+
+        except Exception as e:
+            self.log.warning("could not read the logs of %s: %s", self.production_job_id, e)
+            return None
+
+    def _failure(self, current_state: str, error: Optional[str]) -> AirflowException:
+        """
+        The exception for a job that ended in ``current_state``, whose class
+        tells why it failed when ``classify_failures`` is set.
+        """
+        message = "job ended with status {}, error: {}".format(current_state, error)
+
+        if not self.classify_failures:
+            return AirflowException(message)
+
+        if str(current_state) == "TERMINATED":
+            # stopped on purpose, e.g. by a teardown: the nodes it lost on the
+            # way must not make it look preempted and get it submitted again.
+            failure_class = STOPPED
+        else:
+            failure_class = classify_failure(error, patterns=self.failure_patterns)
+
+        if failure_class not in INFRASTRUCTURE_FAILURES + (STOPPED,):
+            # the error often only says that the entrypoint failed, the log says why.
+            failure_class = classify_failure(error, self._log_tail(), self.failure_patterns)
+
+        self.log.info("failure of job %s classified as %s", self.production_job_id, failure_class)
+        metrics.record_failure(self.resource_kind, failure_class)
+
+        return job_failure(failure_class, message, self.production_job_id)
+
+    def _stream_logs(self, final: bool = False):
+        try:
+            logs = self._fetch_logs()
+
+        except Exception:
+            # the job has no run yet, or its logs are not ready.
+            self.log.debug("logs not available yet for %s", self.production_job_id)
+            logs = None
+
+        if logs:
+            for line in self.log_tailer.feed(str(logs)):
+                self.log.info("%s", line)
+
+        if final:
+            for line in self.log_tailer.flush():
+                self.log.info("%s", line)
+
+    @pause_on_outage
     def poke(self, context: Context) -> bool:
 
         production_job = self.sdk.get_production_job(
             production_job_id=self.production_job_id).result
 
         state = production_job.state
+        self._observe_run(production_job)
+        self._record_poll(state.current_state, state.state_transitioned_at)
 
         self.log.info("current state: %s, goal state %s",
                       state.current_state, state.goal_state)
@@ -42,13 +176,16 @@ class AnyscaleProductionJobSensor(AnyscaleBaseSensor):
         if operation_message:
             self.log.info(operation_message)
 
-        if state.current_state in ("OUT_OF_RETRIES", "TERMINATED", "ERRORED"):
-            raise AirflowException(
-                "job ended with status {}, error: {}".format(
-                    state.current_state,
-                    state.error,
-                )
-            )
+        failed = state.current_state in ("OUT_OF_RETRIES", "TERMINATED", "ERRORED")
+
+        if self.stream_logs:
+            self._stream_logs(final=failed or state.current_state == state.goal_state)
+
+        if failed:
+            if self.log_export is not None:
+                self._export_logs(context)
+
+            raise self._failure(state.current_state, state.error)
 
         if state.current_state != state.goal_state:
             return False
@@ -58,13 +195,21 @@ class AnyscaleProductionJobSensor(AnyscaleBaseSensor):
 
         took = state.state_transitioned_at - production_job.created_at
 
-        self.log.info("duration: %s", took.total_seconds())
-
-        try:
-            logs = self._fetch_logs()
-            self.log.info("logs: \n %s", logs)
+        self._record_duration(took.total_seconds())
 
-        except Exception:
-            self.log.warning("logs not found for %s", self.production_job_id)
+        if self.log_export is not None:
+            self._export_logs(context)
+        elif not self.stream_logs:
+            self._log_logs()
 
         return True
+
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        if event["status"] != "success" and self.log_export is not None:
+            self._export_logs(context)
+
+        if event["status"] == "error" and "state" in event:
+            raise self._failure(event["state"], event.get("error"))
+
+        super().execute_complete(context, event)
+        self._final_logs(context)
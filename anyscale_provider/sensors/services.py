@@ -1,35 +1,55 @@
-from typing import Sequence
+from typing import Any, Dict, Optional, Sequence
 
 from airflow.utils.context import Context
 from airflow.exceptions import AirflowException
-from anyscale_provider.sensors.base import AnyscaleBaseSensor
+from anyscale_provider.sensors.base import AnyscaleBaseSensor, pause_on_outage
+from anyscale_provider.triggers.services import AnyscaleServiceTrigger
 
 
 class AnyscaleServiceSensor(AnyscaleBaseSensor):
 
+    resource_kind = "service"
+
     template_fields: Sequence[str] = [
         "service_id",
         "auth_token",
+        "conn_id",
     ]
 
     def __init__(
         self,
         service_id: str,
+        project_id: Optional[str] = None,
         goal_state: str = "RUNNING",
         **kwargs,
     ):
         super().__init__(**kwargs)
 
         self.service_id = service_id
+        self.project_id = project_id
         self.goal_state = goal_state
         self._ignore_keys = []
 
+    def get_trigger(self) -> AnyscaleServiceTrigger:
+        return AnyscaleServiceTrigger(
+            service_id=self.service_id,
+            project_id=self.project_id,
+            goal_state=self.goal_state,
+            **self._trigger_kwargs(),
+        )
+
+    def _resource_id(self) -> str:
+        return self.service_id
+
+    @pause_on_outage
     def poke(self, context: Context) -> bool:
 
         response = self.sdk.get_service(
             service_id=self.service_id)
 
         state = response.result.state
+        self._observe_run(response.result)
+        self._record_poll(state.current_state, state.state_transitioned_at)
 
         msg = (
             f"current state: {state.current_state}, "
@@ -60,7 +80,11 @@ class AnyscaleServiceSensor(AnyscaleBaseSensor):
             f"service {self.service_id} reached goal state {self.goal_state}")
 
         took = response.result.state.state_transitioned_at - response.result.created_at
-        self.log.info(f"duration: {took.total_seconds()}")
+        self._record_duration(took.total_seconds())
         self.log.info(f"service available at: {response.result.url}")
 
         return True
+
+    def execute_complete(self, context: Context, event: Dict[str, Any]) -> None:
+        super().execute_complete(context, event)
+        self.log.info(f"service available at: {event['url']}")
@@ -1,40 +1,59 @@
-from typing import Sequence
+from typing import Optional, Sequence
 
 from airflow.utils.context import Context
 
 from airflow.exceptions import AirflowException
-from anyscale_provider.sensors.base import AnyscaleBaseSensor
+from anyscale_provider.sensors.base import AnyscaleBaseSensor, pause_on_outage
+from anyscale_provider.triggers.session_command import AnyscaleSessionCommandTrigger
 
 
 class AnyscaleSessionCommandSensor(AnyscaleBaseSensor):
 
+    resource_kind = "session_command"
+
     template_fields: Sequence[str] = [
         "session_command_id",
         "auth_token",
+        "conn_id",
     ]
 
     def __init__(
         self,
         session_command_id: str,
+        session_id: Optional[str] = None,
         **kwargs,
     ):
         super().__init__(**kwargs)
 
         self.session_command_id = session_command_id
+        self.session_id = session_id
+
+    def get_trigger(self) -> AnyscaleSessionCommandTrigger:
+        return AnyscaleSessionCommandTrigger(
+            session_command_id=self.session_command_id,
+            session_id=self.session_id,
+            **self._trigger_kwargs(),
+        )
+
+    def _resource_id(self) -> str:
+        return self.session_command_id
 
+    @pause_on_outage
     def poke(self, context: Context) -> bool:
 
         session_command_response = self.sdk.get_session_command(
             self.session_command_id).result
 
         status_code = session_command_response.status_code
+        self._observe_run(session_command_response)
+        self._record_poll()
 
         if status_code is None:
             return False
 
         took = session_command_response.finished_at - session_command_response.created_at
 
-        self.log.info("duration: %s", took.total_seconds())
+        self._record_duration(took.total_seconds(), succeeded=status_code == 0)
         self.log.info(
             "session command %s ended with status code %s",
             self.session_command_id,
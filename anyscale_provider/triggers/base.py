@@ -0,0 +1,248 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional, Tuple
+
+from airflow.configuration import conf
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+from airflow.compat.functools import cached_property
+
+from anyscale_provider.hooks.anyscale import AnyscaleHook
+from anyscale_provider.utils import metrics
+from anyscale_provider.utils.durations import DurationTracker, resource_signature
+from anyscale_provider.utils.metrics import StateTimer
+from anyscale_provider.utils.poll_policy import PollPolicy
+from anyscale_provider.utils.registry import stop_resources
+from anyscale_provider.utils.timeline import CREATED, FINISHED, TimelineRecorder
+from anyscale_provider.utils.retry import CircuitOpenError
+from anyscale_provider.triggers.coordinator import FALL_BACK, get_coordinator
+
+if TYPE_CHECKING:
+    from anyscale import AnyscaleSDK
+
+
+class AnyscaleBaseTrigger(BaseTrigger):
+    """
+    Polls an Anyscale resource from the triggerer until it reaches a final state.
+
+    Subclasses implement ``_fetch`` (a blocking SDK call) and ``_evaluate``,
+    which returns the event payload once the resource is done, or ``None`` to
+    keep waiting. Both run in the default executor, ``_evaluate`` reading and
+    writing the duration store, so the event loop is never blocked.
+    When ``poll_policy`` (a serialized :class:`PollPolicy`) is given it decides
+    the delay between polls, otherwise ``poll_interval`` is used.
+
+    Only ``conn_id`` is serialized: the API token is read from the connection
+    by the triggerer, never stored in the trigger table.
+
+    Past ``deadline`` (a unix timestamp) the trigger gives up with an error
+    event, terminating the resource first when ``cancel_on_timeout`` is set.
+
+    With ``[anyscale] batch_poll`` enabled in the triggerer, triggers that know
+    their scope share one list call per tick through the poll coordinator
+    instead of polling on their own, unless that list call keeps failing.
+    """
+
+    resource_kind: Optional[str] = None
+
+    def __init__(
+        self,
+        *,
+        conn_id: Optional[str] = None,
+        poll_interval: float = 60,
+        poll_policy: Optional[Dict[str, Any]] = None,
+        cancel_on_timeout: bool = False,
+        deadline: Optional[float] = None,
+    ):
+        super().__init__()
+        self.conn_id = conn_id
+        self.poll_interval = poll_interval
+        self.poll_policy = poll_policy
+        self.cancel_on_timeout = cancel_on_timeout
+        self.deadline = deadline
+        self.last_state: Optional[str] = None
+        self._state_timer = StateTimer(self.resource_kind or "resource")
+        self._durations = DurationTracker(self.resource_kind or "resource")
+        self._timeline = TimelineRecorder()
+
+    @cached_property
+    def hook(self) -> AnyscaleHook:
+        return AnyscaleHook(conn_id=self.conn_id)
+
+    @cached_property
+    def sdk(self) -> "AnyscaleSDK":
+        return self.hook.get_conn()
+
+    def _serialize_kwargs(self) -> Dict[str, Any]:
+        raise NotImplementedError("Please implement _serialize_kwargs() in subclass")
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        kwargs = {
+            "conn_id": self.conn_id,
+            "poll_interval": self.poll_interval,
+            "poll_policy": self.poll_policy,
+            "cancel_on_timeout": self.cancel_on_timeout,
+            "deadline": self.deadline,
+        }
+        kwargs.update(self._serialize_kwargs())
+
+        return f"{self.__class__.__module__}.{self.__class__.__name__}", kwargs
+
+    def _fetch(self) -> Any:
+        raise NotImplementedError("Please implement _fetch() in subclass")
+
+    def _evaluate(self, resource: Any) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError("Please implement _evaluate() in subclass")
+
+    def _resource_id(self) -> str:
+        raise NotImplementedError("Please implement _resource_id() in subclass")
+
+    def _batch_scope(self) -> Optional[str]:
+        return None
+
+    def _can_batch(self) -> bool:
+        # resources are listed by scope: without one there is nothing to share.
+        return (
+            self.resource_kind is not None
+            and self._batch_scope() is not None
+            and conf.getboolean("anyscale", "batch_poll", fallback=False)
+        )
+
+    def _record_poll(self, state: Optional[str] = None, at: Optional[Any] = None) -> None:
+        if state is not None:
+            self.last_state = state
+            self._timeline.mark(self.resource_kind, self._resource_id(), state, at)
+
+        metrics.record_poll(self._state_timer.kind)
+        self._state_timer.observe(state)
+
+        if self._durations.is_slow():
+            self.log.warning(
+                "running for %.0fs, longer than the p95 of previous runs (%.0fs)",
+                self._durations.elapsed(), self._durations.p95)
+            metrics.record_slow_run(self._durations.kind)
+
+    def _observe_run(self, resource: Any) -> None:
+        self._durations.observe(
+            resource_signature(self._durations.kind, resource), resource.created_at)
+
+        self._timeline.mark(self.resource_kind, resource.id, CREATED, resource.created_at)
+
+        finished_at = getattr(resource, "finished_at", None)
+        if finished_at is not None:
+            self._timeline.mark(self.resource_kind, resource.id, FINISHED, finished_at)
+
+    def _event(self, payload: Dict[str, Any]) -> TriggerEvent:
+        # what the trigger saw, for the task to add to its own timeline.
+        return TriggerEvent(dict(payload, timeline=self._timeline.to_dict()))
+
+    def _remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+
+        return max(self.deadline - time.time(), 0)
+
+    async def _timeout_event(self) -> TriggerEvent:
+        resource_id = self._resource_id()
+        message = f"{self.resource_kind} {resource_id} did not finish before the deadline"
+
+        if self.cancel_on_timeout:
+            loop = asyncio.get_event_loop()
+
+            try:
+                await loop.run_in_executor(
+                    None, stop_resources, self.hook, [(self.resource_kind, resource_id)])
+                message += ", it was cancelled"
+
+            except Exception as e:
+                self.log.exception("failed to cancel %s %s", self.resource_kind, resource_id)
+                message += f", cancelling it failed: {e}"
+
+        return self._event({"status": "error", "message": message})
+
+    def _next_delay(self, policy: Optional[PollPolicy], attempt: int) -> float:
+        if policy is None:
+            delay = self.poll_interval
+        else:
+            delay = policy.next_delay(attempt, self.last_state)
+
+        expected = self._durations.delay_until_expected()
+
+        return max(delay, expected) if expected is not None else delay
+
+    async def _run_batched(self) -> AsyncIterator[TriggerEvent]:
+        coordinator = get_coordinator()
+        resource_id = self._resource_id()
+        scope = self._batch_scope()
+        interval = conf.getfloat("anyscale", "batch_poll_interval", fallback=30)
+
+        queue = coordinator.subscribe(self, resource_id, scope, interval)
+        loop = asyncio.get_event_loop()
+
+        try:
+            while True:
+                try:
+                    resource = await asyncio.wait_for(queue.get(), self._remaining())
+
+                except asyncio.TimeoutError:
+                    yield await self._timeout_event()
+                    return
+
+                if resource is FALL_BACK:
+                    self.log.warning("batch polling failed, polling %s on its own", resource_id)
+                    return
+
+                try:
+                    event = await loop.run_in_executor(None, self._evaluate, resource)
+
+                except Exception as e:
+                    yield self._event({"status": "error", "message": str(e)})
+                    return
+
+                if event is not None:
+                    yield self._event(event)
+                    return
+
+        finally:
+            coordinator.unsubscribe(self, resource_id, scope, queue)
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        if self._can_batch():
+            async for event in self._run_batched():
+                yield event
+                return
+
+        loop = asyncio.get_event_loop()
+
+        policy = None
+        if self.poll_policy is not None:
+            policy = PollPolicy.from_dict(self.poll_policy)
+
+        attempt = 0
+        while True:
+            if self._remaining() == 0:
+                yield await self._timeout_event()
+                return
+
+            try:
+                resource = await loop.run_in_executor(None, self._fetch)
+                event = await loop.run_in_executor(None, self._evaluate, resource)
+
+            except CircuitOpenError as e:
+                self.log.warning("%s, polling again later", e)
+                await asyncio.sleep(e.retry_in)
+                continue
+
+            except Exception as e:
+                self.log.exception("error while polling anyscale")
+                yield self._event({"status": "error", "message": str(e)})
+                return
+
+            if event is not None:
+                yield self._event(event)
+                return
+
+            delay = self._next_delay(policy, attempt)
+            remaining = self._remaining()
+
+            await asyncio.sleep(delay if remaining is None else min(delay, remaining))
+            attempt += 1
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional
+
+from anyscale_provider.triggers.base import AnyscaleBaseTrigger
+
+
+class AnyscaleClusterTrigger(AnyscaleBaseTrigger):
+
+    resource_kind = "cluster"
+
+    def __init__(
+        self,
+        *,
+        cluster_id: str,
+        project_id: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.cluster_id = cluster_id
+        self.project_id = project_id
+
+    def _serialize_kwargs(self) -> Dict[str, Any]:
+        return {
+            "cluster_id": self.cluster_id,
+            "project_id": self.project_id,
+        }
+
+    def _resource_id(self) -> str:
+        return self.cluster_id
+
+    def _batch_scope(self) -> Optional[str]:
+        return self.project_id
+
+    def _fetch(self):
+        return self.sdk.get_cluster(self.cluster_id).result
+
+    def _evaluate(self, cluster) -> Optional[Dict[str, Any]]:
+        self._record_poll(cluster.state)
+
+        self.log.info("current state: %s, goal state: %s",
+                      cluster.state, cluster.goal_state)
+
+        if cluster.goal_state is not None:
+            return None
+
+        return {
+            "status": "success",
+            "cluster_id": self.cluster_id,
+            "state": str(cluster.state),
+            "message": f"cluster reached goal state: {cluster.state}",
+        }
@@ -0,0 +1,148 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from anyscale_provider.utils.retry import CircuitOpenError
+
+# rounds of failed list calls after which the triggers poll on their own.
+_MAX_FAILED_ROUNDS = 3
+
+# sent to the triggers of a group that gave up.
+FALL_BACK = object()
+
+
+class _PollGroup(LoggingMixin):
+    """Every trigger waiting on the same kind of resource, in the same scope."""
+
+    def __init__(self, kind: str, scope: Optional[str], hook, interval: float):
+        super().__init__()
+        self.kind = kind
+        self.scope = scope
+        self.hook = hook
+        self.interval = interval
+        self.subscribers: Dict[str, List[Tuple[Any, asyncio.Queue]]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def _fetch_all(self, wanted: Set[str], subscribers: Dict[str, Any]) -> Dict[str, Any]:
+        return self.hook.batch_fetch(
+            self.kind, self.scope, wanted,
+            lambda resource_id: subscribers[resource_id]._fetch())
+
+    def _fall_back(self) -> None:
+        for subscribers in self.subscribers.values():
+            for _, queue in subscribers:
+                queue.put_nowait(FALL_BACK)
+
+        self.subscribers.clear()
+
+    async def run(self) -> None:
+        loop = asyncio.get_event_loop()
+        failed_rounds = 0
+
+        while self.subscribers:
+            wanted = set(self.subscribers)
+            triggers = {rid: subs[0][0] for rid, subs in self.subscribers.items()}
+
+            try:
+                resources = await loop.run_in_executor(
+                    None, self._fetch_all, wanted, triggers)
+
+            except CircuitOpenError as e:
+                self.log.warning("%s, polling %s again later", e, self.kind)
+                await asyncio.sleep(e.retry_in)
+                continue
+
+            except Exception:
+                failed_rounds += 1
+                self.log.exception(
+                    "error while batch polling %s (%s rounds in a row)", self.kind, failed_rounds)
+
+                if failed_rounds >= _MAX_FAILED_ROUNDS:
+                    self.log.warning("%s triggers polling on their own", len(self.subscribers))
+                    self._fall_back()
+                    return
+
+                # the triggers wait for the next round.
+                await asyncio.sleep(self.interval)
+                continue
+
+            failed_rounds = 0
+
+            for resource_id, subscribers in list(self.subscribers.items()):
+                if resource_id not in resources:
+                    continue
+
+                for _, queue in subscribers:
+                    queue.put_nowait(resources[resource_id])
+
+            await asyncio.sleep(self.interval)
+
+
+class AnyscalePollCoordinator:
+    """
+    Coalesces status polls of many triggers into one list call per tick.
+
+    Triggers waiting on resources of the same kind and scope (project, or
+    session for session commands) subscribe to a shared poll group. The group
+    lists the scope once per ``interval`` and fans every resource out to the
+    triggers waiting on it, so the number of API calls grows with the number
+    of projects rather than with the number of tasks. A failed list call is
+    tried again on the next round; after a few failed rounds in a row the
+    triggers are sent ``FALL_BACK`` and poll their resource on their own.
+    """
+
+    def __init__(self):
+        # (resource kind, conn_id, scope)
+        self._groups: Dict[Tuple[str, Optional[str], Optional[str]], _PollGroup] = {}
+
+    def subscribe(self, trigger, resource_id: str, scope: Optional[str], interval: float) -> asyncio.Queue:
+        key = (trigger.resource_kind, trigger.conn_id, scope)
+
+        group = self._groups.get(key)
+        if group is None:
+            group = _PollGroup(trigger.resource_kind, scope, trigger.hook, interval)
+            self._groups[key] = group
+
+        group.interval = min(group.interval, interval)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        group.subscribers.setdefault(resource_id, []).append((trigger, queue))
+
+        if group.task is None or group.task.done():
+            group.task = asyncio.ensure_future(group.run())
+
+        return queue
+
+    def unsubscribe(self, trigger, resource_id: str, scope: Optional[str], queue: asyncio.Queue) -> None:
+        key = (trigger.resource_kind, trigger.conn_id, scope)
+
+        group = self._groups.get(key)
+        if group is None:
+            return
+
+        subscribers = [
+            (t, q) for t, q in group.subscribers.get(resource_id, []) if q is not queue
+        ]
+
+        if subscribers:
+            group.subscribers[resource_id] = subscribers
+        else:
+            group.subscribers.pop(resource_id, None)
+
+        if not group.subscribers:
+            if group.task is not None:
+                group.task.cancel()
+            del self._groups[key]
+
+
+_coordinator: Optional[AnyscalePollCoordinator] = None
+
+
+def get_coordinator() -> AnyscalePollCoordinator:
+    global _coordinator
+
+    if _coordinator is None:
+        _coordinator = AnyscalePollCoordinator()
+
+    return _coordinator
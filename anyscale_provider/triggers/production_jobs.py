@@ -0,0 +1,72 @@
+from typing import Any, Dict, Optional
+
+from anyscale_provider.triggers.base import AnyscaleBaseTrigger
+
+
+class AnyscaleProductionJobTrigger(AnyscaleBaseTrigger):
+
+    resource_kind = "production_job"
+
+    def __init__(
+        self,
+        *,
+        production_job_id: str,
+        project_id: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.production_job_id = production_job_id
+        self.project_id = project_id
+
+    def _serialize_kwargs(self) -> Dict[str, Any]:
+        return {
+            "production_job_id": self.production_job_id,
+            "project_id": self.project_id,
+        }
+
+    def _resource_id(self) -> str:
+        return self.production_job_id
+
+    def _batch_scope(self) -> Optional[str]:
+        return self.project_id
+
+    def _fetch(self):
+        return self.sdk.get_production_job(
+            production_job_id=self.production_job_id).result
+
+    def _evaluate(self, production_job) -> Optional[Dict[str, Any]]:
+        state = production_job.state
+        self._observe_run(production_job)
+        self._record_poll(state.current_state, state.state_transitioned_at)
+
+        self.log.info("current state: %s, goal state %s",
+                      state.current_state, state.goal_state)
+
+        if state.operation_message:
+            self.log.info(state.operation_message)
+
+        if state.current_state in ("OUT_OF_RETRIES", "TERMINATED", "ERRORED"):
+            return {
+                "status": "error",
+                "production_job_id": self.production_job_id,
+                "state": str(state.current_state),
+                "error": state.error,
+                "message": "job ended with status {}, error: {}".format(
+                    state.current_state,
+                    state.error,
+                ),
+            }
+
+        if state.current_state != state.goal_state:
+            return None
+
+        took = state.state_transitioned_at - production_job.created_at
+        self._durations.record(took.total_seconds())
+
+        return {
+            "status": "success",
+            "production_job_id": self.production_job_id,
+            "state": str(state.current_state),
+            "duration": took.total_seconds(),
+            "message": f"job {self.production_job_id} reached goal state {state.goal_state}",
+        }
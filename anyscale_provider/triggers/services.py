@@ -0,0 +1,74 @@
+from typing import Any, Dict, Optional
+
+from anyscale_provider.triggers.base import AnyscaleBaseTrigger
+
+
+class AnyscaleServiceTrigger(AnyscaleBaseTrigger):
+
+    resource_kind = "service"
+
+    def __init__(
+        self,
+        *,
+        service_id: str,
+        project_id: Optional[str] = None,
+        goal_state: str = "RUNNING",
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.service_id = service_id
+        self.project_id = project_id
+        self.goal_state = goal_state
+
+    def _serialize_kwargs(self) -> Dict[str, Any]:
+        return {
+            "service_id": self.service_id,
+            "project_id": self.project_id,
+            "goal_state": self.goal_state,
+        }
+
+    def _resource_id(self) -> str:
+        return self.service_id
+
+    def _batch_scope(self) -> Optional[str]:
+        return self.project_id
+
+    def _fetch(self):
+        return self.sdk.get_service(service_id=self.service_id).result
+
+    def _evaluate(self, service) -> Optional[Dict[str, Any]]:
+        state = service.state
+        self._observe_run(service)
+        self._record_poll(state.current_state, state.state_transitioned_at)
+
+        self.log.info("current state: %s, goal state: %s",
+                      state.current_state, self.goal_state)
+
+        if state.operation_message:
+            self.log.info(state.operation_message)
+
+        if state.current_state in ("OUT_OF_RETRIES", "TERMINATED", "ERRORED", "BROKEN"):
+            if self.goal_state != state.current_state:
+                return {
+                    "status": "error",
+                    "service_id": self.service_id,
+                    "project_id": self.project_id,
+                    "state": str(state.current_state),
+                    "message": f"job ended with status {state.current_state}, error: {state.error}",
+                }
+
+        elif state.current_state != self.goal_state:
+            return None
+
+        took = state.state_transitioned_at - service.created_at
+        self._durations.record(took.total_seconds())
+
+        return {
+            "status": "success",
+            "service_id": self.service_id,
+            "project_id": self.project_id,
+            "state": str(state.current_state),
+            "duration": took.total_seconds(),
+            "url": service.url,
+            "message": f"service {self.service_id} reached goal state {self.goal_state}",
+        }
@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional
+
+from anyscale_provider.triggers.base import AnyscaleBaseTrigger
+
+
+class AnyscaleSessionCommandTrigger(AnyscaleBaseTrigger):
+
+    resource_kind = "session_command"
+
+    def __init__(
+        self,
+        *,
+        session_command_id: str,
+        session_id: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.session_command_id = session_command_id
+        self.session_id = session_id
+
+    def _serialize_kwargs(self) -> Dict[str, Any]:
+        return {
+            "session_command_id": self.session_command_id,
+            "session_id": self.session_id,
+        }
+
+    def _resource_id(self) -> str:
+        return self.session_command_id
+
+    def _batch_scope(self) -> Optional[str]:
+        return self.session_id
+
+    def _fetch(self):
+        return self.sdk.get_session_command(self.session_command_id).result
+
+    def _evaluate(self, session_command) -> Optional[Dict[str, Any]]:
+        status_code = session_command.status_code
+        self._observe_run(session_command)
+        self._record_poll()
+
+        if status_code is None:
+            return None
+
+        took = session_command.finished_at - session_command.created_at
+
+        if status_code == 0:
+            self._durations.record(took.total_seconds())
+
+        return {
+            "status": "success" if status_code == 0 else "error",
+            "session_command_id": self.session_command_id,
+            "status_code": status_code,
+            "duration": took.total_seconds(),
+            "message": (
+                f"session command {self.session_command_id} ended "
+                f"with status code {status_code}"
+            ),
+        }
@@ -1 +1,13 @@
-from .utils import push_to_xcom
\ No newline at end of file
+from .utils import push_to_xcom, percentile, XCOM_MODE_KEYS, XCOM_MODE_PAYLOAD
+from .poll_policy import PollPolicy, DEFAULT_POLL_POLICY, CLUSTER_POLL_POLICY
+from .logs import LogTailer, DEFAULT_MAX_LOG_BYTES
+from .cache import TTLCache
+from .pagination import paginate
+from .rate_limit import TokenBucket
+from .readiness import ReadinessProbe
+from .log_export import LogExport, LogStorage, LocalLogStorage, ObjectStorageLogStorage
+from .failures import (
+    AnyscaleJobFailed, AnyscaleInfrastructureFailure, AnyscaleJobStopped, AnyscaleUserCodeFailure,
+    classify_failure)
+from . import state_store
+from . import metrics
@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class _DiskCache:
+    """Sqlite backed layer, shared by every process pointing at the same file."""
+
+    def __init__(self, path: str, maxsize: int):
+        self.path = path
+        self.maxsize = maxsize
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+
+        if row is None or row[1] <= time.time():
+            return None
+
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            db.execute(
+                "DELETE FROM cache WHERE key NOT IN "
+                "(SELECT key FROM cache ORDER BY expires_at DESC LIMIT ?)",
+                (self.maxsize,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM cache")
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    When ``path`` is set, entries are also written to a sqlite file so that
+    the other processes of the worker can reuse them. Values must be json
+    serializable.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskCache(path, maxsize) if path else None
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    return entry[1]
+
+                del self._data[key]
+
+        if self._disk is None:
+            return None
+
+        entry = self._disk.get(key)
+        if entry is None:
+            return None
+
+        self._store(key, entry[0], entry[1])
+        return entry[1]
+
+    def _store(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        self._store(key, expires_at, value)
+
+        if self._disk is not None:
+            self._disk.set(key, value, expires_at)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+        if self._disk is not None:
+            self._disk.clear()
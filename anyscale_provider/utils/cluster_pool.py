@@ -0,0 +1,169 @@
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from anyscale_provider.utils import state_store
+
+
+class AnyscaleClusterPool(LoggingMixin):
+    """
+    Pool of warm clusters shared by the DAG runs using the same ``name``.
+
+    Pool clusters are named ``<name>-<suffix>``. A cluster is leased by
+    inserting a unique lease record in the metadata database, so two runs
+    can never hold the same cluster. A lease taken with a ``lease_ttl``
+    expires unless renewed, after which the cluster can be leased again or
+    reclaimed: a run that died never holds its cluster forever. Released
+    clusters stay up for ``idle_ttl`` seconds, after which ``reclaim_idle``
+    terminates them.
+    """
+
+    def __init__(self, hook, name: str):
+        super().__init__()
+        self.hook = hook
+        self.name = name
+
+    def _lease_prefix(self) -> str:
+        return f"anyscale_pool__{state_store.key_part(self.name)}__lease__"
+
+    def _lease_key(self, cluster_id: str) -> str:
+        return f"{self._lease_prefix()}{cluster_id}"
+
+    def _idle_prefix(self) -> str:
+        return f"anyscale_pool__{state_store.key_part(self.name)}__idle__"
+
+    def _idle_key(self, cluster_id: str) -> str:
+        return f"{self._idle_prefix()}{cluster_id}"
+
+    def _running_clusters(self, project_id: Optional[str]) -> Iterator[Any]:
+        return self.hook.iter_clusters(
+            project_id=project_id, name_contains=self.name, state_filter=["Running"])
+
+    def new_cluster_name(self) -> str:
+        return f"{self.name}-{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def _expired(record: Dict[str, Any], now: float) -> bool:
+        expires_at = record.get("expires_at")
+        return expires_at is not None and expires_at <= now
+
+    def try_lease(self, cluster_id: str, holder: Dict[str, Any], lease_ttl: Optional[float] = None) -> bool:
+        key = self._lease_key(cluster_id)
+        now = time.time()
+
+        lease = dict(holder, leased_at=now, expires_at=now + lease_ttl if lease_ttl else None)
+        leased = state_store.try_insert(key, lease)
+
+        if not leased:
+            current = state_store.get(key)
+
+            if current is not None and self._expired(current, now):
+                # only one of the runs seeing the same expired lease deletes it.
+                leased = state_store.compare_and_delete(key, current) and state_store.try_insert(key, lease)
+
+                if leased:
+                    self.log.warning("lease of cluster %s by %s expired, taken over", cluster_id, current)
+
+        if leased:
+            state_store.delete(self._idle_key(cluster_id))
+
+        return leased
+
+    def renew(self, cluster_id: str, lease_ttl: float) -> bool:
+        """Extends a lease by ``lease_ttl`` seconds, telling whether it was still held."""
+        key = self._lease_key(cluster_id)
+        current = state_store.get(key)
+
+        if current is None or self._expired(current, time.time()):
+            return False
+
+        state_store.put(key, dict(current, expires_at=time.time() + lease_ttl))
+        return True
+
+    def lease_idle(
+        self,
+        project_id: Optional[str],
+        compute_config_id: Optional[str],
+        cluster_environment_build_id: Optional[str],
+        holder: Dict[str, Any],
+        lease_ttl: Optional[float] = None,
+    ) -> Optional[Any]:
+
+        for cluster in self._running_clusters(project_id):
+
+            if not cluster.name.startswith(f"{self.name}-"):
+                continue
+
+            if compute_config_id and cluster.cluster_compute_id != compute_config_id:
+                continue
+
+            if cluster_environment_build_id and \
+                    cluster.cluster_environment_build_id != cluster_environment_build_id:
+                continue
+
+            if self.try_lease(cluster.id, holder, lease_ttl):
+                self.log.info("leased idle cluster %s from pool %s", cluster.id, self.name)
+                return cluster
+
+        return None
+
+    def release(self, cluster_id: str, idle_ttl: float) -> None:
+        state_store.put(self._idle_key(cluster_id), {"expires_at": time.time() + idle_ttl})
+        state_store.delete(self._lease_key(cluster_id))
+
+        self.log.info("cluster %s released to pool %s for %ss", cluster_id, self.name, idle_ttl)
+
+    def _terminate(self, cluster_id: str) -> bool:
+        try:
+            self.hook.sdk.terminate_cluster(
+                cluster_id=cluster_id, terminate_cluster_options={})
+            self.log.info("terminated cluster %s of pool %s", cluster_id, self.name)
+            return True
+
+        except Exception:
+            self.log.exception("failed to terminate cluster %s", cluster_id)
+            return False
+
+        finally:
+            state_store.delete(self._lease_key(cluster_id))
+
+    def reclaim_idle(self) -> List[str]:
+        """Terminates the clusters idle past their TTL, or whose lease expired."""
+        now = time.time()
+        reclaimed = []
+
+        for key, record in state_store.scan(self._idle_prefix()).items():
+
+            if record["expires_at"] > now:
+                continue
+
+            cluster_id = key[len(self._idle_prefix()):]
+
+            # the record seen expired may since have been replaced by a new
+            # release, or taken with a lease: then the cluster is kept.
+            if not state_store.compare_and_delete(key, record):
+                continue
+
+            # take the lease so no run picks the cluster while it terminates.
+            if not self.try_lease(cluster_id, {"reclaim": True}):
+                continue
+
+            if self._terminate(cluster_id):
+                reclaimed.append(cluster_id)
+            else:
+                state_store.put(key, record)
+
+        for key, record in state_store.scan(self._lease_prefix()).items():
+
+            if not self._expired(record, now):
+                continue
+
+            cluster_id = key[len(self._lease_prefix()):]
+
+            # takes the expired lease over, unless it was renewed meanwhile.
+            if self.try_lease(cluster_id, {"reclaim": True}) and self._terminate(cluster_id):
+                reclaimed.append(cluster_id)
+
+        return reclaimed
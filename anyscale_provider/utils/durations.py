@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from airflow.configuration import conf
+
+from anyscale_provider.utils.utils import percentile
+
+# fraction of the expected remaining time to wait before polling again, so
+# that the first poll after the wait lands just before the expected end.
+_EXPECTED_MARGIN = 0.9
+_MIN_SAMPLES = 3
+
+
+def signature(kind: str, *parts: Any) -> str:
+    """Identifies recurring runs of the same workload, e.g. a job's entrypoint and config."""
+    return hashlib.sha1(json.dumps([kind, *parts], default=str).encode()).hexdigest()[:20]
+
+
+def resource_signature(kind: str, resource: Any) -> str:
+    if kind == "session_command":
+        return signature(kind, resource.shell_command)
+
+    config = resource.config
+    return signature(
+        kind, resource.name, config.entrypoint, config.compute_config_id, config.build_id)
+
+
+class DurationStore:
+    """
+    Durations of the runs that finished, by signature, kept in a sqlite file.
+
+    Only the last ``max_samples`` durations of each signature are kept.
+    """
+
+    def __init__(self, path: str, max_samples: int = 50):
+        self.path = path
+        self.max_samples = max_samples
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS durations "
+                "(signature TEXT NOT NULL, seconds REAL NOT NULL, finished_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS durations_signature "
+                "ON durations (signature, finished_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def record(self, signature: str, seconds: float) -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO durations (signature, seconds, finished_at) VALUES (?, ?, ?)",
+                (signature, seconds, time.time()),
+            )
+            db.execute(
+                "DELETE FROM durations WHERE signature = ? AND rowid NOT IN "
+                "(SELECT rowid FROM durations WHERE signature = ? "
+                "ORDER BY finished_at DESC LIMIT ?)",
+                (signature, signature, self.max_samples),
+            )
+
+    def samples(self, signature: str) -> List[float]:
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT seconds FROM durations WHERE signature = ?", (signature,)).fetchall()
+
+        return [row[0] for row in rows]
+
+
+_duration_store: Optional[DurationStore] = None
+_duration_store_lock = threading.Lock()
+
+
+def get_duration_store() -> Optional[DurationStore]:
+    """
+    The store shared by the process, or ``None`` unless ``[anyscale] duration_store``
+    is turned on: the history is only worth keeping for recurring runs.
+    """
+    global _duration_store
+
+    if not conf.getboolean("anyscale", "duration_store", fallback=False):
+        return None
+
+    with _duration_store_lock:
+        if _duration_store is None:
+            path = conf.get("anyscale", "duration_store_path", fallback=None) or os.path.join(
+                tempfile.gettempdir(), "anyscale-durations.sqlite")
+
+            _duration_store = DurationStore(
+                path,
+                max_samples=conf.getint("anyscale", "duration_store_samples", fallback=50),
+            )
+
+    return _duration_store
+
+
+class DurationTracker:
+    """
+    Follows one run against the history of its signature.
+
+    Once the run is observed, ``delay_until_expected`` tells how long it is
+    worth waiting before the run is expected to finish, and ``is_slow`` turns
+    true (once) when the run goes past the historical p95.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.signature: Optional[str] = None
+        self.created_at: Optional[datetime] = None
+        self.expected: Optional[float] = None
+        self.p95: Optional[float] = None
+        self._flagged = False
+
+    def observe(self, signature: str, created_at: Optional[datetime]) -> None:
+        if self.signature is not None:
+            return
+
+        self.signature = signature
+        self.created_at = created_at
+
+        store = get_duration_store()
+        if store is None:
+            return
+
+        try:
+            samples = store.samples(signature)
+        except sqlite3.Error:
+            return
+
+        if len(samples) >= _MIN_SAMPLES:
+            self.expected = percentile(samples, 50)
+            self.p95 = percentile(samples, 95)
+
+    def elapsed(self) -> Optional[float]:
+        if self.created_at is None:
+            return None
+
+        created_at = self.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+
+        return (datetime.now(timezone.utc) - created_at).total_seconds()
+
+    def delay_until_expected(self) -> Optional[float]:
+        elapsed = self.elapsed()
+
+        if self.expected is None or elapsed is None:
+            return None
+
+        remaining = self.expected - elapsed
+        if remaining <= 0:
+            return None
+
+        return remaining * _EXPECTED_MARGIN
+
+    def is_slow(self) -> bool:
+        elapsed = self.elapsed()
+
+        if self._flagged or self.p95 is None or elapsed is None or elapsed <= self.p95:
+            return False
+
+        self._flagged = True
+        return True
+
+    def record(self, seconds: float) -> None:
+        store = get_duration_store()
+
+        if store is None or self.signature is None:
+            return
+
+        try:
+            store.record(self.signature, seconds)
+        except sqlite3.Error:
+            pass
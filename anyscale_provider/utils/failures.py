@@ -0,0 +1,135 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from airflow.exceptions import AirflowException, AirflowFailException
+
+PREEMPTION = "preemption"
+CAPACITY = "capacity"
+USER_ERROR = "user_error"
+# terminated on purpose: by a teardown, a killed task or a user.
+STOPPED = "stopped"
+UNKNOWN = "unknown"
+
+INFRASTRUCTURE_FAILURES = (PREEMPTION, CAPACITY)
+
+# what is read of the end of the log to classify a failure.
+TAIL_BYTES = 64 * 1024
+
+# checked in this order: a job killed by the loss of its nodes usually ends
+# with the traceback of the code that was interrupted.
+DEFAULT_PATTERNS: Dict[str, List[str]] = {
+    PREEMPTION: [
+        r"\bpreempted\b|\bpreemption (notice|event)\b",
+        r"spot (instance|node)s? (was |were |has been |have been )?(interrupt|terminat|reclaim)",
+        r"(terminated|reclaimed) by the cloud provider",
+        r"instance[- ]interruption",
+        r"node .{0,80}(has been marked dead|died unexpectedly)",
+        r"NodeDiedError",
+    ],
+    CAPACITY: [
+        r"insufficient.?(instance.?)?capacity",
+        r"ZONE_RESOURCE_POOL_EXHAUSTED",
+        r"capacity (is )?(not available|unavailable|exhausted)",
+        r"quota exceeded|exceeded .{0,40}quota",
+        r"(could not|unable to|failed to) (launch|provision|acquire|allocate) .{0,40}(instance|node|resource)",
+        r"head node (failed to start|startup timed out)",
+    ],
+    # only failures that running the job again can not fix: a traceback or an
+    # exit code alone may just as well come from a transient error.
+    USER_ERROR: [
+        r"\b(ModuleNotFoundError|ImportError|SyntaxError|IndentationError)\b",
+        r"can't open file",
+        r"command not found",
+        r"(entrypoint|command) (failed|exited) with (exit )?code (2|126|127)\b",
+    ],
+}
+
+
+class AnyscaleJobFailed(AirflowException):
+    """A production job ended in a failed state, see :func:`classify_failure`."""
+
+    failure_class = UNKNOWN
+
+    def __init__(self, message: str, production_job_id: Optional[str] = None):
+        super().__init__(message)
+        self.production_job_id = production_job_id
+
+
+class AnyscaleInfrastructureFailure(AnyscaleJobFailed):
+    """The job was lost to the infrastructure and may succeed if submitted again."""
+
+    def __init__(self, message: str, production_job_id: Optional[str] = None,
+                 failure_class: str = PREEMPTION):
+        super().__init__(message, production_job_id)
+        self.failure_class = failure_class
+
+
+class AnyscaleJobStopped(AnyscaleJobFailed):
+    """The job was terminated on purpose and is never submitted again."""
+
+    failure_class = STOPPED
+
+
+class AnyscaleUserCodeFailure(AnyscaleJobFailed, AirflowFailException):
+    """The job's own code failed: the task fails at once, without retries."""
+
+    failure_class = USER_ERROR
+
+
+def _compile(patterns: Optional[Dict[str, Sequence[str]]]) -> Dict[str, "re.Pattern"]:
+    merged = {failure_class: list(expressions) for failure_class, expressions in DEFAULT_PATTERNS.items()}
+
+    for failure_class, expressions in (patterns or {}).items():
+        merged.setdefault(failure_class, []).extend(expressions)
+
+    return {
+        failure_class: re.compile("|".join(f"(?:{expression})" for expression in expressions), re.IGNORECASE)
+        for failure_class, expressions in merged.items()
+        if expressions
+    }
+
+
+def classify_failure(
+    error: Optional[str],
+    log_tail: Optional[str] = None,
+    patterns: Optional[Dict[str, Sequence[str]]] = None,
+) -> str:
+    """
+    Tells why a job failed from its error message and the end of its log:
+    ``PREEMPTION``, ``CAPACITY``, ``USER_ERROR`` or ``UNKNOWN``. ``patterns``
+    adds regular expressions to the defaults of each class.
+    """
+
+    text = "\n".join(part for part in (error, log_tail) if part)
+
+    for failure_class, pattern in _compile(patterns).items():
+        if pattern.search(text):
+            return failure_class
+
+    return UNKNOWN
+
+
+def job_failure(failure_class: str, message: str, production_job_id: Optional[str] = None) -> AnyscaleJobFailed:
+    """The exception to raise for a failure of ``failure_class``."""
+
+    if failure_class in INFRASTRUCTURE_FAILURES:
+        return AnyscaleInfrastructureFailure(message, production_job_id, failure_class)
+
+    if failure_class == USER_ERROR:
+        return AnyscaleUserCodeFailure(message, production_job_id)
+
+    if failure_class == STOPPED:
+        return AnyscaleJobStopped(message, production_job_id)
+
+    return AnyscaleJobFailed(message, production_job_id)
+
+
+def read_tail(chunks: Iterable[bytes], max_bytes: int = TAIL_BYTES) -> str:
+    """The last ``max_bytes`` of a log received in chunks."""
+
+    tail = b""
+
+    for chunk in chunks:
+        tail = (tail + chunk)[-max_bytes:]
+
+    return tail.decode("utf-8", errors="replace")
@@ -0,0 +1,269 @@
+import codecs
+import gzip
+import json
+import os
+import re
+from typing import Any, BinaryIO, Iterable, Iterator, List, NamedTuple, Optional
+
+from airflow.exceptions import AirflowException
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_EXPORT_BYTES = 1024 * 1024 * 1024
+
+_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# what is kept of the end of the log for the summary written to the task log.
+_TAIL_BYTES = 64 * 1024
+
+_LOGS_KEY = re.compile(r'"logs"\s*:\s*"')
+_SPECIAL = re.compile(r'["\\]')
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+class LogStorage:
+    """Where exported logs are written. Subclasses implement ``open`` and ``uri``."""
+
+    def open(self, path: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def uri(self, path: str) -> str:
+        raise NotImplementedError
+
+
+class LocalLogStorage(LogStorage):
+    """Writes logs under ``directory``, on the filesystem of the worker."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def open(self, path: str) -> BinaryIO:
+        full_path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return open(full_path, "wb")
+
+    def uri(self, path: str) -> str:
+        return os.path.abspath(os.path.join(self.directory, path))
+
+
+class ObjectStorageLogStorage(LogStorage):
+    """
+    Writes logs to an object store through Airflow's ``ObjectStoragePath``
+    (Airflow 2.8+), e.g. ``ObjectStorageLogStorage("s3://bucket/anyscale", conn_id="aws")``.
+    """
+
+    def __init__(self, base: str, conn_id: Optional[str] = None):
+        self.base = base
+        self.conn_id = conn_id
+
+    def _path(self, path: str) -> Any:
+        try:
+            from airflow.io.path import ObjectStoragePath
+        except ImportError:
+            raise AirflowException("ObjectStorageLogStorage needs apache-airflow>=2.8")
+
+        return ObjectStoragePath(self.base, conn_id=self.conn_id) / path
+
+    def open(self, path: str) -> BinaryIO:
+        return self._path(path).open("wb")
+
+    def uri(self, path: str) -> str:
+        return f"{self.base.rstrip('/')}/{path}"
+
+
+class LogExportSummary(NamedTuple):
+    uri: str
+    bytes: int
+    compressed_bytes: int
+    lines: int
+    truncated: bool
+    tail: List[str]
+
+
+class _CountingWriter:
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.written += len(data)
+        return self.f.write(data)
+
+    def flush(self) -> None:
+        self.f.flush()
+
+
+def iter_json_string(chunks: Iterable[bytes], pattern: "re.Pattern" = _LOGS_KEY) -> Iterator[str]:
+    """
+    Decodes the string value that follows ``pattern`` in a JSON document
+    received in chunks, yielding it piece by piece instead of loading the
+    whole document.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+
+        if not started:
+            match = pattern.search(buffer)
+
+            if match is None:
+                # keep enough to match a key split across two chunks.
+                buffer = buffer[-64:]
+                continue
+
+            buffer = buffer[match.end():]
+            started = True
+
+        position = 0
+        while True:
+            match = _SPECIAL.search(buffer, position)
+
+            if match is None:
+                safe = len(buffer)
+                break
+
+            if match.group() == '"':
+                if match.start():
+                    yield json.loads(f'"{buffer[:match.start()]}"', strict=False)
+                return
+
+            escape_length = 6 if buffer[match.start() + 1:match.start() + 2] == "u" else 2
+            if match.start() + escape_length > len(buffer):
+                safe = match.start()
+                break
+
+            position = match.start() + escape_length
+
+        # a surrogate pair must be decoded in one piece; an odd number of
+        # backslashes before the match means it is an escaped backslash.
+        surrogate = _HIGH_SURROGATE.search(buffer, 0, safe)
+        if surrogate is not None:
+            start = surrogate.start()
+            backslashes = start - len(buffer[:start].rstrip("\\"))
+
+            if backslashes % 2 == 0:
+                safe = start
+
+        if safe:
+            yield json.loads(f'"{buffer[:safe]}"', strict=False)
+            buffer = buffer[safe:]
+
+    if started:
+        raise AirflowException("log response ended in the middle of the logs")
+
+
+class LogExport(LoggingMixin):
+    """
+    Exports logs to a :class:`LogStorage` instead of the task log.
+
+    Logs are read and written ``chunk_size`` bytes at a time and compressed
+    on the fly with ``gzip``, ``zstd`` (needs the ``zstandard`` package) or
+    not at all, so memory use does not depend on the size of the log. The
+    export stops after ``max_bytes`` of uncompressed log. Only a summary,
+    the last ``summary_lines`` lines and where the log went are written to
+    the task log.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[LogStorage] = None,
+        directory: Optional[str] = None,
+        compression: Optional[str] = "gzip",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_bytes: Optional[int] = DEFAULT_MAX_EXPORT_BYTES,
+        summary_lines: int = 20,
+    ):
+        super().__init__()
+
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"compression must be one of {list(_EXTENSIONS)}")
+
+        if storage is None:
+            if directory is None:
+                raise ValueError("either storage or directory must be provided")
+
+            storage = LocalLogStorage(directory)
+
+        self.storage = storage
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.summary_lines = summary_lines
+
+    def _compressor(self, f: BinaryIO) -> Any:
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=f, mode="wb")
+
+        if self.compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise AirflowException("zstd compression needs the zstandard package")
+
+            return zstandard.ZstdCompressor().stream_writer(f, closefd=False)
+
+        return None
+
+    def path(self, *parts: Any) -> str:
+        return "/".join(str(part) for part in parts) + ".log" + _EXTENSIONS[self.compression]
+
+    def export(self, path: str, chunks: Iterable[bytes]) -> LogExportSummary:
+        size = 0
+        lines = 0
+        truncated = False
+        tail = b""
+
+        with self.storage.open(path) as f:
+            counter = _CountingWriter(f)
+            compressor = self._compressor(counter)
+            writer = compressor or counter
+
+            for chunk in chunks:
+                if self.max_bytes is not None and size + len(chunk) > self.max_bytes:
+                    chunk = chunk[:self.max_bytes - size]
+                    truncated = True
+
+                writer.write(chunk)
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+                tail = (tail + chunk)[-_TAIL_BYTES:]
+
+                if truncated:
+                    writer.write(f"\n[truncated after {size} bytes]\n".encode())
+                    break
+
+            if compressor is not None:
+                compressor.close()
+
+        if tail and not tail.endswith(b"\n"):
+            lines += 1
+
+        last_lines = tail.decode("utf-8", errors="replace").splitlines()[-self.summary_lines:]
+
+        return LogExportSummary(
+            uri=self.storage.uri(path),
+            bytes=size,
+            compressed_bytes=counter.written,
+            lines=lines,
+            truncated=truncated,
+            tail=last_lines if self.summary_lines else [],
+        )
+
+    def log_summary(self, what: str, summary: LogExportSummary) -> None:
+        self.log.info(
+            "%s: %s lines, %s bytes%s exported to %s (%s bytes written)",
+            what,
+            summary.lines,
+            summary.bytes,
+            " (truncated)" if summary.truncated else "",
+            summary.uri,
+            summary.compressed_bytes,
+        )
+
+        if summary.tail:
+            self.log.info("last %s lines:\n%s", len(summary.tail), "\n".join(summary.tail))
@@ -0,0 +1,60 @@
+from collections import deque
+from typing import Deque, Iterator, List
+
+DEFAULT_MAX_LOG_BYTES = 1024 * 1024
+
+
+class LogTailer:
+    """
+    Turns successive snapshots of a growing log into the lines not seen yet.
+
+    Only an offset into the log, the trailing partial line and the last
+    ``max_bytes`` worth of lines are kept between calls, whatever the size
+    of the log.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_LOG_BYTES):
+        self.max_bytes = max_bytes
+        self.offset = 0
+
+        self._partial = ""
+        self._tail: Deque[str] = deque()
+        self._tail_bytes = 0
+
+    def _remember(self, line: str) -> None:
+        self._tail.append(line)
+        self._tail_bytes += len(line) + 1
+
+        while self._tail and self._tail_bytes > self.max_bytes:
+            self._tail_bytes -= len(self._tail.popleft()) + 1
+
+    def feed(self, logs: str) -> Iterator[str]:
+
+        if len(logs) < self.offset:
+            # the log shrank, which means a new job run started from scratch.
+            self.offset = 0
+            self._partial = ""
+
+        chunk = logs[self.offset:]
+        self.offset = len(logs)
+
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+
+        if len(self._partial) > self.max_bytes:
+            lines.append(self._partial)
+            self._partial = ""
+
+        for line in lines:
+            self._remember(line)
+            yield line
+
+    def flush(self) -> Iterator[str]:
+        if self._partial:
+            line, self._partial = self._partial, ""
+            self._remember(line)
+            yield line
+
+    @property
+    def tail(self) -> List[str]:
+        return list(self._tail)
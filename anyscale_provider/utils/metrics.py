@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from airflow.configuration import conf
+from airflow.stats import Stats
+
+PREFIX = "anyscale"
+
+_INVALID_CHARS = re.compile(r"[^A-Za-z0-9_\-]")
+
+_instruments: Dict[str, Any] = {}
+_instruments_lock = threading.Lock()
+
+
+def _stat(*parts: Any) -> str:
+    return ".".join([PREFIX] + [_INVALID_CHARS.sub("_", str(part)) for part in parts])
+
+
+def _otel_enabled() -> bool:
+    if not conf.getboolean("anyscale", "otel_metrics", fallback=False):
+        return False
+
+    try:
+        import opentelemetry.metrics  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def _instrument(kind: str, name: str, unit: str) -> Any:
+    # imported here so that parsing dags never loads opentelemetry.
+    from opentelemetry import metrics as otel_metrics
+
+    with _instruments_lock:
+        instrument = _instruments.get(name)
+
+        if instrument is None:
+            meter = otel_metrics.get_meter("anyscale_provider")
+
+            if kind == "histogram":
+                instrument = meter.create_histogram(name, unit=unit)
+            else:
+                instrument = meter.create_counter(name, unit=unit)
+
+            _instruments[name] = instrument
+
+    return instrument
+
+
+def _timing(name: str, seconds: float, attributes: Dict[str, str], *parts: Any) -> None:
+    Stats.timing(_stat(*parts), timedelta(seconds=seconds), tags=attributes)
+
+    if _otel_enabled():
+        _instrument("histogram", f"{PREFIX}.{name}", "s").record(seconds, attributes)
+
+
+def _incr(name: str, attributes: Dict[str, str], *parts: Any) -> None:
+    Stats.incr(_stat(*parts), tags=attributes)
+
+    if _otel_enabled():
+        _instrument("counter", f"{PREFIX}.{name}", "1").add(1, attributes)
+
+
+def record_api_call(endpoint: str, seconds: float, status: Optional[Any] = None) -> None:
+    """Records the latency of an SDK call and, when it failed, its error status."""
+
+    _timing("api.duration", seconds, {"endpoint": endpoint}, "api", endpoint, "duration")
+
+    if status is not None:
+        _incr("api.errors", {"endpoint": endpoint, "status": str(status)},
+              "api", endpoint, "errors", status)
+
+
+def record_api_retry(endpoint: str) -> None:
+    _incr("api.retries", {"endpoint": endpoint}, "api", endpoint, "retries")
+
+
+def record_api_rejected(endpoint: str) -> None:
+    """Records a call not made because the circuit breaker is open."""
+
+    _incr("api.rejected", {"endpoint": endpoint}, "api", endpoint, "rejected")
+
+
+def record_poll(kind: str, dag_id: Optional[str] = None, task_id: Optional[str] = None) -> None:
+    attributes = {"kind": kind}
+
+    # only tagged: in the name, every task would add new statsd series.
+    if dag_id and task_id:
+        attributes.update(dag_id=dag_id, task_id=task_id)
+
+    _incr("polls", attributes, kind, "polls")
+
+
+def record_state_duration(kind: str, state: str, seconds: float) -> None:
+    _timing("state.duration", seconds, {"kind": kind, "state": state},
+            kind, "state", state, "duration")
+
+
+def record_duration(kind: str, seconds: float) -> None:
+    """Records how long a resource took from creation to its final state."""
+
+    _timing("duration", seconds, {"kind": kind}, kind, "duration")
+
+
+def record_slow_run(kind: str) -> None:
+    _incr("slow_runs", {"kind": kind}, kind, "slow_runs")
+
+
+def record_failure(kind: str, failure_class: str) -> None:
+    _incr("failures", {"kind": kind, "class": failure_class}, kind, "failures", failure_class)
+
+
+def record_resubmission(kind: str, failure_class: str) -> None:
+    _incr("resubmissions", {"kind": kind, "class": failure_class},
+          kind, "resubmissions", failure_class)
+
+
+def record_probe(seconds: float, ok: bool) -> None:
+    _timing("service.probe.duration", seconds, {}, "service", "probe", "duration")
+
+    if not ok:
+        _incr("service.probe.failures", {}, "service", "probe", "failures")
+
+
+class StateTimer:
+    """
+    Measures the time a resource spends in each state it is seen in.
+
+    The time spent in a state is recorded when a different state is observed,
+    so it is only as precise as the poll interval.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.state: Optional[str] = None
+        self.since: Optional[float] = None
+
+    def observe(self, state: Optional[Any]) -> None:
+        if state is None:
+            return
+
+        state = str(state)
+        now = time.monotonic()
+
+        if state == self.state:
+            return
+
+        if self.state is not None:
+            record_state_duration(self.kind, self.state, now - self.since)
+
+        self.state = state
+        self.since = now
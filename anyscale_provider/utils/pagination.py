@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+
+# (paging_token) -> response with ``results`` and ``metadata.next_paging_token``.
+FetchPage = Callable[[Optional[str]], Any]
+
+
+def paginate(fetch_page: FetchPage, prefetch: bool = True) -> Iterator[Any]:
+    """
+    Yields the results of every page of a list endpoint, one page in memory at a time.
+
+    With ``prefetch``, the next page is requested in the background as soon
+    as the current one is received, so that its latency overlaps with the
+    time the caller spends on the current page. Closing the generator early
+    does not wait for the page being prefetched.
+    """
+
+    if not prefetch:
+        paging_token = None
+
+        while True:
+            response = fetch_page(paging_token)
+
+            yield from response.results
+
+            paging_token = response.metadata.next_paging_token
+            if paging_token is None:
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anyscale-prefetch")
+
+    try:
+        response = fetch_page(None)
+
+        while True:
+            paging_token = response.metadata.next_paging_token
+            next_page = None if paging_token is None else executor.submit(fetch_page, paging_token)
+
+            results, response = response.results, None
+            yield from results
+
+            if next_page is None:
+                return
+
+            response = next_page.result()
+
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,77 @@
+import random
+from typing import Any, Dict, Optional
+
+
+class PollPolicy:
+    """
+    Decides how long to wait between two polls of an Anyscale resource.
+
+    The delay starts at ``initial_delay`` and grows by ``multiplier`` on every
+    attempt up to ``max_delay``. ``state_delays`` pins the delay for specific
+    resource states (e.g. poll faster while a cluster is starting up), and
+    ``jitter`` spreads the delay by +/- that fraction so tasks started together
+    do not keep polling in lockstep.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 5,
+        multiplier: float = 2,
+        max_delay: float = 60,
+        jitter: float = 0.1,
+        state_delays: Optional[Dict[str, float]] = None,
+    ):
+        if initial_delay <= 0 or max_delay < initial_delay:
+            raise ValueError("expected 0 < initial_delay <= max_delay")
+
+        if multiplier < 1:
+            raise ValueError("multiplier must be >= 1")
+
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state_delays = state_delays or {}
+
+    def next_delay(self, attempt: int, state: Optional[str] = None) -> float:
+
+        if state is not None and str(state) in self.state_delays:
+            delay = self.state_delays[str(state)]
+        else:
+            delay = min(self.initial_delay * self.multiplier ** attempt, self.max_delay)
+
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+
+        return delay
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "initial_delay": self.initial_delay,
+            "multiplier": self.multiplier,
+            "max_delay": self.max_delay,
+            "jitter": self.jitter,
+            "state_delays": dict(self.state_delays),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PollPolicy":
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+DEFAULT_POLL_POLICY = PollPolicy()
+
+CLUSTER_POLL_POLICY = PollPolicy(
+    state_delays={
+        "AwaitingStartup": 10,
+        "StartingUp": 10,
+        "Updating": 10,
+        "Terminating": 10,
+    },
+)
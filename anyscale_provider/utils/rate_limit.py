@@ -0,0 +1,83 @@
+import fcntl
+import struct
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second, holding up to
+    ``capacity`` tokens.
+
+    With ``path`` set, the bucket state lives in that file and is guarded by
+    an exclusive ``flock``, so every process of the host draws from the same
+    bucket. ``acquire`` blocks until a token is available rather than
+    failing, which smooths bursts such as many sensors waking up together.
+    """
+
+    _STATE = struct.Struct("dd")
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, path: Optional[str] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.path = path
+
+        self._tokens = self.capacity
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, updated_at: float) -> Tuple[float, float, float]:
+        now = time.time()
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+
+        return tokens, now, (1 - tokens) / self.rate
+
+    def _try_acquire_local(self) -> float:
+        with self._lock:
+            self._tokens, self._updated_at, wait = self._take(self._tokens, self._updated_at)
+
+        return wait
+
+    def _try_acquire_shared(self) -> float:
+        with self._lock, open(self.path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+            try:
+                f.seek(0)
+                data = f.read(self._STATE.size)
+
+                if len(data) == self._STATE.size:
+                    tokens, updated_at = self._STATE.unpack(data)
+                else:
+                    tokens, updated_at = self.capacity, time.time()
+
+                tokens, updated_at, wait = self._take(tokens, updated_at)
+
+                f.seek(0)
+                f.truncate()
+                f.write(self._STATE.pack(tokens, updated_at))
+                f.flush()
+
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        return wait
+
+    def acquire(self) -> None:
+        while True:
+            if self.path is None:
+                wait = self._try_acquire_local()
+            else:
+                wait = self._try_acquire_shared()
+
+            if wait <= 0:
+                return
+
+            time.sleep(wait)
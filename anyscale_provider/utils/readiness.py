@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from airflow.exceptions import AirflowException
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from anyscale_provider.utils import metrics
+from anyscale_provider.utils.utils import percentile
+
+_KEPT_LATENCIES = 100
+
+
+class ReadinessProbe(LoggingMixin):
+    """
+    Decides when a running service is ready to take traffic.
+
+    The healthcheck endpoint is probed in rounds of ``concurrency`` requests
+    sent at once, ``interval`` seconds apart. The service is ready once
+    ``successes`` probes in a row answered with a non error status within
+    ``max_latency`` seconds; any slow or failed probe starts the count over.
+    Gives up after ``timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        successes: int = 5,
+        max_latency: float = 1.0,
+        concurrency: int = 4,
+        interval: float = 2.0,
+        timeout: float = 600,
+        request_timeout: float = 10,
+    ):
+        super().__init__()
+
+        if successes < 1 or concurrency < 1:
+            raise ValueError("successes and concurrency must be >= 1")
+
+        if max_latency <= 0 or request_timeout <= 0:
+            raise ValueError("max_latency and request_timeout must be > 0")
+
+        self.successes = successes
+        self.max_latency = max_latency
+        self.concurrency = concurrency
+        self.interval = interval
+        self.timeout = timeout
+        self.request_timeout = request_timeout
+
+    async def _probe(self, session: Any, url: str, headers: Dict[str, str]) -> Tuple[bool, float]:
+        import aiohttp
+
+        started_at = time.monotonic()
+
+        try:
+            async with session.get(url, headers=headers) as response:
+                await response.read()
+                ok = response.status < 400
+
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+
+        latency = time.monotonic() - started_at
+        metrics.record_probe(latency, ok)
+
+        return ok and latency <= self.max_latency, latency
+
+    async def wait(self, url: str, token: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            import aiohttp
+        except ImportError:
+            raise AirflowException(
+                "aiohttp is required to probe service readiness, "
+                "install airflow-provider-anyscale[readiness]")
+
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+
+        latencies: List[float] = []
+        probes = 0
+        consecutive = 0
+        deadline = time.monotonic() + self.timeout
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                results = await asyncio.gather(*[
+                    self._probe(session, url, headers) for _ in range(self.concurrency)
+                ])
+
+                for ok, latency in results:
+                    probes += 1
+                    latencies.append(latency)
+                    consecutive = consecutive + 1 if ok else 0
+
+                latencies = latencies[-_KEPT_LATENCIES:]
+
+                self.log.info(
+                    "%s consecutive healthy probes out of %s, last round p50 %.3fs",
+                    consecutive, self.successes,
+                    percentile([latency for _, latency in results], 50))
+
+                if consecutive >= self.successes:
+                    break
+
+                if time.monotonic() >= deadline:
+                    raise AirflowException(
+                        f"service at {url} was not ready after {self.timeout}s "
+                        f"({probes} probes, p95 latency {percentile(latencies, 95):.3f}s)")
+
+                await asyncio.sleep(self.interval)
+
+        return {
+            "probes": probes,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "max": max(latencies),
+            "latencies": latencies,
+        }
+
+    def run(self, url: str, token: Optional[str] = None) -> Dict[str, Any]:
+        return asyncio.run(self.wait(url, token))
@@ -0,0 +1,304 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from airflow.exceptions import AirflowException
+from airflow.utils.context import Context
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from anyscale_provider.utils import state_store
+
+_STOPPED_JOB_STATES = ("TERMINATED", "SUCCESS", "ERRORED", "OUT_OF_RETRIES", "BROKEN")
+_STOPPED_SERVICE_STATES = ("TERMINATED", "ERRORED", "OUT_OF_RETRIES", "BROKEN")
+
+_TERMINATE: Dict[str, Callable[[Any, str], Any]] = {
+    "cluster": lambda sdk, resource_id: sdk.terminate_cluster(
+        cluster_id=resource_id, terminate_cluster_options={}),
+    "production_job": lambda sdk, resource_id: sdk.terminate_job(
+        production_job_id=resource_id),
+    "service": lambda sdk, resource_id: sdk.terminate_service(service_id=resource_id),
+    "session_command": lambda sdk, resource_id: sdk.kill_session_command(
+        session_command_id=resource_id),
+}
+
+_GET: Dict[str, Callable[[Any, str], Any]] = {
+    "cluster": lambda sdk, resource_id: sdk.get_cluster(resource_id).result,
+    "production_job": lambda sdk, resource_id: sdk.get_production_job(
+        production_job_id=resource_id).result,
+    "service": lambda sdk, resource_id: sdk.get_service(service_id=resource_id).result,
+    "session_command": lambda sdk, resource_id: sdk.get_session_command(resource_id).result,
+}
+
+
+def _is_stopped(kind: str, resource: Any) -> bool:
+    if resource is None:
+        return True
+
+    if kind == "cluster":
+        return str(resource.state) == "Terminated"
+
+    if kind == "production_job":
+        return str(resource.state.current_state) in _STOPPED_JOB_STATES
+
+    if kind == "service":
+        return str(resource.state.current_state) in _STOPPED_SERVICE_STATES
+
+    return resource.status_code is not None
+
+
+def _get_or_none(sdk: Any, kind: str, resource_id: str) -> Optional[Any]:
+    from anyscale.sdk.anyscale_client.rest import ApiException
+
+    try:
+        return _GET[kind](sdk, resource_id)
+
+    except ApiException as e:
+        if e.status != 404:
+            raise
+
+        return None
+
+
+def stop_resources(
+    hook,
+    resources: List[Tuple[str, str]],
+    max_concurrency: int = 8,
+    timeout: float = 0,
+    poll_interval: float = 5,
+) -> List[Tuple[str, str]]:
+    """
+    Terminates ``(kind, id)`` resources, ``max_concurrency`` at a time, then
+    waits up to ``timeout`` seconds for them to stop. Returns the resources
+    not known to be stopped.
+    """
+
+    def stop(resource: Tuple[str, str]) -> bool:
+        kind, resource_id = resource
+
+        try:
+            if _is_stopped(kind, _get_or_none(hook.sdk, kind, resource_id)):
+                return True
+
+            _TERMINATE[kind](hook.sdk, resource_id)
+            hook.log.info("terminating %s %s", kind, resource_id)
+
+        except Exception as e:
+            hook.log.warning("failed to terminate %s %s: %s", kind, resource_id, e)
+
+        return False
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = [
+            resource for resource, stopped in zip(resources, executor.map(stop, resources))
+            if not stopped
+        ]
+
+    deadline = time.monotonic() + timeout
+
+    while pending and time.monotonic() < deadline:
+        time.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
+
+        pending = [
+            (kind, resource_id) for kind, resource_id in pending
+            if not _is_stopped(kind, _get_or_none(hook.sdk, kind, resource_id))
+        ]
+
+    return pending
+
+
+class AnyscaleRunRegistry(LoggingMixin):
+    """
+    Anyscale resources created by a DAG run that still have to be stopped.
+
+    Operators register the clusters, services, jobs and session commands they
+    create, and unregister them once they are known to be stopped. Whatever
+    is left when the run ends is stopped by :meth:`teardown`: all resources
+    are terminated at once, ``max_concurrency`` calls at a time, and awaited
+    by a single loop that lists each project once per tick.
+    """
+
+    def __init__(self, hook, dag_id: str, run_id: str):
+        super().__init__()
+        self.hook = hook
+        self.dag_id = dag_id
+        self.run_id = run_id
+
+    @classmethod
+    def from_context(cls, hook, context: Context) -> "AnyscaleRunRegistry":
+        ti = context["ti"]
+        return cls(hook, ti.dag_id, ti.run_id)
+
+    def _prefix(self) -> str:
+        return "anyscale_resource:{}:{}:".format(
+            state_store.key_part(self.dag_id), state_store.key_part(self.run_id))
+
+    def _key(self, kind: str, resource_id: str) -> str:
+        return f"{self._prefix()}{kind}:{state_store.key_part(resource_id)}"
+
+    def register(
+        self,
+        kind: str,
+        resource_id: str,
+        scope: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> None:
+        state_store.put(self._key(kind, resource_id), {
+            "kind": kind,
+            "id": resource_id,
+            "scope": scope,
+            "task_id": task_id,
+            "registered_at": time.time(),
+        })
+
+    def unregister(self, kind: str, resource_id: str) -> None:
+        state_store.delete(self._key(kind, resource_id))
+
+    def resources(self) -> List[Dict[str, Any]]:
+        return list(state_store.scan(self._prefix()).values())
+
+    def _get_one(self, kind: str, resource_id: str) -> Optional[Any]:
+        return _get_or_none(self.hook.sdk, kind, resource_id)
+
+    def _fetch_all(self, records: List[Dict[str, Any]]) -> Dict[str, Optional[Any]]:
+        groups: Dict[Tuple[str, Optional[str]], set] = defaultdict(set)
+
+        for record in records:
+            groups[(record["kind"], record["scope"])].add(record["id"])
+
+        found: Dict[str, Optional[Any]] = {}
+
+        for (kind, scope), wanted in groups.items():
+            def fetch_one(resource_id: str, kind: str = kind) -> Optional[Any]:
+                return self._get_one(kind, resource_id)
+
+            # session commands can only be listed per session.
+            if kind == "session_command" and scope is None:
+                found.update({resource_id: fetch_one(resource_id) for resource_id in wanted})
+                continue
+
+            found.update(self.hook.batch_fetch(kind, scope, wanted, fetch_one))
+
+        return found
+
+    def _terminate(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        row = {"kind": record["kind"], "id": record["id"], "task_id": record["task_id"]}
+
+        try:
+            _TERMINATE[record["kind"]](self.hook.sdk, record["id"])
+            self.log.info("terminating %s %s", record["kind"], record["id"])
+            row.update(action="terminated", error=None)
+
+        except Exception as e:
+            self.log.warning("failed to terminate %s %s: %s", record["kind"], record["id"], e)
+            row.update(action="failed", error=str(e))
+
+        return row
+
+    def _wait_until_stopped(
+        self,
+        records: List[Dict[str, Any]],
+        timeout: float,
+        poll_interval: float,
+    ) -> List[Dict[str, Any]]:
+        pending = {record["id"]: record for record in records}
+        deadline = time.monotonic() + timeout
+
+        while pending:
+            resources = self._fetch_all(list(pending.values()))
+
+            for resource_id, resource in resources.items():
+                record = pending[resource_id]
+
+                if _is_stopped(record["kind"], resource):
+                    self.unregister(record["kind"], resource_id)
+                    del pending[resource_id]
+
+            self.log.info("%s resources still stopping", len(pending))
+
+            if not pending or time.monotonic() >= deadline:
+                break
+
+            time.sleep(poll_interval)
+
+        return list(pending.values())
+
+    def teardown(
+        self,
+        kinds: Optional[List[str]] = None,
+        max_concurrency: int = 8,
+        wait: bool = True,
+        timeout: float = 1800,
+        poll_interval: float = 15,
+    ) -> List[Dict[str, Any]]:
+        """Stops every registered resource, returning one row per resource."""
+
+        records = [
+            record for record in self.resources()
+            if kinds is None or record["kind"] in kinds
+        ]
+
+        if not records:
+            self.log.info("no anyscale resources left by run %s", self.run_id)
+            return []
+
+        resources = self._fetch_all(records)
+        rows = []
+        running = []
+
+        for record in records:
+            if _is_stopped(record["kind"], resources.get(record["id"])):
+                self.unregister(record["kind"], record["id"])
+                rows.append({
+                    "kind": record["kind"],
+                    "id": record["id"],
+                    "task_id": record["task_id"],
+                    "action": "already stopped",
+                    "error": None,
+                })
+            else:
+                running.append(record)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            rows.extend(executor.map(self._terminate, running))
+
+        if wait:
+            terminated = {row["id"] for row in rows if row["action"] == "terminated"}
+            still_running = self._wait_until_stopped(
+                [record for record in running if record["id"] in terminated],
+                timeout, poll_interval)
+
+            for row in rows:
+                if row["id"] in {record["id"] for record in still_running}:
+                    row.update(action="failed", error=f"still running after {timeout}s")
+
+        return rows
+
+
+def teardown_callback(
+    conn_id: Optional[str] = None,
+    auth_token: Optional[str] = None,
+    kinds: Optional[List[str]] = None,
+    max_concurrency: int = 8,
+    wait: bool = False,
+) -> Callable[[Context], None]:
+    """
+    Builds a callback, e.g. a DAG's ``on_failure_callback``, that stops every
+    Anyscale resource the failed run left behind.
+    """
+
+    def callback(context: Context) -> None:
+        from anyscale_provider.hooks.anyscale import AnyscaleHook
+
+        dag_run = context["dag_run"]
+        hook = AnyscaleHook(conn_id=conn_id, auth_token=auth_token)
+
+        registry = AnyscaleRunRegistry(hook, dag_run.dag_id, dag_run.run_id)
+        rows = registry.teardown(kinds=kinds, max_concurrency=max_concurrency, wait=wait)
+
+        failed = [row for row in rows if row["action"] == "failed"]
+        if failed:
+            raise AirflowException("failed to stop {}".format(
+                ", ".join(f"{row['kind']} {row['id']}" for row in failed)))
+
+    return callback
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from airflow.exceptions import AirflowException
+
+_RETRYABLE_STATUSES = (408, 429)
+
+# calls that can be repeated without side effects beyond the first one.
+_IDEMPOTENT_PREFIXES = ("get_", "list_", "search_", "fetch_", "terminate_", "kill_", "apply_")
+
+
+class CircuitOpenError(AirflowException):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"anyscale API unavailable, calls paused for {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failed call may succeed if made again: 5xx, 408, 429 and transport errors."""
+
+    if isinstance(exc, CircuitOpenError):
+        return False
+
+    status = _status(exc)
+    if status is not None:
+        return status >= 500 or status in _RETRYABLE_STATUSES
+
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+
+    from urllib3.exceptions import HTTPError as TransportError
+
+    return isinstance(exc, TransportError)
+
+
+def is_idempotent(name: str) -> bool:
+    return name.startswith(_IDEMPOTENT_PREFIXES)
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Exponential backoff with full jitter: the n-th retry waits a random time
+    of up to ``initial_delay * multiplier ** n``, capped at ``max_delay``.
+    """
+
+    attempts: int = 4
+    initial_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+
+    def delay(self, retry: int, exc: Optional[BaseException] = None) -> float:
+        # a 429 tells how long to back off for.
+        retry_after = getattr(getattr(exc, "headers", None), "get", lambda _: None)("Retry-After")
+
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+
+        return random.uniform(0, min(self.initial_delay * self.multiplier ** retry, self.max_delay))
+
+
+class CircuitBreaker:
+    """
+    Stops calling an API that keeps failing.
+
+    After ``failure_threshold`` retryable failures in a row the circuit opens
+    and calls fail fast with :class:`CircuitOpenError` for ``reset_timeout``
+    seconds. Then a single trial call is let through: the circuit closes if
+    it succeeds and opens again if it fails.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+
+            if retry_in > 0 or self._trial_running:
+                raise CircuitOpenError(max(retry_in, 1.0))
+
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """Ends a call that says nothing about the API, e.g. one that failed locally."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Counts a retryable failure, returning whether it opened the circuit."""
+
+        with self._lock:
+            self._failures += 1
+
+            if self._trial_running or (
+                    self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+                return True
+
+            return False
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(
+    namespace: str,
+    failure_threshold: int = 5,
+    reset_timeout: float = 30,
+) -> CircuitBreaker:
+    """The breaker shared by every task of the process calling the same API."""
+
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(namespace)
+
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, reset_timeout)
+            _circuit_breakers[namespace] = breaker
+
+    return breaker
+
+
+def call_with_retry(
+    name: str,
+    call: Callable[[], Any],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+) -> Any:
+    """
+    Calls ``call``, retrying retryable failures of idempotent calls (see
+    ``is_idempotent``) according to ``policy``. Failures of other calls are
+    still reported to the breaker but raised at once.
+    """
+
+    attempts = policy.attempts if is_idempotent(name) else 1
+    retry = 0
+
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+
+        try:
+            result = call()
+
+        except Exception as e:
+            if not is_retryable(e):
+                if breaker is not None:
+                    if _status(e) is not None:
+                        # the API answered, so it is up.
+                        breaker.record_success()
+                    else:
+                        breaker.release_trial()
+                raise
+
+            if breaker is not None and breaker.record_failure():
+                raise
+
+            retry += 1
+            if retry >= attempts:
+                raise
+
+            delay = policy.delay(retry - 1, e)
+            if on_retry is not None:
+                on_retry(retry, e, delay)
+
+            time.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+
+        return result
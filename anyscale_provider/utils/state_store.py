@@ -0,0 +1,87 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from airflow.models import Variable
+from airflow.utils.session import create_session
+
+# Small json records kept in the Variable table of the metadata database,
+# so that every worker and scheduler sees them. Keys are unique, which
+# gives an atomic "insert if absent" to build leases on.
+
+# Variable.key holds 250 characters: longer parts (dag, task and run ids are
+# each allowed 250) are shortened by key_part so that keys always fit.
+_MAX_KEY_PART = 64
+
+
+def key_part(part: Any) -> str:
+    """``part`` as written in a key: kept as is when short, else a readable hash."""
+    part = str(part)
+
+    if len(part) <= _MAX_KEY_PART:
+        return part
+
+    return "{}~{}".format(part[:16], hashlib.sha256(part.encode()).hexdigest()[:32])
+
+
+def _like_prefix(prefix: str) -> str:
+    # "_" and "%" are LIKE wildcards, and "_" is in most keys.
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def try_insert(key: str, value: Dict[str, Any]) -> bool:
+    try:
+        with create_session() as session:
+            session.add(Variable(key=key, val=json.dumps(value)))
+
+    except IntegrityError:
+        return False
+
+    return True
+
+
+def put(key: str, value: Dict[str, Any]) -> None:
+    with create_session() as session:
+        session.query(Variable).filter(Variable.key == key).delete()
+        session.add(Variable(key=key, val=json.dumps(value)))
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    with create_session() as session:
+        variable = session.query(Variable).filter(Variable.key == key).one_or_none()
+
+        if variable is None:
+            return None
+
+        return json.loads(variable.val)
+
+
+def delete(key: str) -> None:
+    with create_session() as session:
+        session.query(Variable).filter(Variable.key == key).delete()
+
+
+def compare_and_delete(key: str, expected: Dict[str, Any]) -> bool:
+    """Deletes ``key`` only if it still holds ``expected``, telling whether it did."""
+    with create_session() as session:
+        # values may be encrypted, so they are compared once decrypted.
+        variable = session.query(Variable).filter(
+            Variable.key == key).with_for_update().one_or_none()
+
+        if variable is None or json.loads(variable.val) != expected:
+            return False
+
+        session.delete(variable)
+
+    return True
+
+
+def scan(prefix: str) -> Dict[str, Dict[str, Any]]:
+    with create_session() as session:
+        variables = session.query(Variable).filter(
+            Variable.key.like(_like_prefix(prefix), escape="\\")).all()
+
+        return {variable.key: json.loads(variable.val) for variable in variables}
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from airflow.utils.context import Context
+
+TIMELINE_XCOM_KEY = "anyscale_timeline"
+
+# events recorded by the provider itself, next to the states of the resources.
+SUBMIT = "submit"
+SUBMITTED = "submitted"
+CREATED = "created"
+FINISHED = "finished"
+LOGS_FETCH = "logs_fetch"
+LOGS_FETCHED = "logs_fetched"
+PROBE = "readiness_probe"
+READY = "ready"
+
+
+def _timestamp(at: Union[None, float, datetime]) -> float:
+    if at is None:
+        return round(time.time(), 3)
+
+    if isinstance(at, datetime):
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return round(at.timestamp(), 3)
+
+    return round(at, 3)
+
+
+class TimelineRecorder:
+    """
+    Timestamped events of the resources handled by one task instance.
+
+    Each resource keeps a list of ``[event, unix timestamp]`` pairs: the
+    submit call, its creation, every state it was seen in and the log fetch.
+    A state is recorded once, when first seen, at its transition time when
+    the API tells it or else at the time of the poll. The time between two
+    consecutive events is the time spent in the phase the first one opens.
+    """
+
+    def __init__(self, resources: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.resources: Dict[str, Dict[str, Any]] = resources or {}
+
+    def mark(
+        self,
+        kind: str,
+        resource_id: str,
+        event: Any,
+        at: Union[None, float, datetime] = None,
+        once: bool = True,
+    ) -> None:
+        event = str(event)
+
+        # no lock: operators are deep copied by airflow, and submissions made
+        # from several threads never mark the same resource.
+        events = self.resources.setdefault(resource_id, {"kind": kind, "events": []})["events"]
+
+        if once and any(name == event for name, _ in events):
+            return
+
+        events.append([event, _timestamp(at)])
+
+    def merge(self, data: Optional[Dict[str, Any]]) -> None:
+        """Adds the events recorded elsewhere, e.g. by a trigger."""
+        if not data:
+            return
+
+        for resource_id, resource in data.get("resources", {}).items():
+            for event, at in resource["events"]:
+                self.mark(resource["kind"], resource_id, event, at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resources": {
+                resource_id: {
+                    "kind": resource["kind"],
+                    "events": sorted(resource["events"], key=lambda event: event[1]),
+                }
+                for resource_id, resource in self.resources.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "TimelineRecorder":
+        recorder = cls()
+        recorder.merge(data)
+        return recorder
+
+    def push(self, context: Context) -> None:
+        if not self.resources:
+            return
+
+        ti = context["ti"]
+        value = self.to_dict()
+        value.update(dag_id=ti.dag_id, task_id=ti.task_id, run_id=ti.run_id)
+
+        ti.xcom_push(key=TIMELINE_XCOM_KEY, value=value)
+
+
+def phases(events: List[List[Any]]) -> List[Dict[str, Any]]:
+    """The phases of a resource: each event and the time until the next one."""
+    return [
+        {"phase": name, "start": at, "duration": next_at - at}
+        for (name, at), (_, next_at) in zip(events, events[1:])
+    ]
@@ -1,21 +1,54 @@
 import json
 
-from copy import deepcopy
+from typing import Optional, Sequence
+
+from airflow.models.xcom import XCOM_RETURN_KEY
 from airflow.utils.context import Context
 
+XCOM_MODE_KEYS = "keys"
+XCOM_MODE_PAYLOAD = "payload"
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The nearest rank ``q`` percentile of ``values``, which must not be empty."""
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
 
-def push_to_xcom(result: dict, context: Context, ignore_keys: list = None):
+def push_to_xcom(
+    result: dict,
+    context: Context,
+    ignore_keys: list = None,
+    fields: Optional[Sequence[str]] = None,
+    mode: str = XCOM_MODE_KEYS,
+):
 
     if ignore_keys is None:
         ignore_keys = []
 
+    if mode not in (XCOM_MODE_KEYS, XCOM_MODE_PAYLOAD):
+        raise ValueError(f"unknown xcom mode: {mode}")
+
     ti = context["ti"]
-    result_copy = deepcopy(result)
 
-    for key, value in result_copy.items():
+    payload = {
+        key: value
+        for key, value in result.items()
+        if key not in ignore_keys and (fields is None or key in fields)
+    }
+
+    if mode == XCOM_MODE_PAYLOAD:
+        # a single row, made json friendly so any xcom backend can store it,
+        # and each of its fields under its own key for `op.output["key"]`:
+        # `fields` is what keeps the number of pushes down.
+        payload = json.loads(json.dumps(payload, default=str))
+        ti.xcom_push(key=XCOM_RETURN_KEY, value=payload)
+
+        for key, value in payload.items():
+            ti.xcom_push(key=key, value=value)
+        return
 
-        if key in ignore_keys:
-            continue
+    for key, value in payload.items():
 
         if type(value) is dict:
             value = json.dumps(value, default=str)
@@ -0,0 +1,429 @@
+"""
+An in-process fake of the Anyscale REST API.
+
+It serves the subset of ``/v0`` endpoints used by the provider over real HTTP,
+so benchmarks exercise the SDK client, its connection pool and the model
+deserialization exactly as they would against Anyscale. Every resource walks
+through a fixed list of states, moving to the next one after
+``polls_per_state`` reads. Each request can be delayed by ``latency`` seconds
+(plus up to ``jitter``) and fail with a 503 with probability ``failure_rate``.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+JOB_STATES = ["PENDING", "AWAITING_CLUSTER_START", "RUNNING", "SUCCESS"]
+SERVICE_STATES = ["PENDING", "AWAITING_CLUSTER_START", "RUNNING"]
+CLUSTER_START_STATES = ["AwaitingStartup", "StartingUp", "Running"]
+CLUSTER_TERMINATE_STATES = ["Terminating", "Terminated"]
+SESSION_COMMAND_STATES = ["RUNNING", "FINISHED"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:20]}"
+
+
+class _StateMachine:
+
+    def __init__(self, states: List[str], polls_per_state: int):
+        self.states = states
+        self.polls_per_state = max(polls_per_state, 1)
+        self.polls = 0
+        self.transitioned_at = _now()
+        self._index = 0
+
+    @property
+    def state(self) -> str:
+        return self.states[self._index]
+
+    @property
+    def done(self) -> bool:
+        return self._index == len(self.states) - 1
+
+    def tick(self) -> None:
+        self.polls += 1
+        index = min(self.polls // self.polls_per_state, len(self.states) - 1)
+
+        if index != self._index:
+            self._index = index
+            self.transitioned_at = _now()
+
+
+class _Resource:
+
+    def __init__(self, kind: str, body: Dict[str, Any], machine: _StateMachine):
+        self.kind = kind
+        self.id = _new_id({
+            "cluster": "ses",
+            "production_job": "prodjob",
+            "service": "service2",
+            "session_command": "scd",
+        }[kind])
+        self.body = body
+        self.machine = machine
+        self.created_at = _now()
+
+
+class FakeAnyscaleAPI:
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        polls_per_state: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.polls_per_state = polls_per_state
+
+        self.requests: Counter = Counter()
+        self._random = random.Random(seed)
+        self._resources: Dict[str, _Resource] = {}
+        self._lock = threading.Lock()
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [
+            ("POST", re.compile(r"/v0/production_jobs/?$"), self._create_production_job),
+            ("GET", re.compile(r"/v0/production_jobs/?$"), self._list("production_job")),
+            ("GET", re.compile(r"/v0/production_jobs/(\w+)$"), self._get("production_job")),
+            ("POST", re.compile(r"/v0/production_jobs/(\w+)/terminate$"), self._terminate),
+            ("GET", re.compile(r"/v0/jobs/(\w+)/logs$"), self._get_job_logs),
+            ("POST", re.compile(r"/v0/clusters/?$"), self._create_cluster),
+            ("POST", re.compile(r"/v0/clusters/search$"), self._search_clusters),
+            ("GET", re.compile(r"/v0/clusters/(\w+)$"), self._get("cluster")),
+            ("POST", re.compile(r"/v0/clusters/(\w+)/start$"), self._start_cluster),
+            ("POST", re.compile(r"/v0/clusters/(\w+)/terminate$"), self._terminate_cluster),
+            ("POST", re.compile(r"/v0/services/?$"), self._apply_service),
+            ("PUT", re.compile(r"/v0/services/?$"), self._apply_service),
+            ("GET", re.compile(r"/v0/services/?$"), self._list("service")),
+            ("GET", re.compile(r"/v0/services/(\w+)$"), self._get("service")),
+            ("POST", re.compile(r"/v0/services/(\w+)/terminate$"), self._terminate),
+            ("POST", re.compile(r"/v0/session_commands/?$"), self._create_session_command),
+            ("GET", re.compile(r"/v0/session_commands/?$"), self._list("session_command")),
+            ("GET", re.compile(r"/v0/session_commands/(\w+)$"), self._get("session_command")),
+            ("POST", re.compile(r"/v0/session_commands/(\w+)/kill$"), self._terminate),
+        ]
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAnyscaleAPI":
+        api = self
+
+        class Handler(_Handler):
+            fake_api = api
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 2048
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeAnyscaleAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # request handling
+
+    def handle(self, method: str, url: str, body: Optional[dict]) -> Tuple[int, Dict[str, Any]]:
+        parsed = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.search(parsed.path)
+
+            if route_method != method or match is None:
+                continue
+
+            self.requests[f"{method} {pattern.pattern}"] += 1
+
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if delay:
+                time.sleep(delay)
+
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                return 503, {"error": {"detail": "injected failure"}}
+
+            with self._lock:
+                return handler(*match.groups(), body=body or {}, query=query)
+
+        return 404, {"error": {"detail": f"no route for {method} {parsed.path}"}}
+
+    def _lookup(self, resource_id: str) -> Optional[_Resource]:
+        return self._resources.get(resource_id)
+
+    def _add(self, kind: str, body: Dict[str, Any], states: List[str]) -> _Resource:
+        resource = _Resource(kind, body, _StateMachine(states, self.polls_per_state))
+        self._resources[resource.id] = resource
+        return resource
+
+    def _get(self, kind: str) -> Callable:
+        def get(resource_id: str, **kwargs) -> Tuple[int, Dict[str, Any]]:
+            resource = self._lookup(resource_id)
+
+            if resource is None or resource.kind != kind:
+                return 404, {"error": {"detail": f"{kind} {resource_id} not found"}}
+
+            resource.machine.tick()
+            return 200, {"result": self._render(resource)}
+
+        return get
+
+    def _list(self, kind: str) -> Callable:
+        def list_(**kwargs) -> Tuple[int, Dict[str, Any]]:
+            query = kwargs["query"]
+            scope_key = "session_id" if kind == "session_command" else "project_id"
+
+            resources = [
+                r for r in self._resources.values()
+                if r.kind == kind and query.get(scope_key) in (None, r.body.get(scope_key))
+            ]
+
+            return 200, self._page(resources, query.get("paging_token"), query.get("count"))
+
+        return list_
+
+    def _page(self, resources: List[_Resource], paging_token: Optional[str], count: Any) -> Dict[str, Any]:
+        start = int(paging_token or 0)
+        count = int(count or 50)
+        page = resources[start:start + count]
+
+        for resource in page:
+            resource.machine.tick()
+
+        next_paging_token = str(start + count) if start + count < len(resources) else None
+
+        return {
+            "results": [self._render(resource) for resource in page],
+            "metadata": {"total": len(resources), "next_paging_token": next_paging_token},
+        }
+
+    def _render(self, resource: _Resource) -> Dict[str, Any]:
+        return getattr(self, f"_render_{resource.kind}")(resource)
+
+    # production jobs and services
+
+    def _render_job_state(self, resource: _Resource, goal_state: str) -> Dict[str, Any]:
+        return {
+            "id": f"{resource.id}_{resource.machine.polls}",
+            "production_job_id": resource.id,
+            "state_transitioned_at": resource.machine.transitioned_at,
+            "current_state": resource.machine.state,
+            "goal_state": goal_state,
+        }
+
+    def _render_job_config(self, resource: _Resource) -> Dict[str, Any]:
+        config = resource.body.get("config") or {}
+
+        return {
+            "entrypoint": config.get("entrypoint") or "python main.py",
+            "build_id": config.get("build_id") or "bld_benchmark",
+            "compute_config_id": config.get("compute_config_id") or "cpt_benchmark",
+            "runtime_env": config.get("runtime_env"),
+            "max_retries": config.get("max_retries"),
+        }
+
+    def _render_production_job(self, resource: _Resource) -> Dict[str, Any]:
+        return {
+            "id": resource.id,
+            "name": resource.body.get("name"),
+            "description": resource.body.get("description"),
+            "project_id": resource.body.get("project_id"),
+            "created_at": resource.created_at,
+            "creator_id": "usr_benchmark",
+            "config": self._render_job_config(resource),
+            "state": self._render_job_state(resource, JOB_STATES[-1]),
+            "last_job_run_id": f"job_{resource.id}",
+        }
+
+    def _render_service(self, resource: _Resource) -> Dict[str, Any]:
+        return {
+            "id": resource.id,
+            "name": resource.body.get("name"),
+            "description": resource.body.get("description"),
+            "project_id": resource.body.get("project_id"),
+            "created_at": resource.created_at,
+            "creator_id": "usr_benchmark",
+            "config": self._render_job_config(resource),
+            "state": self._render_job_state(resource, SERVICE_STATES[-1]),
+            "healthcheck_url": resource.body.get("healthcheck_url") or "/-/healthz",
+            "url": f"https://{resource.id}.benchmark.anyscale.internal",
+            "token": "service-token",
+        }
+
+    def _create_production_job(self, body: dict, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._add("production_job", body, JOB_STATES)
+        return 200, {"result": self._render(resource)}
+
+    def _apply_service(self, body: dict, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._add("service", body, SERVICE_STATES)
+        return 200, {"result": self._render(resource)}
+
+    def _get_job_logs(self, job_run_id: str, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._lookup(job_run_id[len("job_"):])
+
+        if resource is None:
+            return 404, {"error": {"detail": f"job {job_run_id} not found"}}
+
+        lines = [f"{resource.id} step {i}" for i in range(resource.machine.polls)]
+        return 200, {"result": {"logs": "\n".join(lines), "ready": True}}
+
+    def _terminate(self, resource_id: str, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._lookup(resource_id)
+
+        if resource is None:
+            return 404, {"error": {"detail": f"{resource_id} not found"}}
+
+        if resource.kind == "session_command":
+            resource.machine = _StateMachine(SESSION_COMMAND_STATES[-1:], 1)
+        else:
+            resource.machine = _StateMachine(["TERMINATED"], 1)
+
+        return 200, {"result": self._render(resource)}
+
+    # clusters
+
+    def _render_cluster(self, resource: _Resource) -> Dict[str, Any]:
+        machine = resource.machine
+
+        return {
+            "id": resource.id,
+            "name": resource.body.get("name"),
+            "project_id": resource.body.get("project_id"),
+            "cluster_environment_build_id": resource.body.get(
+                "cluster_environment_build_id") or "bld_benchmark",
+            "cluster_compute_id": resource.body.get("cluster_compute_id") or "cpt_benchmark",
+            "state": machine.state,
+            "goal_state": None if machine.done else machine.states[-1],
+            "creator_id": "usr_benchmark",
+            "created_at": resource.created_at,
+            "access_token": "cluster-token",
+            "services_urls": {},
+            "ssh_authorized_keys": [],
+            "ssh_private_key": "",
+        }
+
+    def _render_cluster_operation(self, resource: _Resource, operation: str) -> Dict[str, Any]:
+        return {
+            "result": {
+                "id": _new_id("cop"),
+                "completed": False,
+                "cluster_id": resource.id,
+                "cluster_operation_type": operation,
+            }
+        }
+
+    def _create_cluster(self, body: dict, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._add("cluster", body, ["Terminated"])
+        return 200, {"result": self._render(resource)}
+
+    def _search_clusters(self, body: dict, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        name = (body.get("name") or {}).get("equals")
+        paging = body.get("paging") or {}
+
+        resources = [
+            r for r in self._resources.values()
+            if r.kind == "cluster"
+            and body.get("project_id") in (None, r.body.get("project_id"))
+            and name in (None, r.body.get("name"))
+        ]
+
+        return 200, self._page(resources, paging.get("paging_token"), paging.get("count"))
+
+    def _start_cluster(self, cluster_id: str, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._lookup(cluster_id)
+
+        if resource is None:
+            return 404, {"error": {"detail": f"cluster {cluster_id} not found"}}
+
+        resource.machine = _StateMachine(CLUSTER_START_STATES, self.polls_per_state)
+        return 200, self._render_cluster_operation(resource, "start")
+
+    def _terminate_cluster(self, cluster_id: str, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._lookup(cluster_id)
+
+        if resource is None:
+            return 404, {"error": {"detail": f"cluster {cluster_id} not found"}}
+
+        resource.machine = _StateMachine(CLUSTER_TERMINATE_STATES, self.polls_per_state)
+        return 200, self._render_cluster_operation(resource, "terminate")
+
+    # session commands
+
+    def _render_session_command(self, resource: _Resource) -> Dict[str, Any]:
+        done = resource.machine.done
+
+        return {
+            "id": resource.id,
+            "session_id": resource.body.get("session_id"),
+            "shell_command": resource.body.get("shell_command"),
+            "created_at": resource.created_at,
+            "finished_at": resource.machine.transitioned_at if done else None,
+            "status_code": 0 if done else None,
+        }
+
+    def _create_session_command(self, body: dict, **kwargs) -> Tuple[int, Dict[str, Any]]:
+        resource = self._add("session_command", body, SESSION_COMMAND_STATES)
+        return 200, {"result": self._render(resource)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    fake_api: FakeAnyscaleAPI
+
+    def _dispatch(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        status, payload = self.fake_api.handle(method, self.path, body)
+        data = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
@@ -0,0 +1,117 @@
+"""
+Guards the cost of importing the provider while parsing DAG files.
+
+Each run imports the provider's public modules in a fresh interpreter, the
+way a DAG processor does, and checks that neither the Anyscale SDK nor any
+other optional heavy dependency got loaded along the way::
+
+    python -m benchmarks.import_time --repeat 5 --max-seconds 0.5
+
+The time reported is the provider's own share: the Airflow modules the
+provider builds on are imported first and not counted.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, Sequence
+
+PROVIDER_MODULES = [
+    "anyscale_provider.hooks.anyscale",
+    "anyscale_provider.operators.cluster",
+    "anyscale_provider.operators.cluster_pool",
+    "anyscale_provider.operators.production_jobs",
+    "anyscale_provider.operators.services",
+    "anyscale_provider.operators.session_command",
+    "anyscale_provider.operators.teardown",
+    "anyscale_provider.sensors.cluster",
+    "anyscale_provider.sensors.production_jobs",
+    "anyscale_provider.sensors.services",
+    "anyscale_provider.sensors.session_command",
+    "anyscale_provider.triggers.cluster",
+    "anyscale_provider.triggers.production_jobs",
+    "anyscale_provider.triggers.services",
+    "anyscale_provider.triggers.session_command",
+]
+
+# what a dag file using the provider would load anyway.
+AIRFLOW_MODULES = [
+    "airflow.models.baseoperator",
+    "airflow.sensors.base",
+    "airflow.triggers.base",
+    "airflow.hooks.base",
+]
+
+# modules that must only be loaded when a task runs.
+FORBIDDEN_MODULES = ["anyscale", "opentelemetry", "aiohttp", "zstandard"]
+
+_PROBE = """
+import importlib, json, sys, time
+
+for name in {airflow_modules!r}:
+    importlib.import_module(name)
+
+started_at = time.perf_counter()
+for name in {provider_modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - started_at
+
+loaded = [
+    name for name in sys.modules
+    if any(name == root or name.startswith(root + ".") for root in {forbidden!r})
+]
+print(json.dumps({{"elapsed": elapsed, "loaded": sorted(loaded)}}))
+"""
+
+
+def measure() -> Dict[str, Any]:
+    probe = _PROBE.format(
+        airflow_modules=AIRFLOW_MODULES,
+        provider_modules=PROVIDER_MODULES,
+        forbidden=FORBIDDEN_MODULES,
+    )
+
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail when the median import time is above this")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.repeat)]
+    timings = [run["elapsed"] for run in runs]
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    median = statistics.median(timings)
+    print(f"provider import time: median {median * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+    failed = False
+
+    if loaded:
+        print("modules loaded at import time that should be deferred:")
+        for name in loaded:
+            print(f"  {name}")
+        failed = True
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"median import time is above {args.max_seconds * 1000:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
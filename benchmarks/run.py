@@ -0,0 +1,256 @@
+"""
+Measures the provider's overhead against the fake Anyscale API.
+
+For each concurrency level, every scenario runs that many tasks at once on a
+thread pool and reports throughput, latency percentiles and, for the
+scenarios that talk to the API, the number of API calls made per task::
+
+    python -m benchmarks.run --concurrency 1 100 1000 --latency 0.02
+
+Scenarios:
+
+* ``hook``: builds a hook from the connection and gets its SDK client.
+* ``submit``: runs ``AnyscaleCreateProductionJobOperator.execute``.
+* ``poll``: pokes ``AnyscaleProductionJobSensor`` until the job succeeds.
+* ``xcom``: pushes a production job with ``push_to_xcom`` in both modes.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+from urllib.parse import quote
+
+from benchmarks.fake_api import FakeAnyscaleAPI
+
+CONN_ID = "anyscale_benchmark"
+SCENARIOS = ("hook", "submit", "poll", "xcom")
+
+
+class _XComCollector:
+    """Stands in for the task instance, keeping pushed values in memory."""
+
+    def __init__(self):
+        self.xcom: Dict[str, Any] = {}
+
+    def xcom_push(self, key: str, value: Any, **kwargs) -> None:
+        self.xcom[key] = value
+
+
+def _run_concurrently(
+    api: FakeAnyscaleAPI,
+    concurrency: int,
+    task: Callable[[int], int],
+) -> Dict[str, Any]:
+    """Runs ``task`` once per slot; each call returns the number of operations it did."""
+    from anyscale_provider.utils import percentile
+
+    requests_before = sum(api.requests.values())
+
+    def timed(index: int):
+        started_at = time.perf_counter()
+
+        try:
+            operations = task(index)
+        except Exception:
+            # injected failures surface as task failures, as they would in airflow.
+            operations = None
+
+        return time.perf_counter() - started_at, operations
+
+    started_at = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(concurrency)))
+
+    wall = time.perf_counter() - started_at
+    latencies = [latency for latency, _ in results]
+    operations = sum(count for _, count in results if count is not None)
+    failed = sum(1 for _, count in results if count is None)
+    api_calls = sum(api.requests.values()) - requests_before
+
+    return {
+        "tasks": concurrency,
+        "operations": operations,
+        "failed": failed,
+        "wall": wall,
+        "throughput": operations / wall if wall else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.mean(latencies),
+        "api_calls_per_task": api_calls / concurrency,
+    }
+
+
+def _create_jobs(api: FakeAnyscaleAPI, count: int) -> List[str]:
+    from anyscale_provider.hooks.anyscale import AnyscaleHook
+    from anyscale.sdk.anyscale_client.models.create_production_job import CreateProductionJob
+
+    sdk = AnyscaleHook(conn_id=CONN_ID).get_conn()
+
+    # setup is not measured, so it should not fail either.
+    failure_rate, api.failure_rate = api.failure_rate, 0.0
+
+    try:
+        return [
+            sdk.create_job(CreateProductionJob(
+                name=f"benchmark-{i}",
+                project_id="prj_benchmark",
+                config={"entrypoint": "python main.py", "build_id": "bld_benchmark",
+                        "compute_config_id": "cpt_benchmark"},
+            )).result.id
+            for i in range(count)
+        ]
+
+    finally:
+        api.failure_rate = failure_rate
+
+
+def bench_hook(api: FakeAnyscaleAPI, concurrency: int) -> Dict[str, Any]:
+    from anyscale_provider.hooks.anyscale import AnyscaleHook
+
+    def task(index: int) -> int:
+        AnyscaleHook(conn_id=CONN_ID).get_conn()
+        return 1
+
+    return _run_concurrently(api, concurrency, task)
+
+
+def bench_submit(api: FakeAnyscaleAPI, concurrency: int) -> Dict[str, Any]:
+    from anyscale_provider.operators.production_jobs import AnyscaleCreateProductionJobOperator
+
+    def task(index: int) -> int:
+        operator = AnyscaleCreateProductionJobOperator(
+            task_id=f"submit_{index}",
+            conn_id=CONN_ID,
+            name=f"benchmark-{index}",
+            project_id="prj_benchmark",
+            entrypoint="python main.py",
+            cluster_environment_build_id="bld_benchmark",
+            compute_config_id="cpt_benchmark",
+            # both need the metadata database, which the benchmark runs without.
+            resume_submissions=False,
+            register_resources=False,
+        )
+        operator.execute({"ti": _XComCollector()})
+        return 1
+
+    return _run_concurrently(api, concurrency, task)
+
+
+def bench_poll(api: FakeAnyscaleAPI, concurrency: int) -> Dict[str, Any]:
+    from anyscale_provider.sensors.production_jobs import AnyscaleProductionJobSensor
+
+    job_ids = _create_jobs(api, concurrency)
+
+    def task(index: int) -> int:
+        sensor = AnyscaleProductionJobSensor(
+            task_id=f"poll_{index}",
+            conn_id=CONN_ID,
+            production_job_id=job_ids[index],
+            poke_interval=0,
+        )
+
+        polls = 1
+        while not sensor.poke({"ti": _XComCollector()}):
+            polls += 1
+
+        return polls
+
+    return _run_concurrently(api, concurrency, task)
+
+
+def bench_xcom(api: FakeAnyscaleAPI, concurrency: int, repeat: int = 20) -> Dict[str, Any]:
+    from anyscale_provider.utils import push_to_xcom, XCOM_MODE_KEYS, XCOM_MODE_PAYLOAD
+    from anyscale_provider.hooks.anyscale import AnyscaleHook
+
+    job_id = _create_jobs(api, 1)[0]
+    production_job = AnyscaleHook(conn_id=CONN_ID).get_conn().get_production_job(
+        production_job_id=job_id).result.to_dict()
+
+    def task(index: int) -> int:
+        context = {"ti": _XComCollector()}
+
+        for _ in range(repeat):
+            push_to_xcom(production_job, context, mode=XCOM_MODE_KEYS)
+            push_to_xcom(production_job, context, mode=XCOM_MODE_PAYLOAD)
+
+        return repeat * 2
+
+    return _run_concurrently(api, concurrency, task)
+
+
+BENCHMARKS = {
+    "hook": bench_hook,
+    "submit": bench_submit,
+    "poll": bench_poll,
+    "xcom": bench_xcom,
+}
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every fake API response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="probability of a fake API request failing with a 503")
+    parser.add_argument("--polls-per-state", type=int, default=1)
+    parser.add_argument("--pool-maxsize", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", default=None,
+                        help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    # urllib3 warns every time a connection is dropped because the pool is
+    # full, which is expected once concurrency goes above the pool size.
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+    logging.getLogger("airflow").setLevel(logging.WARNING)
+
+    api = FakeAnyscaleAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        polls_per_state=args.polls_per_state,
+        seed=args.seed,
+    )
+
+    results = []
+
+    with api:
+        extra = f"host={quote(api.url, safe='')}&pool_maxsize={args.pool_maxsize}"
+        os.environ[f"AIRFLOW_CONN_{CONN_ID.upper()}"] = f"anyscale://:benchmark@/?{extra}"
+
+        print(f"{'scenario':<8} {'tasks':>6} {'ops':>8} {'wall s':>8} {'ops/s':>10} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls/task':>10} {'failed':>6}")
+
+        for concurrency in args.concurrency:
+            for scenario in args.scenarios:
+                result = BENCHMARKS[scenario](api, concurrency)
+                result["scenario"] = scenario
+
+                results.append(result)
+
+                print(f"{scenario:<8} {result['tasks']:>6} {result['operations']:>8} "
+                      f"{result['wall']:>8.2f} {result['throughput']:>10.1f} "
+                      f"{result['p50'] * 1000:>8.1f} {result['p95'] * 1000:>8.1f} "
+                      f"{result['p99'] * 1000:>8.1f} {result['api_calls_per_task']:>10.1f} "
+                      f"{result['failed']:>6}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,21 +12,28 @@ setup(
     entry_points={
         "apache_airflow_provider": [
             "provider_info=anyscale_provider.__init__:get_provider_info"
-        ]
+        ],
+        "console_scripts": [
+            "anyscale-provider=anyscale_provider.cli:main"
+        ],
     },
     long_description=long_description,
     long_description_content_type="text/markdown",
     license="Apache License 2.0",
     version=VERSION,
-    packages=find_packages(include=["*"]),
+    packages=find_packages(include=["*"], exclude=["benchmarks", "benchmarks.*"]),
     zip_safe=False,
     install_requires=[
         "apache-airflow-providers-http",
-        "apache-airflow>=2.0",
+        "apache-airflow>=2.7",
         "anyscale"
     ],
     setup_requires=["setuptools", "wheel"],
-    extras_require={},
+    extras_require={
+        "opentelemetry": ["opentelemetry-api"],
+        "readiness": ["aiohttp"],
+        "zstd": ["zstandard"],
+    },
     author="Matias Lopez",
     author_email="matias.lopez@anastasia.ai",
     url="http://astronomer.io/",
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+import pytest
+
+from anyscale_provider.utils import state_store as state_store_module
+
+
+@pytest.fixture(autouse=True)
+def _isolated_config(monkeypatch, tmp_path):
+    # no test reads or writes the durations of the machine running it.
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__DURATION_STORE", "False")
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__RESOLUTION_CACHE_PATH", "")
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__API_RATE_LIMIT_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def anyscale_connection(monkeypatch):
+    """An ``anyscale_default`` connection, whose extras a test can change."""
+    extras = {}
+
+    def set_connection(**extra):
+        extras.clear()
+        extras.update(extra)
+        monkeypatch.setenv("AIRFLOW_CONN_ANYSCALE_DEFAULT", json.dumps({
+            "conn_type": "anyscale",
+            "password": "token",
+            "extra": extras,
+        }))
+
+    set_connection()
+    return set_connection
+
+
+@pytest.fixture
+def sdk(anyscale_connection):
+    """The SDK every hook returns, a mock the test programs."""
+    sdk = mock.MagicMock(name="sdk")
+
+    with mock.patch("anyscale_provider.hooks.anyscale.AnyscaleHook.get_conn", return_value=sdk):
+        yield sdk
+
+
+class FakeStateStore:
+    """The records of ``state_store`` kept in memory instead of the Variable table."""
+
+    def __init__(self):
+        self.records = {}
+
+    def try_insert(self, key, value):
+        if key in self.records:
+            return False
+
+        self.records[key] = json.loads(json.dumps(value))
+        return True
+
+    def put(self, key, value):
+        self.records[key] = json.loads(json.dumps(value))
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def delete(self, key):
+        self.records.pop(key, None)
+
+    def compare_and_delete(self, key, expected):
+        if self.records.get(key) != expected:
+            return False
+
+        del self.records[key]
+        return True
+
+    def scan(self, prefix):
+        return {key: value for key, value in self.records.items() if key.startswith(prefix)}
+
+
+@pytest.fixture
+def state_store(monkeypatch):
+    store = FakeStateStore()
+
+    for name in ("try_insert", "put", "get", "delete", "compare_and_delete", "scan"):
+        monkeypatch.setattr(state_store_module, name, getattr(store, name))
+
+    return store
+
+
+class FakeTaskInstance:
+
+    def __init__(self, dag_id="dag", task_id="task", run_id="run", try_number=1, map_index=-1):
+        self.dag_id = dag_id
+        self.task_id = task_id
+        self.run_id = run_id
+        self.try_number = try_number
+        self.map_index = map_index
+        self.xcom = {}
+
+    def xcom_push(self, key, value, **kwargs):
+        self.xcom[key] = value
+
+
+@pytest.fixture
+def context():
+    ti = FakeTaskInstance()
+    return {"ti": ti, "task_instance": ti, "dag_run": mock.Mock(dag_id=ti.dag_id, run_id=ti.run_id)}
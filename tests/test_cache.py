@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from anyscale_provider.hooks import anyscale as hook_module
+from anyscale_provider.hooks.anyscale import AnyscaleHook
+from anyscale_provider.utils import cache as cache_module
+from anyscale_provider.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("project:a", "prj_1")
+
+    clock[0] += 9
+    assert cache.get("project:a") == "prj_1"
+
+    clock[0] += 1
+    assert cache.get("project:a") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_disk_layer_is_shared_between_caches(clock, tmp_path):
+    path = str(tmp_path / "cache" / "resolution.db")
+    TTLCache(ttl=10, path=path).set("project:a", "prj_1")
+
+    other = TTLCache(ttl=10, path=path)
+    assert other.get("project:a") == "prj_1"
+
+    other.invalidate("project:a")
+    assert TTLCache(ttl=10, path=path).get("project:a") is None
+
+    TTLCache(ttl=10, path=path).set("project:b", "prj_2")
+    clock[0] += 10
+    assert TTLCache(ttl=10, path=path).get("project:b") is None
+
+
+def test_hook_resolves_a_name_once(sdk, monkeypatch):
+    monkeypatch.setattr(hook_module, "_resolution_cache", None)
+    sdk.search_projects.return_value = SimpleNamespace(results=[SimpleNamespace(id="prj_1")])
+
+    assert AnyscaleHook().get_project_id("research") == "prj_1"
+    assert AnyscaleHook().get_project_id("research") == "prj_1"
+
+    sdk.search_projects.assert_called_once()
@@ -0,0 +1,63 @@
+import json
+
+from anyscale_provider.cli import gantt, main, summarize
+
+
+def _timeline(task_id, pending, running):
+    return {
+        "dag_id": "dag",
+        "task_id": task_id,
+        "run_id": "run",
+        "resources": {
+            f"prodjob_{task_id}": {
+                "kind": "production_job",
+                "events": [["submit", 0], ["PENDING", 1], ["RUNNING", 1 + pending],
+                           ["SUCCESS", 1 + pending + running]],
+            },
+        },
+    }
+
+
+TIMELINES = [_timeline("a", 10, 100), _timeline("b", 20, 200), _timeline("c", 30, 300)]
+
+
+def test_summarize_gives_percentiles_per_phase():
+    rows = {row["phase"]: row for row in summarize(TIMELINES)}
+
+    assert set(rows) == {"submit", "PENDING", "RUNNING", "total"}
+    assert rows["PENDING"]["count"] == 3
+    assert (rows["PENDING"]["p50"], rows["PENDING"]["max"]) == (20, 30)
+    assert rows["total"]["p50"] == 221
+
+
+def test_gantt_draws_one_bar_per_phase():
+    lines = gantt(_timeline("a", 10, 100), width=10)
+
+    assert lines[0] == "dag a run (111.0s)"
+    assert lines[1] == "  production_job prodjob_a"
+    assert len(lines) == 5
+    assert lines[-1].startswith("    RUNNING")
+    assert "#" * 9 in lines[-1]
+
+    assert gantt({"resources": {}}) == []
+
+
+def test_timeline_command_reads_a_file(tmp_path, capsys):
+    path = tmp_path / "timelines.jsonl"
+    path.write_text("\n".join(json.dumps(timeline) for timeline in TIMELINES))
+
+    assert main(["timeline", "--input", str(path), "--json"]) == 0
+    assert {row["phase"] for row in json.loads(capsys.readouterr().out)} == {
+        "submit", "PENDING", "RUNNING", "total"}
+
+    assert main(["timeline", "--input", str(path), "--gantt", "1"]) == 0
+    output = capsys.readouterr().out
+    assert output.startswith("3 task instances")
+    assert "dag a run" in output
+
+
+def test_timeline_command_without_timelines(tmp_path, capsys):
+    path = tmp_path / "timelines.json"
+    path.write_text("[]")
+
+    assert main(["timeline", "--input", str(path)]) == 1
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from anyscale_provider.operators.cluster_pool import AnyscaleLeaseClusterOperator
+from anyscale_provider.utils import cluster_pool as cluster_pool_module
+from anyscale_provider.utils import state_store as state_store_module
+from anyscale_provider.utils.cluster_pool import AnyscaleClusterPool
+
+LEASE_KEY = "anyscale_pool__warm__lease__ses_1"
+IDLE_KEY = "anyscale_pool__warm__idle__ses_1"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cluster_pool_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def pool(state_store, clock):
+    return AnyscaleClusterPool(mock.Mock(), "warm")
+
+
+def test_a_lease_is_held_until_it_expires(pool, clock):
+    assert pool.try_lease("ses_1", {"run_id": "a"}, lease_ttl=60)
+    assert not pool.try_lease("ses_1", {"run_id": "b"}, lease_ttl=60)
+
+    clock[0] += 60
+
+    assert pool.try_lease("ses_1", {"run_id": "b"}, lease_ttl=60)
+
+
+def test_a_renewed_lease_does_not_expire(pool, state_store, clock):
+    pool.try_lease("ses_1", {"run_id": "a"}, lease_ttl=60)
+    clock[0] += 50
+    assert pool.renew("ses_1", 60)
+
+    clock[0] += 50
+    assert not pool.try_lease("ses_1", {"run_id": "b"}, lease_ttl=60)
+    assert state_store.get(LEASE_KEY)["run_id"] == "a"
+
+
+def test_leases_without_ttl_never_expire(pool, clock):
+    pool.try_lease("ses_1", {"run_id": "a"})
+    clock[0] += 10 ** 9
+
+    assert not pool.try_lease("ses_1", {"run_id": "b"})
+
+
+def test_reclaim_terminates_expired_idle_clusters_and_expired_leases(pool, state_store, clock):
+    pool.release("ses_1", idle_ttl=0)
+    pool.release("ses_2", idle_ttl=600)
+    pool.try_lease("ses_3", {"run_id": "dead"}, lease_ttl=60)
+    pool.try_lease("ses_4", {"run_id": "alive"}, lease_ttl=3600)
+    clock[0] += 60
+
+    assert sorted(pool.reclaim_idle()) == ["ses_1", "ses_3"]
+
+    terminated = [call.kwargs["cluster_id"] for call in pool.hook.sdk.terminate_cluster.call_args_list]
+    assert sorted(terminated) == ["ses_1", "ses_3"]
+    assert set(state_store.records) == {
+        "anyscale_pool__warm__idle__ses_2", "anyscale_pool__warm__lease__ses_4"}
+
+
+def test_reclaim_keeps_a_cluster_released_again_since_the_scan(pool, state_store, clock, monkeypatch):
+    pool.release("ses_1", idle_ttl=0)
+    stale = dict(state_store.records)
+
+    # a run leased and released the cluster after reclaim read the records.
+    clock[0] += 1
+    pool.try_lease("ses_1", {"run_id": "a"})
+    pool.release("ses_1", idle_ttl=600)
+    monkeypatch.setattr(state_store_module, "scan", lambda prefix: {
+        key: value for key, value in stale.items() if key.startswith(prefix)})
+
+    assert pool.reclaim_idle() == []
+    pool.hook.sdk.terminate_cluster.assert_not_called()
+    assert state_store.get(IDLE_KEY) == {"expires_at": 1601.0}
+
+
+def test_a_failed_termination_leaves_the_cluster_idle(pool, state_store, clock):
+    pool.release("ses_1", idle_ttl=0)
+    pool.hook.sdk.terminate_cluster.side_effect = RuntimeError("api down")
+
+    assert pool.reclaim_idle() == []
+    assert state_store.get(IDLE_KEY) == {"expires_at": 1000.0}
+    assert state_store.get(LEASE_KEY) is None
+
+
+def test_operator_creates_pool_clusters_with_an_idle_timeout_and_a_lease_ttl(sdk, state_store, context):
+    cluster = SimpleNamespace(id="ses_1", to_dict=lambda: {"id": "ses_1"})
+    sdk.create_cluster.return_value = SimpleNamespace(result=cluster)
+    sdk.get_cluster.return_value = SimpleNamespace(result=SimpleNamespace(
+        state="Running", goal_state=None, head_node_info=None, services_urls=None))
+
+    operator = AnyscaleLeaseClusterOperator(
+        task_id="task", pool_name="warm", project_id="prj_1", compute_config_id="cpt_1",
+        cluster_environment_build_id="bld_1", lease_ttl=3600, cluster_idle_timeout_minutes=30)
+
+    with mock.patch("anyscale_provider.hooks.anyscale.AnyscaleHook.iter_clusters", return_value=iter([])):
+        operator.execute(context)
+
+    assert sdk.create_cluster.call_args.args[0]["idle_timeout_minutes"] == 30
+
+    lease = state_store.get(LEASE_KEY)
+    assert lease["run_id"] == "run"
+    assert lease["expires_at"] == pytest.approx(lease["leased_at"] + 3600)
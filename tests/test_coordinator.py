@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from anyscale_provider.triggers import coordinator as coordinator_module
+from anyscale_provider.triggers.coordinator import FALL_BACK, AnyscalePollCoordinator
+from anyscale_provider.triggers.production_jobs import AnyscaleProductionJobTrigger
+from tests.test_production_jobs import _job
+
+
+@pytest.fixture
+def batch_poll(monkeypatch):
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__BATCH_POLL", "True")
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__BATCH_POLL_INTERVAL", "0")
+    monkeypatch.setattr(coordinator_module, "_coordinator", None)
+
+
+def _trigger(hook, job_id="prodjob_1"):
+    trigger = AnyscaleProductionJobTrigger(
+        production_job_id=job_id, project_id="prj_1", conn_id="anyscale_default", poll_interval=0)
+    trigger.hook = hook
+    return trigger
+
+
+def _hook(*rounds):
+    """A hook whose list calls go through ``rounds``, an exception fails the round."""
+    calls = []
+
+    def batch_fetch(*args):
+        result = rounds[min(len(calls), len(rounds) - 1)]
+        calls.append(args)
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return mock.Mock(batch_fetch=mock.Mock(side_effect=batch_fetch))
+
+
+def test_subscribers_wait_for_the_next_round_after_a_failed_list():
+    hook = _hook(RuntimeError("list failed"), {"prodjob_1": "job 1", "prodjob_2": "job 2"})
+
+    async def wait():
+        coordinator = AnyscalePollCoordinator()
+        queues = [
+            coordinator.subscribe(_trigger(hook, job_id), job_id, "prj_1", 0)
+            for job_id in ("prodjob_1", "prodjob_2")
+        ]
+        return await asyncio.wait_for(asyncio.gather(*(queue.get() for queue in queues)), 5)
+
+    assert asyncio.run(wait()) == ["job 1", "job 2"]
+    assert hook.batch_fetch.call_count >= 2
+
+
+def test_subscribers_fall_back_when_the_list_keeps_failing():
+    hook = _hook(*[RuntimeError("list failed")] * coordinator_module._MAX_FAILED_ROUNDS)
+
+    async def wait():
+        coordinator = AnyscalePollCoordinator()
+        queue = coordinator.subscribe(_trigger(hook), "prodjob_1", "prj_1", 0)
+        return await asyncio.wait_for(queue.get(), 5)
+
+    assert asyncio.run(wait()) is FALL_BACK
+
+
+def test_trigger_polls_on_its_own_after_falling_back(anyscale_connection, batch_poll):
+    hook = _hook(*[RuntimeError("list failed")] * coordinator_module._MAX_FAILED_ROUNDS)
+    trigger = _trigger(hook)
+    trigger.sdk = mock.Mock()
+    trigger.sdk.get_production_job.return_value = SimpleNamespace(result=_job("prodjob_1", "SUCCESS"))
+
+    async def first_event():
+        async for event in trigger.run():
+            return event
+
+    event = asyncio.run(first_event())
+
+    assert event.payload["status"] == "success"
+    trigger.sdk.get_production_job.assert_called_once_with(production_job_id="prodjob_1")
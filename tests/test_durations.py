@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from anyscale_provider.utils import durations as durations_module
+from anyscale_provider.utils.durations import DurationStore, DurationTracker, get_duration_store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def time():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(durations_module.time, "time", time)
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = DurationStore(str(tmp_path / "durations.sqlite"))
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__DURATION_STORE", "True")
+    monkeypatch.setattr(durations_module, "_duration_store", store)
+    return store
+
+
+def _tracker(store, samples, elapsed):
+    for seconds in samples:
+        store.record("sig", seconds)
+
+    tracker = DurationTracker("production_job")
+    tracker.observe("sig", datetime.now(timezone.utc) - timedelta(seconds=elapsed))
+    return tracker
+
+
+def test_the_store_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("AIRFLOW__ANYSCALE__DURATION_STORE")
+
+    assert get_duration_store() is None
+    assert DurationTracker("production_job").delay_until_expected() is None
+
+
+def test_only_the_last_samples_are_kept(tmp_path, clock):
+    store = DurationStore(str(tmp_path / "durations.sqlite"), max_samples=3)
+
+    for seconds in (1, 2, 3, 4, 5):
+        store.record("sig", seconds)
+    store.record("other", 9)
+
+    assert sorted(store.samples("sig")) == [3, 4, 5]
+    assert store.samples("other") == [9]
+
+
+def test_expectations_are_the_median_and_p95(store):
+    tracker = _tracker(store, [40, 10, 100, 30, 20], elapsed=15)
+
+    assert (tracker.expected, tracker.p95) == (30, 100)
+    assert tracker.delay_until_expected() == pytest.approx((30 - 15) * 0.9, abs=0.5)
+
+
+def test_too_few_samples_give_no_expectation(store):
+    tracker = _tracker(store, [10, 20], elapsed=15)
+
+    assert tracker.expected is None
+    assert tracker.delay_until_expected() is None
+    assert tracker.is_slow() is False
+
+
+def test_no_delay_once_past_the_expected_end(store):
+    assert _tracker(store, [10, 10, 10], elapsed=15).delay_until_expected() is None
+
+
+def test_a_slow_run_is_flagged_once(store):
+    tracker = _tracker(store, [10, 20, 30], elapsed=5)
+    assert tracker.is_slow() is False
+
+    tracker.created_at -= timedelta(seconds=60)
+    assert tracker.is_slow() is True
+    assert tracker.is_slow() is False
+
+
+def test_record_adds_a_sample_for_the_observed_signature(store):
+    tracker = DurationTracker("production_job")
+    tracker.record(12)
+    tracker.observe("sig", None)
+    tracker.record(12)
+
+    assert store.samples("sig") == [12]
@@ -0,0 +1,55 @@
+import pytest
+from airflow.exceptions import AirflowFailException
+
+from anyscale_provider.utils.failures import (
+    CAPACITY, PREEMPTION, STOPPED, UNKNOWN, USER_ERROR, AnyscaleInfrastructureFailure, AnyscaleJobFailed,
+    AnyscaleJobStopped, AnyscaleUserCodeFailure, classify_failure, job_failure, read_tail)
+
+
+@pytest.mark.parametrize("error, log_tail, expected", [
+    ("Spot instance was terminated by the cloud provider", None, PREEMPTION),
+    ("node ip-10-0-0-1 was preempted", None, PREEMPTION),
+    ("job failed", "using preemptible instances for workers\nValueError: x", UNKNOWN),
+    ("InsufficientInstanceCapacity: no g5.xlarge available", None, CAPACITY),
+    ("ZONE_RESOURCE_POOL_EXHAUSTED", None, CAPACITY),
+    ("job failed", "ModuleNotFoundError: No module named 'torch'", USER_ERROR),
+    ("job failed", "python: can't open file '/home/ray/train.py'", USER_ERROR),
+    # the traceback of the code the lost node interrupted.
+    ("The node with node id abc has been marked dead",
+     "Traceback (most recent call last):\nImportError: x", PREEMPTION),
+    # a traceback alone may come from a transient error.
+    ("job failed", "Traceback (most recent call last):\nConnectionError: reset by peer", UNKNOWN),
+    ("job failed", "Traceback (most recent call last):\nValueError: bad value", UNKNOWN),
+    ("entrypoint exited with code 1", None, UNKNOWN),
+    (None, None, UNKNOWN),
+])
+def test_classify_failure(error, log_tail, expected):
+    assert classify_failure(error, log_tail) == expected
+
+
+def test_classify_failure_with_extra_patterns():
+    assert classify_failure("OOMKilled", patterns={"oom": ["OOMKilled"]}) == "oom"
+    assert classify_failure("disk full", patterns={CAPACITY: ["disk full"]}) == CAPACITY
+
+
+def test_job_failure_exceptions():
+    preempted = job_failure(PREEMPTION, "lost", "prodjob_1")
+    assert isinstance(preempted, AnyscaleInfrastructureFailure)
+    assert (preempted.failure_class, preempted.production_job_id) == (PREEMPTION, "prodjob_1")
+
+    user_error = job_failure(USER_ERROR, "bad code")
+    assert isinstance(user_error, AnyscaleUserCodeFailure)
+    assert isinstance(user_error, AirflowFailException)
+
+    stopped = job_failure(STOPPED, "terminated", "prodjob_1")
+    assert type(stopped) is AnyscaleJobStopped
+    assert not isinstance(stopped, AnyscaleInfrastructureFailure)
+
+    unknown = job_failure(UNKNOWN, "failed")
+    assert type(unknown) is AnyscaleJobFailed
+    assert not isinstance(unknown, AirflowFailException)
+
+
+def test_read_tail_keeps_the_end():
+    assert read_tail([b"a" * 10, b"b" * 10, "é".encode()], max_bytes=6) == "bbbbé"
+    assert read_tail([]) == ""
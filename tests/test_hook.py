@@ -0,0 +1,118 @@
+from unittest import mock
+
+import pytest
+from anyscale.sdk.anyscale_client.rest import ApiException
+
+from anyscale_provider.hooks import anyscale as hook_module
+from anyscale_provider.hooks.anyscale import AnyscaleHook, _SDKProxy
+from anyscale_provider.utils.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry
+
+NO_WAIT = RetryPolicy(attempts=3, initial_delay=0, max_delay=0)
+
+
+def test_explicit_zero_extras_are_kept(anyscale_connection):
+    anyscale_connection(
+        pool_maxsize=0, retry_attempts=0, retry_delay=0, retry_max_delay=0, circuit_threshold=0, circuit_reset=0)
+
+    hook = AnyscaleHook()
+
+    assert hook.pool_maxsize == 0
+    assert hook.retry_policy == RetryPolicy(attempts=0, initial_delay=0.0, max_delay=0.0)
+    assert (hook.circuit_threshold, hook.circuit_reset) == (0, 0.0)
+
+
+def test_missing_extras_fall_back_to_the_config(anyscale_connection, monkeypatch):
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__API_RETRY_ATTEMPTS", "7")
+
+    hook = AnyscaleHook()
+
+    assert hook.retry_policy.attempts == 7
+    assert hook.retry_policy.initial_delay == 1.0
+    assert hook.pool_maxsize == hook_module._DEFAULT_POOL_MAXSIZE
+
+
+def test_the_sdk_proxy_is_built_once_per_hook(anyscale_connection):
+    with mock.patch.object(hook_module, "get_sdk") as get_sdk:
+        hook = AnyscaleHook()
+
+        assert hook.sdk is hook.sdk is hook.get_conn()
+
+    get_sdk.assert_called_once()
+
+
+def test_idempotent_calls_are_retried():
+    sdk = mock.Mock()
+    sdk.get_cluster.side_effect = [ApiException(status=503), "cluster"]
+
+    assert _SDKProxy(sdk, None, retry_policy=NO_WAIT).get_cluster("ses_1") == "cluster"
+    assert sdk.get_cluster.call_count == 2
+
+
+def test_calls_creating_resources_are_not_retried():
+    sdk = mock.Mock()
+    sdk.create_cluster.side_effect = [ApiException(status=503), "cluster"]
+
+    with pytest.raises(ApiException):
+        _SDKProxy(sdk, None, retry_policy=NO_WAIT).create_cluster({})
+
+    assert sdk.create_cluster.call_count == 1
+
+
+def test_client_errors_are_not_retried():
+    call = mock.Mock(side_effect=ApiException(status=404))
+
+    with pytest.raises(ApiException):
+        call_with_retry("get_cluster", call, NO_WAIT)
+
+    assert call.call_count == 1
+
+
+def test_circuit_opens_after_the_threshold_and_lets_one_trial_through(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("anyscale_provider.utils.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    failing = mock.Mock(side_effect=ApiException(status=503))
+
+    with pytest.raises(ApiException):
+        call_with_retry("get_cluster", failing, NO_WAIT, breaker)
+
+    assert breaker.is_open and failing.call_count == 2
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry("get_cluster", failing, NO_WAIT, breaker)
+    assert failing.call_count == 2
+
+    now[0] = 31
+    assert call_with_retry("get_cluster", lambda: "cluster", NO_WAIT, breaker) == "cluster"
+    assert not breaker.is_open
+
+
+def test_local_errors_do_not_close_the_circuit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("anyscale_provider.utils.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    with pytest.raises(ApiException):
+        call_with_retry("get_cluster", mock.Mock(side_effect=ApiException(status=503)), NO_WAIT, breaker)
+
+    now[0] = 31
+    with pytest.raises(TypeError):
+        call_with_retry("get_cluster", mock.Mock(side_effect=TypeError("bad argument")), NO_WAIT, breaker)
+
+    # still open, but the next call is let through as a trial.
+    assert breaker.is_open
+    assert call_with_retry("get_cluster", lambda: "cluster", NO_WAIT, breaker) == "cluster"
+    assert not breaker.is_open
+
+
+def test_local_errors_do_not_reset_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=4, reset_timeout=30)
+
+    with pytest.raises(ApiException):
+        call_with_retry("get_cluster", mock.Mock(side_effect=ApiException(status=503)), NO_WAIT, breaker)
+    with pytest.raises(ValueError):
+        call_with_retry("get_cluster", mock.Mock(side_effect=ValueError("bad id")), NO_WAIT, breaker)
+    with pytest.raises(ApiException):
+        call_with_retry("create_cluster", mock.Mock(side_effect=ApiException(status=503)), NO_WAIT, breaker)
+
+    assert breaker.is_open
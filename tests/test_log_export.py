@@ -0,0 +1,65 @@
+import gzip
+import json
+
+import pytest
+from airflow.exceptions import AirflowException
+
+from anyscale_provider.utils.log_export import LogExport, iter_json_string
+
+LOGS = 'épöch 1 "loss" \\ 0.5\n\ttab ☃ \U0001F600 done\n'
+DOCUMENT = json.dumps({"result": {"logs": LOGS, "other": "x"}}).encode()
+DOCUMENT_UTF8 = json.dumps({"result": {"logs": LOGS}}, ensure_ascii=False).encode()
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("document", [DOCUMENT, DOCUMENT_UTF8], ids=["escaped", "utf8"])
+def test_logs_are_decoded_whatever_the_chunk_boundaries(document):
+    for size in range(1, len(document) + 1):
+        assert "".join(iter_json_string(_chunks(document, size))) == LOGS, size
+
+
+def test_an_escaped_backslash_before_u_is_not_a_surrogate():
+    logs = "C:\\ud800\\x \U0001F600"
+    document = json.dumps({"logs": logs}).encode()
+
+    for size in range(1, len(document) + 1):
+        assert "".join(iter_json_string(_chunks(document, size))) == logs, size
+
+
+def test_a_document_cut_in_the_logs_fails():
+    with pytest.raises(AirflowException, match="middle of the logs"):
+        list(iter_json_string(_chunks(DOCUMENT[:40], 7)))
+
+
+def test_a_document_without_logs_yields_nothing():
+    assert list(iter_json_string([b'{"result": {"error": "none"}}'])) == []
+
+
+def test_export_compresses_and_summarizes(tmp_path):
+    export = LogExport(directory=str(tmp_path), summary_lines=2)
+    path = export.path("dag", "task", "prodjob_1")
+
+    summary = export.export(path, _chunks(b"one\ntwo\nthree\nfour", 3))
+
+    assert path == "dag/task/prodjob_1.log.gz"
+    assert gzip.decompress((tmp_path / path).read_bytes()) == b"one\ntwo\nthree\nfour"
+    assert (summary.bytes, summary.lines, summary.truncated) == (18, 4, False)
+    assert summary.tail == ["three", "four"]
+    assert summary.compressed_bytes == (tmp_path / path).stat().st_size
+
+
+def test_export_stops_at_max_bytes(tmp_path):
+    export = LogExport(directory=str(tmp_path), compression=None, max_bytes=5)
+
+    summary = export.export("job.log", [b"abc\n", b"def\n", b"ghi\n"])
+
+    assert summary.truncated and summary.bytes == 5
+    assert (tmp_path / "job.log").read_bytes() == b"abc\nd\n[truncated after 5 bytes]\n"
+
+
+def test_unknown_compression_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        LogExport(directory=str(tmp_path), compression="brotli")
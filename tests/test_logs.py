@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from anyscale_provider.sensors.production_jobs import AnyscaleProductionJobSensor
+from anyscale_provider.utils.logs import LogTailer
+from tests.test_production_jobs import _job
+
+
+def test_feed_yields_only_new_complete_lines():
+    tailer = LogTailer()
+
+    assert list(tailer.feed("a\nb\npar")) == ["a", "b"]
+    assert list(tailer.feed("a\nb\npartial\nc\n")) == ["partial", "c"]
+    assert list(tailer.feed("a\nb\npartial\nc\n")) == []
+    assert tailer.offset == len("a\nb\npartial\nc\n")
+
+
+def test_flush_yields_the_trailing_partial_line():
+    tailer = LogTailer()
+
+    assert list(tailer.feed("a\nlast")) == ["a"]
+    assert list(tailer.flush()) == ["last"]
+    assert list(tailer.flush()) == []
+
+
+def test_a_shorter_log_starts_over():
+    tailer = LogTailer()
+    list(tailer.feed("first run\nmore\n"))
+
+    assert list(tailer.feed("second\n")) == ["second"]
+
+
+def test_tail_keeps_at_most_max_bytes():
+    tailer = LogTailer(max_bytes=10)
+
+    list(tailer.feed("aaaa\nbbbb\ncccc\n"))
+
+    assert tailer.tail == ["bbbb", "cccc"]
+
+
+def test_a_partial_line_longer_than_max_bytes_is_not_held_back():
+    tailer = LogTailer(max_bytes=4)
+
+    assert list(tailer.feed("abcdefgh")) == ["abcdefgh"]
+    assert list(tailer.flush()) == []
+
+
+def test_sensor_streams_new_lines_on_every_poke(sdk, context):
+    sensor = AnyscaleProductionJobSensor(task_id="wait", production_job_id="prodjob_1", stream_logs=True)
+    states = iter(["RUNNING", "SUCCESS"])
+    logs = iter(["step 1\nstep", "step 1\nstep 2\ndone"])
+
+    sdk.get_production_job.side_effect = lambda production_job_id: SimpleNamespace(
+        result=_job(production_job_id, next(states)))
+    sdk.get_production_job_logs.side_effect = lambda production_job_id: SimpleNamespace(
+        result=SimpleNamespace(logs=next(logs)))
+
+    assert sensor.poke(context) is False
+    assert sensor.log_tailer.tail == ["step 1"]
+
+    assert sensor.poke(context) is True
+    assert sensor.log_tailer.tail == ["step 1", "step 2", "done"]
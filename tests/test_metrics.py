@@ -0,0 +1,28 @@
+from unittest import mock
+
+from anyscale_provider.utils import metrics
+
+
+def test_poll_metric_name_does_not_hold_the_task():
+    with mock.patch.object(metrics, "Stats") as stats:
+        metrics.record_poll("production_job", "dag", "task")
+
+    stats.incr.assert_called_once_with(
+        "anyscale.production_job.polls",
+        tags={"kind": "production_job", "dag_id": "dag", "task_id": "task"})
+
+
+def test_otel_attributes_match_the_tags(monkeypatch):
+    monkeypatch.setattr(metrics, "_otel_enabled", lambda: True)
+    counter = mock.Mock()
+
+    with mock.patch.object(metrics, "Stats"), \
+            mock.patch.object(metrics, "_instrument", return_value=counter) as instrument:
+        metrics.record_poll("cluster", "dag", "task")
+
+    instrument.assert_called_once_with("counter", "anyscale.polls", "1")
+    counter.add.assert_called_once_with(1, {"kind": "cluster", "dag_id": "dag", "task_id": "task"})
+
+
+def test_stat_names_are_sanitized():
+    assert metrics._stat("api", "get cluster/1", "errors") == "anyscale.api.get_cluster_1.errors"
@@ -0,0 +1,194 @@
+from unittest import mock
+
+import pytest
+from airflow.exceptions import TaskDeferralError, TaskDeferred
+
+from anyscale_provider.operators.session_command import AnyscaleCreateSessionCommandOperator
+from anyscale_provider.sensors.session_command import AnyscaleSessionCommandSensor
+from anyscale_provider.utils.timeline import SUBMITTED, TIMELINE_XCOM_KEY
+
+
+def _operator(**kwargs):
+    return AnyscaleCreateSessionCommandOperator(
+        task_id="task",
+        session_id="ses_1",
+        shell_command="python train.py",
+        wait_for_completion=True,
+        deferrable=True,
+        **kwargs,
+    )
+
+
+def test_resume_merges_the_timelines_of_the_task_and_the_trigger(sdk, state_store, context):
+    operator = _operator()
+
+    operator.resume_execution("execute_complete", {
+        "timeline": {"resources": {"scmd_1": {"kind": "session_command", "events": [[SUBMITTED, 1]]}}},
+        "event": {
+            "status": "success",
+            "session_command_id": "scmd_1",
+            "message": "done",
+            "timeline": {"resources": {"scmd_1": {"kind": "session_command", "events": [["0", 5]]}}},
+        },
+    }, context)
+
+    assert operator._timeline.to_dict()["resources"]["scmd_1"]["events"] == [[SUBMITTED, 1], ["0", 5]]
+
+    operator.post_execute(context)
+    assert context["ti"].xcom[TIMELINE_XCOM_KEY]["resources"]["scmd_1"]["events"][0] == [SUBMITTED, 1]
+
+
+RUNNING_KEY = "anyscale_running:dag:task:run:-1"
+
+
+def test_defer_records_the_running_resources(sdk, state_store, context):
+    sdk.create_session_command.return_value.result = mock.Mock(
+        id="scmd_1", to_dict=lambda: {"id": "scmd_1"})
+
+    with pytest.raises(TaskDeferred) as deferred:
+        _operator().execute(context)
+
+    assert state_store.get(RUNNING_KEY) == [["session_command", "scmd_1"]]
+    assert set(deferred.value.kwargs) == {"timeline"}
+
+
+def test_trigger_timeout_cancels_the_running_resources(sdk, state_store, context):
+    state_store.put(RUNNING_KEY, [["session_command", "scmd_1"]])
+
+    with mock.patch("anyscale_provider.operators.base.stop_resources", return_value=[]) as stop:
+        with pytest.raises(TaskDeferralError):
+            _operator().resume_execution("__fail__", {"error": "Trigger timeout"}, context)
+
+    assert stop.call_args.args[1] == [("session_command", "scmd_1")]
+    assert state_store.get(RUNNING_KEY) is None
+
+
+def test_kill_while_resumed_still_cancels(sdk, state_store, context, monkeypatch):
+    state_store.put(RUNNING_KEY, [["session_command", "scmd_1"]])
+    operator = _operator()
+
+    def execute_complete(sensor, context, event):
+        # the task is killed while it handles the event.
+        assert state_store.get(RUNNING_KEY) is not None
+
+        with mock.patch("anyscale_provider.operators.base.stop_resources", return_value=[]) as stop:
+            operator.on_kill()
+
+        assert stop.call_args.args[1] == [("session_command", "scmd_1")]
+
+    monkeypatch.setattr(AnyscaleSessionCommandSensor, "execute_complete", execute_complete)
+
+    operator.resume_execution("execute_complete", {
+        "event": {"status": "success", "session_command_id": "scmd_1", "message": "done"},
+    }, context)
+
+    assert state_store.get(RUNNING_KEY) is None
+
+
+def test_failed_resume_drops_the_record(sdk, state_store, context):
+    state_store.put(RUNNING_KEY, [["session_command", "scmd_1"]])
+
+    with pytest.raises(Exception, match="exited with 1"):
+        _operator().resume_execution("execute_complete", {
+            "event": {"status": "error", "session_command_id": "scmd_1", "message": "exited with 1"},
+        }, context)
+
+    assert state_store.get(RUNNING_KEY) is None
+
+
+SUBMISSION_KEY = "anyscale_submission:dag:task:run:-1"
+
+
+def _production_job_operator(**kwargs):
+    from tests.test_production_jobs import _operator as production_job_operator
+
+    return production_job_operator(**kwargs)
+
+
+def _previous_try(state_store, resource_id):
+    state_store.put(SUBMISSION_KEY, {"id": resource_id, "try_number": 1, "submitted_at": 0})
+
+
+def test_a_later_try_re_attaches_to_the_submitted_job(sdk, state_store, context):
+    from tests.test_production_jobs import _job, _programme
+
+    _programme(sdk, [_job("prodjob_1", "SUCCESS")])
+    _previous_try(state_store, "prodjob_1")
+
+    _production_job_operator().execute(context)
+
+    sdk.create_job.assert_not_called()
+    assert state_store.get(SUBMISSION_KEY) is None
+
+
+@pytest.mark.parametrize("previous", ["missing", "failed"])
+def test_a_job_that_is_gone_or_failed_is_submitted_again(sdk, state_store, context, previous):
+    from anyscale.sdk.anyscale_client.rest import ApiException
+    from tests.test_production_jobs import _job, _programme
+
+    _programme(sdk, [_job("prodjob_2", "SUCCESS")])
+    get_production_job = sdk.get_production_job.side_effect
+
+    def get(production_job_id):
+        if production_job_id != "prodjob_1":
+            return get_production_job(production_job_id)
+
+        if previous == "missing":
+            raise ApiException(status=404)
+
+        return mock.Mock(result=_job("prodjob_1", "ERRORED"))
+
+    sdk.get_production_job.side_effect = get
+    _previous_try(state_store, "prodjob_1")
+
+    _production_job_operator().execute(context)
+
+    sdk.create_job.assert_called_once()
+    assert state_store.get(SUBMISSION_KEY) is None
+
+
+def test_a_command_that_exited_with_an_error_is_run_again(sdk, state_store, context):
+    sdk.get_session_command.return_value.result = mock.Mock(id="scmd_1", status_code=1)
+    sdk.create_session_command.return_value.result = mock.Mock(
+        id="scmd_2", to_dict=lambda: {"id": "scmd_2"})
+    _previous_try(state_store, "scmd_1")
+
+    AnyscaleCreateSessionCommandOperator(
+        task_id="task", session_id="ses_1", shell_command="python train.py").execute(context)
+
+    sdk.create_session_command.assert_called_once()
+    assert context["ti"].xcom["id"] == "scmd_2"
+
+
+def test_submissions_are_not_resumed_when_disabled(sdk, state_store, context):
+    from tests.test_production_jobs import _job, _programme
+
+    _programme(sdk, [_job("prodjob_2", "SUCCESS")])
+    _previous_try(state_store, "prodjob_1")
+
+    _production_job_operator(resume_submissions=False).execute(context)
+
+    sdk.create_job.assert_called_once()
+    assert [call.kwargs["production_job_id"] for call in sdk.get_production_job.call_args_list] == \
+        ["prodjob_2"] * sdk.get_production_job.call_count
+    assert state_store.get(SUBMISSION_KEY)["id"] == "prodjob_1"
+
+
+def test_the_submission_is_kept_while_deferred_and_cleared_on_success(sdk, state_store, context):
+    from tests.test_production_jobs import _job, _programme
+
+    _programme(sdk, [_job("prodjob_1")])
+    operator = _production_job_operator(deferrable=True)
+
+    with pytest.raises(TaskDeferred):
+        operator.execute(context)
+
+    assert state_store.get(SUBMISSION_KEY)["id"] == "prodjob_1"
+    assert state_store.get(SUBMISSION_KEY)["try_number"] == 1
+
+    operator.resume_execution("execute_complete", {
+        "resubmissions": 0,
+        "event": {"status": "success", "production_job_id": "prodjob_1", "message": "done"},
+    }, context)
+
+    assert state_store.get(SUBMISSION_KEY) is None
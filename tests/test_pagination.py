@@ -0,0 +1,68 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from anyscale_provider.hooks.anyscale import AnyscaleHook
+from anyscale_provider.utils.pagination import paginate
+
+PAGES = {None: ([1, 2], "p2"), "p2": ([3, 4], "p3"), "p3": ([5], None)}
+
+
+def _page(results, next_paging_token):
+    return SimpleNamespace(results=results, metadata=SimpleNamespace(next_paging_token=next_paging_token))
+
+
+def _fetch_page(requested):
+    def fetch_page(paging_token):
+        requested.append(paging_token)
+        return _page(*PAGES[paging_token])
+
+    return fetch_page
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_every_page_is_yielded_in_order(prefetch):
+    requested = []
+
+    assert list(paginate(_fetch_page(requested), prefetch=prefetch)) == [1, 2, 3, 4, 5]
+    assert requested == [None, "p2", "p3"]
+
+
+def test_pages_are_only_fetched_as_needed_without_prefetch():
+    requested = []
+    results = paginate(_fetch_page(requested), prefetch=False)
+
+    assert next(results) == 1
+    assert requested == [None]
+
+
+def test_prefetch_requests_the_next_page_while_the_current_one_is_read():
+    prefetched = threading.Event()
+
+    def fetch_page(paging_token):
+        if paging_token == "p2":
+            prefetched.set()
+        return _page(*PAGES[paging_token])
+
+    results = paginate(fetch_page, prefetch=True)
+
+    assert next(results) == 1
+    assert prefetched.wait(5)
+    results.close()
+
+
+def test_iter_clusters_passes_filters_and_paging_tokens(sdk):
+    sdk.search_clusters.side_effect = lambda clusters_query: _page(
+        *{None: (["ses_1"], "p2"), "p2": (["ses_2"], None)}[clusters_query["paging"].get("paging_token")])
+
+    clusters = list(AnyscaleHook().iter_clusters(
+        project_id="prj_1", name_contains="warm", state_filter=["Running"], page_size=1, prefetch=False))
+
+    assert clusters == ["ses_1", "ses_2"]
+    queries = [call.kwargs["clusters_query"] for call in sdk.search_clusters.call_args_list]
+    assert queries == [
+        {"paging": {"count": 1}, "project_id": "prj_1", "name": {"contains": "warm"}, "state_filter": ["Running"]},
+        {"paging": {"count": 1, "paging_token": "p2"}, "project_id": "prj_1",
+         "name": {"contains": "warm"}, "state_filter": ["Running"]},
+    ]
@@ -0,0 +1,42 @@
+import pytest
+
+from anyscale_provider.utils.poll_policy import CLUSTER_POLL_POLICY, PollPolicy
+
+
+def test_delay_grows_up_to_the_maximum():
+    policy = PollPolicy(initial_delay=5, multiplier=2, max_delay=30, jitter=0)
+
+    assert [policy.next_delay(attempt) for attempt in range(5)] == [5, 10, 20, 30, 30]
+
+
+def test_state_delays_override_the_backoff():
+    assert CLUSTER_POLL_POLICY.next_delay(10, "StartingUp") == pytest.approx(10, rel=0.1)
+
+    policy = PollPolicy(jitter=0, state_delays={"Running": 1})
+    assert policy.next_delay(3, "Running") == 1
+    assert policy.next_delay(3, "Terminated") == 40
+
+
+def test_jitter_stays_within_bounds():
+    policy = PollPolicy(initial_delay=10, max_delay=10, jitter=0.2)
+    delays = [policy.next_delay(0) for _ in range(200)]
+
+    assert all(8 <= delay <= 12 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_serialization_round_trip():
+    policy = PollPolicy(initial_delay=1, multiplier=3, max_delay=9, jitter=0.5, state_delays={"A": 2})
+
+    assert PollPolicy.from_dict(policy.to_dict()).to_dict() == policy.to_dict()
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"initial_delay": 0},
+    {"initial_delay": 10, "max_delay": 5},
+    {"multiplier": 0.5},
+    {"jitter": 1},
+])
+def test_invalid_policies(kwargs):
+    with pytest.raises(ValueError):
+        PollPolicy(**kwargs)
@@ -0,0 +1,302 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from airflow.exceptions import AirflowException, AirflowFailException, TaskDeferred
+from airflow.triggers.temporal import TimeDeltaTrigger
+
+from anyscale_provider.operators.production_jobs import (
+    AnyscaleCreateProductionJobOperator, AnyscaleCreateProductionJobsBatchOperator)
+from anyscale_provider.sensors.production_jobs import AnyscaleProductionJobSensor
+from anyscale_provider.triggers.production_jobs import AnyscaleProductionJobTrigger
+from anyscale_provider.utils import PollPolicy
+from anyscale_provider.utils.failures import (
+    CAPACITY, PREEMPTION, AnyscaleInfrastructureFailure, AnyscaleJobFailed, AnyscaleJobStopped,
+    AnyscaleUserCodeFailure)
+
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _job(job_id, current_state="RUNNING", error=None):
+    return SimpleNamespace(
+        id=job_id,
+        name="train",
+        project_id="prj_1",
+        created_at=CREATED_AT,
+        last_job_run_id=None,
+        config=SimpleNamespace(entrypoint="python train.py", compute_config_id="cpt_1", build_id="bld_1"),
+        state=SimpleNamespace(
+            production_job_id=job_id,
+            current_state=current_state,
+            goal_state="SUCCESS",
+            state_transitioned_at=CREATED_AT + timedelta(minutes=5),
+            operation_message=None,
+            error=error,
+        ),
+        to_dict=lambda: {"id": job_id},
+    )
+
+
+def _programme(sdk, jobs):
+    """Each create_job call creates the next job, each get returns its final state."""
+    created = iter(jobs)
+    by_id = {job.id: job for job in jobs}
+
+    sdk.create_job.side_effect = lambda create: SimpleNamespace(result=_job(next(created).id))
+    sdk.get_production_job.side_effect = lambda production_job_id: SimpleNamespace(
+        result=by_id[production_job_id])
+
+
+def _sensor(**kwargs):
+    return AnyscaleProductionJobSensor(task_id="wait", production_job_id="prodjob_1", **kwargs)
+
+
+def _operator(**kwargs):
+    return AnyscaleCreateProductionJobOperator(
+        task_id="task",
+        name="train",
+        project_id="prj_1",
+        entrypoint="python train.py",
+        cluster_environment_build_id="bld_1",
+        compute_config_id="cpt_spot",
+        fallback_compute_config_id="cpt_on_demand",
+        wait_for_completion=True,
+        **kwargs,
+    )
+
+
+def test_sensor_raises_infrastructure_failures(sdk, context):
+    _programme(sdk, [_job("prodjob_1", "OUT_OF_RETRIES", "spot instance was preempted")])
+
+    with pytest.raises(AnyscaleInfrastructureFailure) as failure:
+        _sensor().poke(context)
+
+    assert (failure.value.failure_class, failure.value.production_job_id) == (PREEMPTION, "prodjob_1")
+
+
+def test_sensor_fails_fast_on_user_errors_found_in_the_log(sdk, context):
+    _programme(sdk, [_job("prodjob_1", "ERRORED", "job failed")])
+
+    with mock.patch("anyscale_provider.hooks.anyscale.AnyscaleHook.iter_job_log_chunks",
+                    return_value=iter([b"ModuleNotFoundError: No module named 'torch'\n"])):
+        with pytest.raises(AnyscaleUserCodeFailure) as failure:
+            _sensor().poke(context)
+
+    assert isinstance(failure.value, AirflowFailException)
+
+
+def test_sensor_keeps_retries_for_unknown_failures(sdk, context):
+    _programme(sdk, [_job("prodjob_1", "ERRORED", "job failed")])
+
+    with mock.patch("anyscale_provider.hooks.anyscale.AnyscaleHook.iter_job_log_chunks",
+                    return_value=iter([b"Traceback (most recent call last):\nValueError: x\n"])):
+        with pytest.raises(AnyscaleJobFailed) as failure:
+            _sensor().poke(context)
+
+    assert not isinstance(failure.value, AirflowFailException)
+
+
+def test_sensor_without_classification(sdk, context):
+    _programme(sdk, [_job("prodjob_1", "ERRORED", "ModuleNotFoundError")])
+
+    with pytest.raises(AirflowException) as failure:
+        _sensor(classify_failures=False).poke(context)
+
+    assert type(failure.value) is AirflowException
+
+
+def test_operator_resubmits_infrastructure_failures(sdk, state_store, context):
+    _programme(sdk, [
+        _job("prodjob_1", "OUT_OF_RETRIES", "InsufficientInstanceCapacity"),
+        _job("prodjob_2", "SUCCESS"),
+    ])
+
+    _operator(max_resubmissions=2, resubmit_delay=0).execute(context)
+
+    configs = [call.args[0].config["compute_config_id"] for call in sdk.create_job.call_args_list]
+    assert configs == ["cpt_spot", "cpt_on_demand"]
+    assert context["ti"].xcom["id"] == "prodjob_2"
+    assert state_store.scan("anyscale_resource:") == {}
+
+
+def test_operator_gives_up_after_max_resubmissions(sdk, state_store, context):
+    _programme(sdk, [
+        _job("prodjob_1", "OUT_OF_RETRIES", "spot instance was preempted"),
+        _job("prodjob_2", "OUT_OF_RETRIES", "spot instance was preempted"),
+    ])
+
+    with pytest.raises(AnyscaleInfrastructureFailure):
+        _operator(max_resubmissions=1, resubmit_delay=0).execute(context)
+
+    assert sdk.create_job.call_count == 2
+
+
+def test_operator_does_not_resubmit_user_errors(sdk, state_store, context):
+    _programme(sdk, [_job("prodjob_1", "ERRORED", "SyntaxError: invalid syntax")])
+
+    with pytest.raises(AnyscaleUserCodeFailure):
+        _operator(max_resubmissions=2, resubmit_delay=0).execute(context)
+
+    assert sdk.create_job.call_count == 1
+
+
+def test_operator_does_not_resubmit_terminated_jobs(sdk, state_store, context):
+    # a job stopped by the run's teardown, whose nodes died on the way.
+    _programme(sdk, [_job("prodjob_1", "TERMINATED", "The node has been marked dead")])
+
+    with mock.patch("anyscale_provider.hooks.anyscale.AnyscaleHook.iter_job_log_chunks",
+                    return_value=iter([b"ray.exceptions.NodeDiedError: node died\n"])):
+        with pytest.raises(AnyscaleJobStopped):
+            _operator(max_resubmissions=2, resubmit_delay=0).execute(context)
+
+    assert sdk.create_job.call_count == 1
+
+
+def test_deferred_operator_does_not_resubmit_terminated_jobs(sdk, state_store, context):
+    with pytest.raises(AnyscaleJobStopped):
+        _operator(max_resubmissions=2, deferrable=True).resume_execution("execute_complete", {
+            "resubmissions": 0,
+            "event": {
+                "status": "error",
+                "production_job_id": "prodjob_1",
+                "state": "TERMINATED",
+                "error": "NodeDiedError",
+                "message": "job ended with status TERMINATED",
+            },
+        }, context)
+
+
+def test_deferred_operator_resubmits_after_a_backoff(sdk, state_store, context):
+    _programme(sdk, [_job("prodjob_1"), _job("prodjob_2")])
+    operator = _operator(max_resubmissions=2, resubmit_delay=30, deferrable=True)
+
+    with pytest.raises(TaskDeferred) as deferred:
+        operator.execute(context)
+
+    waiting = deferred.value
+    assert isinstance(waiting.trigger, AnyscaleProductionJobTrigger)
+    assert waiting.kwargs["resubmissions"] == 0
+
+    # the trigger saw the job fail.
+    with pytest.raises(TaskDeferred) as deferred:
+        operator.resume_execution("execute_complete", dict(waiting.kwargs, event={
+            "status": "error",
+            "production_job_id": "prodjob_1",
+            "state": "OUT_OF_RETRIES",
+            "error": "spot instance was preempted",
+            "message": "job ended with status OUT_OF_RETRIES",
+        }), context)
+
+    backoff = deferred.value
+    assert isinstance(backoff.trigger, TimeDeltaTrigger)
+    assert backoff.method_name == "execute_resubmit"
+    assert backoff.kwargs["resubmissions"] == 1
+    assert state_store.get("anyscale_running:dag:task:run:-1") is None
+
+    # the backoff is over: the TimeDeltaTrigger's event is a datetime.
+    with pytest.raises(TaskDeferred) as deferred:
+        _operator(max_resubmissions=2, resubmit_delay=30, deferrable=True).resume_execution(
+            "execute_resubmit", dict(backoff.kwargs, event=datetime.now(timezone.utc)), context)
+
+    assert isinstance(deferred.value.trigger, AnyscaleProductionJobTrigger)
+    assert deferred.value.trigger.production_job_id == "prodjob_2"
+    assert deferred.value.kwargs["resubmissions"] == 1
+    assert sdk.create_job.call_args.args[0].config["compute_config_id"] == "cpt_on_demand"
+
+
+def test_deferred_operator_fails_once_out_of_resubmissions(sdk, state_store, context):
+    with pytest.raises(AnyscaleInfrastructureFailure) as failure:
+        _operator(max_resubmissions=1, deferrable=True).resume_execution("execute_complete", {
+            "resubmissions": 1,
+            "event": {
+                "status": "error",
+                "production_job_id": "prodjob_2",
+                "state": "ERRORED",
+                "error": "InsufficientInstanceCapacity",
+                "message": "job ended with status ERRORED",
+            },
+        }, context)
+
+    assert failure.value.failure_class == CAPACITY
+
+
+def _batch_operator(**kwargs):
+    return AnyscaleCreateProductionJobsBatchOperator(
+        task_id="task",
+        jobs=[{"name": name, "entrypoint": f"python {name}.py"} for name in ("a", "bad", "c")],
+        project_id="prj_1",
+        cluster_environment_build_id="bld_1",
+        **kwargs,
+    )
+
+
+def test_batch_cancels_the_created_jobs_when_a_submission_fails(sdk, state_store, context):
+    from anyscale.sdk.anyscale_client.rest import ApiException
+
+    def create_job(create):
+        if create.name == "bad":
+            raise ApiException(status=500)
+
+        return SimpleNamespace(result=_job(f"prodjob_{create.name}"))
+
+    sdk.create_job.side_effect = create_job
+    sdk.get_production_job.side_effect = lambda production_job_id: SimpleNamespace(
+        result=_job(production_job_id))
+    operator = _batch_operator(register_resources=True)
+
+    with pytest.raises(AirflowException, match="1 of 3 production_jobs could not be created"):
+        operator.execute(context)
+
+    terminated = {call.kwargs["production_job_id"] for call in sdk.terminate_job.call_args_list}
+    assert terminated == {"prodjob_a", "prodjob_c"}
+    assert operator._running == []
+
+    rows = context["ti"].xcom["return_value"]
+    assert [(row["name"], row["id"]) for row in rows] == [
+        ("a", "prodjob_a"), ("bad", None), ("c", "prodjob_c")]
+    assert rows[1]["error"] and rows[0]["error"] is None
+
+    # left to the run's teardown, which sees them stopped.
+    registered = {record["id"]: record["scope"] for record in state_store.scan("anyscale_resource:").values()}
+    assert registered == {"prodjob_a": "prj_1", "prodjob_c": "prj_1"}
+
+
+def test_batch_registers_and_unregisters_every_job(sdk, state_store, context):
+    jobs = [_job("prodjob_a", "SUCCESS"), _job("prodjob_bad", "SUCCESS"), _job("prodjob_c", "SUCCESS")]
+    _programme(sdk, jobs)
+    operator = _batch_operator(
+        wait_for_completion=True, register_resources=True,
+        poll_policy=PollPolicy(initial_delay=0.001, max_delay=0.001))
+    operator.hook.batch_fetch = lambda kind, scope, wanted, fetch_one: {
+        job_id: fetch_one(job_id) for job_id in wanted}
+
+    rows = operator.execute(context)
+
+    assert [row["state"] for row in rows] == ["SUCCESS"] * 3
+    assert state_store.scan("anyscale_resource:") == {}
+    assert operator._running == []
+
+
+def test_batch_spaces_submissions(sdk, state_store, context):
+    _programme(sdk, [_job("prodjob_a"), _job("prodjob_bad"), _job("prodjob_c")])
+
+    with mock.patch("anyscale_provider.operators.production_jobs.TokenBucket") as bucket:
+        _batch_operator(max_submissions_per_second=2).execute(context)
+
+    bucket.assert_called_once_with(2, capacity=1)
+    assert bucket.return_value.acquire.call_count == 3
+
+
+def test_batch_can_be_mapped_over_job_lists():
+    from airflow.models.dag import DAG
+
+    batches = [[{"name": "a", "entrypoint": "python a.py"}], [{"name": "b", "entrypoint": "python b.py"}]]
+
+    with DAG("batches", start_date=CREATED_AT, schedule=None):
+        mapped = AnyscaleCreateProductionJobsBatchOperator.partial(
+            task_id="submit", project_id="prj_1", cluster_environment_build_id="bld_1",
+        ).expand(jobs=batches)
+
+    assert mapped.expand_input.value == {"jobs": batches}
+    assert mapped.partial_kwargs["project_id"] == "prj_1"
@@ -0,0 +1,73 @@
+import pytest
+
+from anyscale_provider.utils import rate_limit as rate_limit_module
+from anyscale_provider.utils.rate_limit import TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit_module, "time", clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_waits_for_refills(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [0.5]
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.now += 100
+
+    for _ in range(2):
+        bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == [1.0]
+
+
+def test_buckets_on_the_same_file_share_their_tokens(clock, tmp_path):
+    path = str(tmp_path / "bucket")
+    TokenBucket(rate=1, capacity=1, path=path).acquire()
+
+    TokenBucket(rate=1, capacity=1, path=path).acquire()
+    assert clock.slept == [1.0]
+
+
+def test_bucket_of_one_spaces_calls(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+
+    for _ in range(3):
+        bucket.acquire()
+
+    assert clock.slept == [0.25, 0.25]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
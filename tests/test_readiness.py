@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from airflow.exceptions import AirflowException
+
+from anyscale_provider.operators.services import AnyscaleApplyServiceOperator
+from anyscale_provider.utils import ReadinessProbe
+
+web = pytest.importorskip("aiohttp.web")
+
+
+class FakeService:
+    """A healthcheck endpoint answering with the next ``(status, delay)`` of ``responses``."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def healthcheck(self, request):
+        status, delay = self.responses[min(len(self.requests), len(self.responses) - 1)]
+        self.requests.append(request.headers.get("Authorization"))
+
+        await asyncio.sleep(delay)
+        return web.Response(status=status)
+
+
+@pytest.fixture
+def serve():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runners = []
+
+    def serve(*responses):
+        service = FakeService(responses)
+
+        async def start():
+            app = web.Application()
+            app.router.add_get("/healthz", service.healthcheck)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            runners.append(runner)
+            return runner.addresses[0][1]
+
+        port = asyncio.run_coroutine_threadsafe(start(), loop).result(5)
+        service.url = f"http://127.0.0.1:{port}/healthz"
+        return service
+
+    yield serve
+
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+OK, FAILED = (200, 0), (500, 0)
+
+
+def _probe(**kwargs):
+    options = {"successes": 3, "concurrency": 1, "interval": 0, "timeout": 5}
+    options.update(kwargs)
+    return ReadinessProbe(**options)
+
+
+def test_ready_after_consecutive_successes(serve):
+    service = serve(OK)
+
+    readiness = _probe().run(service.url, "token")
+
+    assert readiness["probes"] == 3
+    assert len(readiness["latencies"]) == 3
+    assert service.requests == ["Bearer token"] * 3
+
+
+@pytest.mark.parametrize("bad", [FAILED, (200, 0.3)], ids=["failed", "slow"])
+def test_a_failed_or_slow_probe_starts_the_count_over(serve, bad):
+    service = serve(OK, OK, bad, OK, OK, OK)
+
+    readiness = _probe(max_latency=0.2).run(service.url)
+
+    assert readiness["probes"] == 6
+    assert service.requests[0] is None
+
+
+def test_gives_up_after_the_timeout(serve):
+    service = serve(FAILED)
+
+    with pytest.raises(AirflowException, match="was not ready after 0.2s"):
+        _probe(timeout=0.2, interval=0.05).run(service.url)
+
+    assert len(service.requests) > 1
+
+
+def test_the_service_operator_pushes_the_readiness(serve, sdk, context):
+    service = serve(OK)
+    sdk.get_service.return_value = SimpleNamespace(result=SimpleNamespace(
+        url=service.url[:-len("/healthz")] + "/", healthcheck_url=None, token="token"))
+
+    operator = AnyscaleApplyServiceOperator(
+        task_id="task", name="svc", project_id="prj_1", entrypoint="serve run app:app",
+        healthcheck_url="/healthz", readiness_probe=_probe())
+    operator._wait_until_ready("service_1", context)
+
+    assert context["ti"].xcom["readiness"]["probes"] == 3
+    assert service.requests == ["Bearer token"] * 3
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from anyscale_provider.operators.cluster import AnyscaleStartClusterOperator
+from anyscale_provider.utils import state_store as state_store_module
+from anyscale_provider.utils.registry import AnyscaleRunRegistry
+
+
+def test_short_key_parts_are_kept():
+    assert state_store_module.key_part("scheduled__2024-01-01T00:00:00+00:00") == \
+        "scheduled__2024-01-01T00:00:00+00:00"
+
+
+def test_long_key_parts_are_hashed_so_keys_fit_the_variable_table():
+    dag_id, run_id = "d" * 250, "r" * 250
+    registry = AnyscaleRunRegistry(mock.Mock(), dag_id, run_id)
+
+    key = registry._key("production_job", "prodjob_" + "x" * 200)
+
+    assert len(key) <= 250
+    assert key.startswith(registry._prefix())
+    assert state_store_module.key_part(dag_id) != state_store_module.key_part("d" * 249 + "e")
+
+
+def test_scan_prefix_escapes_like_wildcards():
+    assert state_store_module._like_prefix("anyscale_pool__a%b\\c") == \
+        "anyscale\\_pool\\_\\_a\\%b\\\\c%"
+
+
+def test_registry_lists_the_resources_of_its_run_only(state_store):
+    registry = AnyscaleRunRegistry(mock.Mock(), "dag", "run")
+    registry.register("cluster", "ses_1", scope="prj_1", task_id="create")
+    AnyscaleRunRegistry(mock.Mock(), "dag", "other_run").register("cluster", "ses_2")
+
+    assert [(r["id"], r["scope"], r["task_id"]) for r in registry.resources()] == [("ses_1", "prj_1", "create")]
+
+    registry.unregister("cluster", "ses_1")
+    assert registry.resources() == []
+
+
+def test_teardown_terminates_running_resources_and_drops_stopped_ones(state_store):
+    hook = mock.Mock()
+    hook.batch_fetch.side_effect = lambda kind, scope, wanted, fetch_one: {
+        "ses_1": SimpleNamespace(state="Running"),
+        "ses_2": SimpleNamespace(state="Terminated"),
+    }
+    registry = AnyscaleRunRegistry(hook, "dag", "run")
+    registry.register("cluster", "ses_1", scope="prj_1")
+    registry.register("cluster", "ses_2", scope="prj_1")
+
+    rows = registry.teardown(wait=False)
+
+    assert {row["id"]: row["action"] for row in rows} == {"ses_1": "terminated", "ses_2": "already stopped"}
+    hook.sdk.terminate_cluster.assert_called_once_with(cluster_id="ses_1", terminate_cluster_options={})
+    assert [record["id"] for record in registry.resources()] == ["ses_1"]
+
+
+def _start(sdk, **kwargs):
+    sdk.start_cluster.return_value = SimpleNamespace(result=SimpleNamespace(to_dict=lambda: {"id": "op_1"}))
+    return AnyscaleStartClusterOperator(task_id="start", cluster_id="ses_1", **kwargs)
+
+
+def test_starting_a_cluster_does_not_claim_it(sdk, state_store, context):
+    operator = _start(sdk)
+    operator.execute(context)
+
+    assert state_store.records == {}
+    assert operator._running == []
+
+
+def test_starting_an_owned_cluster_registers_it(sdk, state_store, context):
+    operator = _start(sdk, owns_cluster=True)
+    operator.execute(context)
+
+    assert [record["id"] for record in AnyscaleRunRegistry(None, "dag", "run").resources()] == ["ses_1"]
+    assert operator._running == [("cluster", "ses_1")]
+
+
+def test_operators_do_not_register_what_they_create_by_default(sdk, state_store, context):
+    from tests.test_production_jobs import _job, _operator
+
+    sdk.create_job.return_value = SimpleNamespace(result=_job("prodjob_1"))
+    operator = _operator()
+    operator.wait_for_completion = False
+    operator.execute(context)
+
+    assert AnyscaleRunRegistry(None, "dag", "run").resources() == []
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from airflow.exceptions import AirflowException, TaskDeferred
+
+from anyscale_provider.operators.session_command import (
+    AnyscaleCreateSessionCommandOperator, AnyscaleCreateSessionCommandsOperator)
+from anyscale_provider.utils import PollPolicy
+
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _command(session_id, shell_command, status_code=None):
+    return SimpleNamespace(
+        id=f"sc_{session_id}_{shell_command}",
+        session_id=session_id,
+        shell_command=shell_command,
+        status_code=status_code,
+        created_at=CREATED_AT,
+        finished_at=None,
+    )
+
+
+def test_commands_already_created_are_killed_when_a_submission_fails(sdk, state_store, context):
+    from anyscale.sdk.anyscale_client.rest import ApiException
+
+    def create_session_command(create):
+        if create["session_id"] == "ses_gone":
+            raise ApiException(status=404)
+
+        return SimpleNamespace(result=_command(create["session_id"], create["shell_command"]))
+
+    sdk.create_session_command.side_effect = create_session_command
+    sdk.get_session_command.side_effect = lambda command_id: SimpleNamespace(
+        result=SimpleNamespace(id=command_id, status_code=None))
+
+    operator = AnyscaleCreateSessionCommandsOperator(
+        task_id="task", session_ids=["ses_1", "ses_gone"], shell_commands=["ls"], register_resources=True)
+
+    with pytest.raises(AirflowException, match="1 of 2 session_commands could not be created"):
+        operator.execute(context)
+
+    sdk.kill_session_command.assert_called_once_with(session_command_id="sc_ses_1_ls")
+    assert operator._running == []
+
+    rows = context["ti"].xcom["return_value"]
+    assert [(row["session_id"], row["id"]) for row in rows] == [("ses_1", "sc_ses_1_ls"), ("ses_gone", None)]
+
+    registered = {record["id"]: record["scope"] for record in state_store.scan("anyscale_resource:").values()}
+    assert registered == {"sc_ses_1_ls": "ses_1"}
+
+
+def _finished(command, status_code, seconds):
+    return SimpleNamespace(**dict(
+        vars(command), status_code=status_code, finished_at=CREATED_AT + timedelta(seconds=seconds)))
+
+
+def _wait_for_commands(sdk, finished, **kwargs):
+    """Runs ``ls`` on two sessions; the commands finish on the second poll, as in ``finished``."""
+    sdk.create_session_command.side_effect = lambda create: SimpleNamespace(
+        result=_command(create["session_id"], create["shell_command"]))
+
+    operator = AnyscaleCreateSessionCommandsOperator(
+        task_id="task", session_ids=["ses_1", "ses_2"], shell_commands=["ls"], wait_for_completion=True,
+        poll_policy=PollPolicy(initial_delay=0.001, max_delay=0.001), **kwargs)
+
+    polls = []
+
+    def batch_fetch(kind, session_id, command_ids, fetch_one):
+        polls.append(session_id)
+        command = _command(session_id, "ls")
+
+        if polls.count(session_id) == 1:
+            return {command.id: command}
+
+        return {command.id: _finished(command, *finished[session_id])}
+
+    operator.hook.batch_fetch = batch_fetch
+    return operator
+
+
+def test_commands_are_awaited_and_returned_with_exit_codes_and_durations(sdk, state_store, context):
+    operator = _wait_for_commands(
+        sdk, {"ses_1": (0, 30), "ses_2": (1, 90)}, fail_on_error=False, register_resources=True)
+
+    rows = operator.execute(context)
+
+    assert [(row["id"], row["status_code"], row["duration"]) for row in rows] == [
+        ("sc_ses_1_ls", 0, 30), ("sc_ses_2_ls", 1, 90)]
+
+    # finished commands are no longer the run's to stop.
+    assert state_store.scan("anyscale_resource:") == {}
+    assert operator._running == []
+
+
+def test_a_failed_command_fails_the_task_with_every_row(sdk, state_store, context):
+    operator = _wait_for_commands(sdk, {"ses_1": (0, 30), "ses_2": (1, 90)})
+
+    with pytest.raises(AirflowException, match="1 of 2 session commands ended with errors"):
+        operator.execute(context)
+
+    assert [row["status_code"] for row in context["ti"].xcom["return_value"]] == [0, 1]
+
+
+def _finished_command(sdk):
+    created = mock.Mock(id="sc_1", status_code=None, to_dict=lambda: {"id": "sc_1", "status_code": None})
+    finished = _finished(_command("ses_1", "ls"), 0, 30)
+    finished.id, finished.to_dict = "sc_1", lambda: {"id": "sc_1", "status_code": 0}
+
+    sdk.create_session_command.return_value = SimpleNamespace(result=created)
+    sdk.get_session_command.return_value = SimpleNamespace(result=finished)
+
+
+def test_the_finished_command_is_pushed_after_waiting(sdk, state_store, context):
+    _finished_command(sdk)
+
+    AnyscaleCreateSessionCommandOperator(
+        task_id="task", session_id="ses_1", shell_command="ls", wait_for_completion=True,
+        poll_policy=PollPolicy(initial_delay=0.001, max_delay=0.001)).execute(context)
+
+    assert context["ti"].xcom["status_code"] == "0"
+
+
+def test_the_finished_command_is_pushed_when_resumed(sdk, state_store, context):
+    _finished_command(sdk)
+    operator = AnyscaleCreateSessionCommandOperator(
+        task_id="task", session_id="ses_1", shell_command="ls", wait_for_completion=True,
+        deferrable=True, conn_id="anyscale_default")
+
+    with pytest.raises(TaskDeferred):
+        operator.execute(context)
+    assert context["ti"].xcom["status_code"] == "None"
+
+    operator.resume_execution("execute_complete", {
+        "event": {"status": "success", "session_command_id": "sc_1", "message": "done"},
+    }, context)
+
+    assert context["ti"].xcom["status_code"] == "0"
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+from anyscale_provider.utils.timeline import (
+    SUBMIT, SUBMITTED, TIMELINE_XCOM_KEY, TimelineRecorder, phases)
+
+
+def test_mark_records_each_event_once():
+    timeline = TimelineRecorder()
+
+    timeline.mark("production_job", "prodjob_1", "PENDING", 10)
+    timeline.mark("production_job", "prodjob_1", "PENDING", 20)
+    timeline.mark("production_job", "prodjob_1", "RUNNING", 30)
+
+    assert timeline.to_dict() == {
+        "resources": {
+            "prodjob_1": {"kind": "production_job", "events": [["PENDING", 10], ["RUNNING", 30]]},
+        },
+    }
+
+
+def test_mark_takes_naive_datetimes_as_utc():
+    timeline = TimelineRecorder()
+    timeline.mark("cluster", "ses_1", "Running", datetime(2024, 1, 1))
+
+    [[_, at]] = timeline.to_dict()["resources"]["ses_1"]["events"]
+    assert at == datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_merge_sorts_events_recorded_elsewhere():
+    timeline = TimelineRecorder()
+    timeline.mark("production_job", "prodjob_1", SUBMIT, 1)
+    timeline.mark("production_job", "prodjob_1", "SUCCESS", 50)
+
+    trigger = TimelineRecorder()
+    trigger.mark("production_job", "prodjob_1", "RUNNING", 5)
+    trigger.mark("production_job", "prodjob_1", "SUCCESS", 49)
+
+    timeline.merge(trigger.to_dict())
+    timeline.merge(None)
+
+    assert timeline.to_dict()["resources"]["prodjob_1"]["events"] == [
+        [SUBMIT, 1], ["RUNNING", 5], ["SUCCESS", 50]]
+    assert TimelineRecorder.from_dict(timeline.to_dict()).to_dict() == timeline.to_dict()
+
+
+def test_push_adds_the_task_instance(context):
+    TimelineRecorder().push(context)
+    assert context["ti"].xcom == {}
+
+    timeline = TimelineRecorder()
+    timeline.mark("production_job", "prodjob_1", SUBMITTED, 1)
+    timeline.push(context)
+
+    pushed = context["ti"].xcom[TIMELINE_XCOM_KEY]
+    assert (pushed["dag_id"], pushed["task_id"], pushed["run_id"]) == ("dag", "task", "run")
+    assert pushed["resources"] == timeline.to_dict()["resources"]
+
+
+def test_phases_last_until_the_next_event():
+    assert phases([["submit", 0], ["PENDING", 2], ["RUNNING", 10]]) == [
+        {"phase": "submit", "start": 0, "duration": 2},
+        {"phase": "PENDING", "start": 2, "duration": 8},
+    ]
+    assert phases([["submit", 0]]) == []
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from airflow.exceptions import AirflowException
+
+from anyscale_provider.operators.cluster import AnyscaleStartClusterOperator
+from anyscale_provider.sensors.production_jobs import AnyscaleProductionJobSensor
+from anyscale_provider.triggers.production_jobs import AnyscaleProductionJobTrigger
+from tests.test_production_jobs import _job
+
+
+def test_serialize_leaves_the_token_out(anyscale_connection):
+    trigger = AnyscaleProductionJobSensor(
+        task_id="wait", production_job_id="prodjob_1", project_id="prj_1",
+        conn_id="anyscale_default", deferrable=True,
+    ).get_trigger()
+
+    classpath, kwargs = trigger.serialize()
+
+    assert classpath == "anyscale_provider.triggers.production_jobs.AnyscaleProductionJobTrigger"
+    assert "auth_token" not in kwargs
+    assert kwargs["production_job_id"] == "prodjob_1"
+
+    # the triggerer rebuilds the trigger and reads the token from the connection.
+    assert AnyscaleProductionJobTrigger(**kwargs).hook.auth_token == "token"
+
+
+def test_deferring_with_a_raw_token_fails():
+    sensor = AnyscaleProductionJobSensor(
+        task_id="wait", production_job_id="prodjob_1", auth_token="secret", deferrable=True)
+
+    with pytest.raises(AirflowException, match="conn_id"):
+        sensor.get_trigger()
+
+
+def test_triggers_without_a_scope_poll_on_their_own(anyscale_connection, monkeypatch):
+    monkeypatch.setenv("AIRFLOW__ANYSCALE__BATCH_POLL", "True")
+
+    assert AnyscaleProductionJobTrigger(production_job_id="prodjob_1", project_id="prj_1")._can_batch()
+    assert not AnyscaleProductionJobTrigger(production_job_id="prodjob_1")._can_batch()
+
+
+def test_cluster_operators_pass_the_project_to_their_trigger(anyscale_connection):
+    operator = AnyscaleStartClusterOperator(
+        task_id="start", cluster_id="ses_1", project_id="prj_1", conn_id="anyscale_default",
+        wait_for_completion=True, deferrable=True)
+
+    assert operator._get_sensor().get_trigger()._batch_scope() == "prj_1"
+
+
+def test_evaluate_runs_off_the_event_loop(anyscale_connection):
+    trigger = AnyscaleProductionJobTrigger(production_job_id="prodjob_1", poll_interval=0)
+    trigger.sdk = mock.Mock()
+    trigger.sdk.get_production_job.return_value = SimpleNamespace(result=_job("prodjob_1", "SUCCESS"))
+    evaluated_in = []
+
+    def evaluate(production_job):
+        evaluated_in.append(threading.current_thread())
+        return AnyscaleProductionJobTrigger._evaluate(trigger, production_job)
+
+    trigger._evaluate = evaluate
+
+    async def first_event():
+        async for event in trigger.run():
+            return event
+
+    assert asyncio.run(first_event()).payload["status"] == "success"
+    assert evaluated_in and threading.main_thread() not in evaluated_in
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from anyscale_provider.utils import XCOM_MODE_PAYLOAD, percentile, push_to_xcom
+from tests.conftest import FakeTaskInstance
+
+RESULT = {
+    "id": "prodjob_1",
+    "state": {"current_state": "SUCCESS"},
+    "created_at": datetime(2024, 1, 1),
+    "secret": "do not push",
+}
+
+
+@pytest.fixture
+def ti():
+    return FakeTaskInstance()
+
+
+def test_keys_mode_pushes_one_string_per_key(ti):
+    push_to_xcom(RESULT, {"ti": ti}, ignore_keys=["secret"])
+
+    assert ti.xcom == {
+        "id": "prodjob_1",
+        "state": '{"current_state": "SUCCESS"}',
+        "created_at": "2024-01-01 00:00:00",
+    }
+
+
+def test_fields_limit_what_is_pushed(ti):
+    push_to_xcom(RESULT, {"ti": ti}, fields=["id"])
+
+    assert ti.xcom == {"id": "prodjob_1"}
+
+
+def test_payload_mode_pushes_one_json_friendly_row(ti):
+    push_to_xcom(RESULT, {"ti": ti}, ignore_keys=["secret"], mode=XCOM_MODE_PAYLOAD)
+
+    assert ti.xcom["return_value"] == {
+        "id": "prodjob_1",
+        "state": {"current_state": "SUCCESS"},
+        "created_at": "2024-01-01 00:00:00",
+    }
+
+
+def test_payload_mode_pushes_the_selected_fields_as_keys_too(ti):
+    # so that `op.output["id"]` still pulls the id.
+    push_to_xcom(RESULT, {"ti": ti}, fields=["id", "state"], mode=XCOM_MODE_PAYLOAD)
+
+    assert ti.xcom == {
+        "return_value": {"id": "prodjob_1", "state": {"current_state": "SUCCESS"}},
+        "id": "prodjob_1",
+        "state": {"current_state": "SUCCESS"},
+    }
+
+
+def test_unknown_mode_fails(ti):
+    with pytest.raises(ValueError, match="unknown xcom mode"):
+        push_to_xcom(RESULT, {"ti": ti}, mode="rows")
+
+
+def test_percentile_is_the_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+
+    assert [percentile(values, q) for q in (0, 50, 95, 100)] == [1, 3, 5, 5]
+    assert percentile([7], 99) == 7